@@ -0,0 +1,73 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+benchmarks.bench_clustering
+---------------------------
+
+The data-driven operations: :class:`.GaussianMixtureOp`, :class:`.KMeansOp`
+and :class:`.FlowPeaksOp`.  Estimating and applying are timed separately.
+'''
+
+import cytoflow as flow
+
+from .common import _EstimateBenchmark, _ApplyBenchmark
+
+def _gaussian_op():
+    return flow.GaussianMixtureOp(name = "Gauss",
+                                  channels = ["V2-A", "Y2-A"],
+                                  scale = {"V2-A" : "logicle",
+                                           "Y2-A" : "logicle"},
+                                  by = ["Dox"],
+                                  num_components = 2)
+    
+def _kmeans_op():
+    return flow.KMeansOp(name = "KM",
+                         channels = ["V2-A", "Y2-A"],
+                         scale = {"V2-A" : "logicle",
+                                  "Y2-A" : "logicle"},
+                         by = ["Dox"],
+                         num_clusters = 2)
+    
+def _flowpeaks_op():
+    return flow.FlowPeaksOp(name = "FP",
+                            channels = ["V2-A", "Y2-A"],
+                            scale = {"V2-A" : "logicle",
+                                     "Y2-A" : "logicle"},
+                            by = ["Dox"],
+                            h0 = 0.5)
+    
+    
+class GaussianMixtureEstimate(_EstimateBenchmark):
+    make_op = staticmethod(_gaussian_op)
+    
+class GaussianMixtureApply(_ApplyBenchmark):
+    make_op = staticmethod(_gaussian_op)
+    
+class KMeansEstimate(_EstimateBenchmark):
+    make_op = staticmethod(_kmeans_op)
+    
+class KMeansApply(_ApplyBenchmark):
+    make_op = staticmethod(_kmeans_op)
+    
+class FlowPeaksEstimate(_EstimateBenchmark):
+    make_op = staticmethod(_flowpeaks_op)
+    
+class FlowPeaksApply(_ApplyBenchmark):
+    make_op = staticmethod(_flowpeaks_op)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+benchmarks.bench_gates
+----------------------
+
+The gates: :class:`.ThresholdOp`, :class:`.PolygonOp` (including a 
+free-hand gate with many vertices), 
+:class:`.DensityGateOp` and :class:`.GateChainOp`.
+'''
+
+import numpy as np
+import matplotlib as mpl
+
+import cytoflow as flow
+from cytoflow.operations.polygon import _PolygonIndex
+
+from .common import (_Benchmark, _EstimateBenchmark, _ApplyBenchmark, 
+                     synthetic_experiment)
+
+def _threshold_op():
+    return flow.ThresholdOp(name = "T",
+                            channel = "Y2-A",
+                            threshold = 2000)
+    
+def _polygon_op():
+    return flow.PolygonOp(name = "Polygon",
+                          xchannel = "V2-A",
+                          ychannel = "Y2-A",
+                          vertices = [(-95.86, 12436.45),
+                                      (116.29, 22530.75),
+                                      (767.63, 4873.08),
+                                      (101.64, 939.38),
+                                      (-266.93, 2914.59)])
+
+def _lasso_vertices():
+    # a free-hand gate, with lots of vertices
+    theta = np.linspace(0, 2 * np.pi, 500, endpoint = False)
+    r = 1 + 0.3 * np.sin(12 * theta)
+    return list(zip(300 + 400 * r * np.cos(theta), 
+                    6000 + 8000 * r * np.sin(theta)))
+
+def _lasso_op():
+    return flow.PolygonOp(name = "Lasso",
+                          xchannel = "V2-A",
+                          ychannel = "Y2-A",
+                          vertices = _lasso_vertices())
+
+def _density_op():
+    return flow.DensityGateOp(name = "D",
+                              xchannel = "V2-A",
+                              ychannel = "Y2-A",
+                              xscale = "logicle",
+                              yscale = "logicle",
+                              by = ["Dox"],
+                              keep = 0.8)
+
+def _gate_chain_op():
+    return flow.GateChainOp(
+        gates = [flow.ThresholdOp(name = "T{}".format(i),
+                                  channel = channel,
+                                  threshold = 100 * (i + 1))
+                 for i, channel in enumerate(["V2-A", "Y2-A", "B1-A", "FSC-A"] * 2)])
+    
+    
+class ThresholdApply(_ApplyBenchmark):
+    make_op = staticmethod(_threshold_op)
+    
+class PolygonApply(_ApplyBenchmark):
+    make_op = staticmethod(_polygon_op)
+    
+class GateChainApply(_ApplyBenchmark):
+    make_op = staticmethod(_gate_chain_op)
+    
+class LassoApply(_ApplyBenchmark):
+    make_op = staticmethod(_lasso_op)
+    
+class LassoMembership(_Benchmark):
+    """
+    Testing events against a many-vertex polygon: the grid index that 
+    :class:`.PolygonOp` uses vs. :meth:`matplotlib.path.Path.contains_points`
+    """
+    
+    def setup(self, events):
+        ex = synthetic_experiment(events)
+        self.x = ex.data["V2-A"].values
+        self.y = ex.data["Y2-A"].values
+        self.vertices = np.array(_lasso_vertices())
+        
+    def time_index(self, events):
+        _PolygonIndex(self.vertices).contains(self.x, self.y)
+        
+    def time_contains_points(self, events):
+        mpl.path.Path(self.vertices).contains_points(np.column_stack((self.x, self.y)))
+    
+class DensityGateEstimate(_EstimateBenchmark):
+    make_op = staticmethod(_density_op)
+    
+class DensityGateApply(_ApplyBenchmark):
+    make_op = staticmethod(_density_op)
+    
+    
+class GateTree(_Benchmark):
+    """
+    An experiment with eight threshold gates: how much memory do the gates
+    take, and how long do cloning and querying take?
+    """
+    
+    def setup(self, events):
+        self.ex = synthetic_experiment(events)
+        for i, channel in enumerate(["V2-A", "Y2-A", "B1-A", "FSC-A"] * 2):
+            self.ex = flow.ThresholdOp(name = "T{}".format(i),
+                                       channel = channel,
+                                       threshold = 100 * (i + 1)).apply(self.ex)
+            
+    def track_gate_memory(self, events):
+        return int(sum(self.ex.data["T{}".format(i)].nbytes for i in range(8)))
+    
+    track_gate_memory.unit = "bytes"
+            
+    def time_clone(self, events):
+        self.ex.clone()
+        
+    def time_query(self, events):
+        self.ex.query("T0 and not T1 and (T2 or T3)")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+benchmarks.bench_import
+-----------------------
+
+Importing and exporting FCS files, and the basic :class:`.Experiment` 
+operations every other operation uses.
+'''
+
+import shutil, tempfile
+
+import cytoflow as flow
+
+from .common import _Benchmark, synthetic_experiment, write_tubes
+
+class Import(_Benchmark):
+    
+    def setup(self, events):
+        self.directory = tempfile.mkdtemp()
+        self.tubes = write_tubes(self.directory, events)
+        
+    def teardown(self, events):
+        shutil.rmtree(self.directory)
+        
+    def time_import(self, events):
+        flow.ImportOp(conditions = {"Dox" : "float", "Well" : "category"},
+                      tubes = self.tubes).apply()
+                      
+    def peakmem_import(self, events):
+        flow.ImportOp(conditions = {"Dox" : "float", "Well" : "category"},
+                      tubes = self.tubes).apply()
+        
+        
+class ExperimentMethods(_Benchmark):
+    
+    def setup(self, events):
+        self.ex = synthetic_experiment(events)
+        
+    def time_clone(self, events):
+        self.ex.clone()
+        
+    def time_query(self, events):
+        self.ex.query("Dox == 10.0")
+        
+    def time_subset(self, events):
+        self.ex.subset("Well", "A")
+        
+        
+class ExperimentFirstLook(_Benchmark):
+    """
+    The first look at an experiment's conditions scans the data; after that,
+    they're cached (see :class:`ExperimentCachedLook`).
+    """
+    
+    # a new experiment for each sample, and no warm-up, so that every call
+    # is a first look.
+    number = 1
+    repeat = 5
+    warmup_time = 0
+    
+    def setup(self, events):
+        self.ex = synthetic_experiment(events)
+        
+    def time_conditions(self, events):
+        self.ex.conditions
+        
+        
+class ExperimentCachedLook(_Benchmark):
+    
+    def setup(self, events):
+        self.ex = synthetic_experiment(events)
+        self.ex.conditions
+        self.ex.channels
+        
+    def time_conditions(self, events):
+        self.ex.conditions
+        
+    def time_channels(self, events):
+        self.ex.channels
+        
+        
+class Export(_Benchmark):
+    
+    def setup(self, events):
+        self.directory = tempfile.mkdtemp()
+        self.ex = synthetic_experiment(events)
+        
+    def teardown(self, events):
+        shutil.rmtree(self.directory)
+        
+    def time_export(self, events):
+        # ExportFCS won't overwrite files, so use a new directory each time
+        flow.ExportFCS(path = tempfile.mkdtemp(dir = self.directory),
+                       by = ["Dox", "Well"]).export(self.ex)
+                       
+    def peakmem_export(self, events):
+        flow.ExportFCS(path = tempfile.mkdtemp(dir = self.directory),
+                       by = ["Dox", "Well"]).export(self.ex)
+        
+    def time_export_parallel(self, events):
+        flow.ExportFCS(path = tempfile.mkdtemp(dir = self.directory),
+                       by = ["Dox", "Well"],
+                       parallel = True).export(self.ex)
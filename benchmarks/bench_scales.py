@@ -0,0 +1,55 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+benchmarks.bench_scales
+-----------------------
+
+Building the scales (which, for ``logicle``, means estimating its 
+parameters from the data) and transforming data with them.
+'''
+
+import cytoflow.utility as util
+
+from .common import SIZES, _Benchmark, synthetic_experiment
+
+class Scales(_Benchmark):
+    
+    params = [SIZES, ["linear", "log", "logicle"]]
+    param_names = ['events', 'scale']
+    
+    def setup(self, events, scale):
+        self.ex = synthetic_experiment(events)
+        self.scale = util.scale_factory(scale, self.ex, channel = "Y2-A")
+        self.scale(1.0)
+        
+    def time_scale_factory(self, events, scale):
+        # transforming a value makes the scale estimate its parameters (once
+        # per experiment -- in setup().)
+        util.scale_factory(scale, self.ex, channel = "Y2-A")(1.0)
+        
+    def time_scale_factory_uncached(self, events, scale):
+        self.ex._cache = None
+        util.scale_factory(scale, self.ex, channel = "Y2-A")(1.0)
+        
+    def time_transform(self, events, scale):
+        self.scale(self.ex["Y2-A"])
+        
+    def time_inverse(self, events, scale):
+        self.scale.inverse(self.ex["Y2-A"])
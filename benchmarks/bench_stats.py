@@ -0,0 +1,79 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+benchmarks.bench_stats
+----------------------
+
+Computing statistics with :class:`.ChannelStatisticOp`, and bootstrapping
+their confidence intervals.
+'''
+
+import numpy as np
+
+import cytoflow as flow
+import cytoflow.utility as util
+
+from .common import _Benchmark, _ApplyBenchmark, synthetic_experiment
+
+def _channel_stat_op():
+    return flow.ChannelStatisticOp(name = "ByDox",
+                                   channel = "Y2-A",
+                                   by = ["Dox", "Well"],
+                                   function = flow.geom_mean)
+    
+    
+class ChannelStatisticApply(_ApplyBenchmark):
+    make_op = staticmethod(_channel_stat_op)
+    
+
+class ChannelStatisticCompute(_Benchmark):
+    """
+    Statistics are computed lazily; time looking one up, too.
+    """
+    
+    def setup(self, events):
+        self.ex = synthetic_experiment(events)
+        
+    def time_apply_and_compute(self, events):
+        ex = _channel_stat_op().apply(self.ex)
+        ex.statistics[("ByDox", "geom_mean")]
+        
+
+class Bootstrap(_Benchmark):
+    """
+    :func:`.ci` evaluates the common reducers on all the resamples at once;
+    compare that to calling the function once per resample.
+    """
+    
+    params = [[100, 10000, 100000], ["mean", "median", "geom_mean"]]
+    param_names = ['events', 'function']
+    
+    def setup(self, events, function):
+        self.data = np.random.RandomState(0).lognormal(size = events)
+        self.function = {"mean" : np.mean,
+                         "median" : np.median,
+                         "geom_mean" : util.geom_mean}[function]
+        
+    def time_ci(self, events, function):
+        util.ci(self.data, self.function, boots = 1000)
+        
+    def time_ci_loop(self, events, function):
+        # not a reducer ci() knows, so it's called once per resample
+        util.ci(self.data, lambda x: self.function(x), boots = 1000)
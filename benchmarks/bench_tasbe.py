@@ -0,0 +1,67 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+benchmarks.bench_tasbe
+----------------------
+
+Compensation with :class:`.BleedthroughLinearOp` and 
+:class:`.BleedthroughPiecewiseOp`, and bead calibration with 
+:class:`.BeadCalibrationOp`, on an experiment resampled from 
+``tasbe/rby.fcs``.  (The single-color controls and the beads are always
+the same size, so the estimates don't change much with ``events``.)
+'''
+
+import os
+
+import cytoflow as flow
+
+from .common import _EstimateBenchmark, _ApplyBenchmark, TASBE_CONTROLS, TASBE_DIR
+
+def _linear_op():
+    return flow.BleedthroughLinearOp(controls = dict(TASBE_CONTROLS))
+
+def _bead_op():
+    beads = "Spherotech RCP-30-5A Lot AA01-AA04, AB01, AB02, AC01, GAA01-R"
+    return flow.BeadCalibrationOp(units = {"Pacific Blue-A" : "MEBFP",
+                                           "FITC-A" : "MEFL",
+                                           "PE-Tx-Red-YG-A" : "MEPTR"},
+                                  beads = flow.BeadCalibrationOp.BEADS[beads],
+                                  beads_file = os.path.join(TASBE_DIR, "beads.fcs"))
+
+def _bleedthrough_op():
+    return flow.BleedthroughPiecewiseOp(controls = dict(TASBE_CONTROLS),
+                                        ignore_deprecated = True)
+    
+    
+class BleedthroughLinearApply(_ApplyBenchmark):
+    make_op = staticmethod(_linear_op)
+    source = "tasbe"
+    
+class BleedthroughPiecewiseEstimate(_EstimateBenchmark):
+    make_op = staticmethod(_bleedthrough_op)
+    source = "tasbe"
+    
+class BleedthroughPiecewiseApply(_ApplyBenchmark):
+    make_op = staticmethod(_bleedthrough_op)
+    source = "tasbe"
+    
+class BeadCalibrationEstimate(_EstimateBenchmark):
+    make_op = staticmethod(_bead_op)
+    source = "tasbe"
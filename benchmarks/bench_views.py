@@ -0,0 +1,78 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+benchmarks.bench_views
+----------------------
+
+Plotting the main views (with the ``Agg`` backend.)
+'''
+
+import cytoflow as flow
+
+from .common import _Benchmark, synthetic_experiment
+
+class Views(_Benchmark):
+    
+    def setup(self, events):
+        self.ex = synthetic_experiment(events)
+        self.stats_ex = flow.ChannelStatisticOp(name = "ByDox",
+                                                channel = "Y2-A",
+                                                by = ["Dox", "Well"],
+                                                function = flow.geom_mean).apply(self.ex)
+        
+    def time_histogram(self, events):
+        flow.HistogramView(channel = "Y2-A",
+                           scale = "logicle",
+                           huefacet = "Dox").plot(self.ex)
+                           
+    def time_histogram_facets(self, events):
+        flow.HistogramView(channel = "Y2-A",
+                           scale = "logicle",
+                           xfacet = "Dox",
+                           yfacet = "Well").plot(self.ex)
+        
+    def time_scatterplot(self, events):
+        flow.ScatterplotView(xchannel = "V2-A",
+                             ychannel = "Y2-A",
+                             xscale = "logicle",
+                             yscale = "logicle",
+                             huefacet = "Dox").plot(self.ex)
+        
+    def time_density(self, events):
+        flow.DensityView(xchannel = "V2-A",
+                         ychannel = "Y2-A",
+                         xscale = "logicle",
+                         yscale = "logicle").plot(self.ex)
+                         
+    def time_histogram_2d(self, events):
+        flow.Histogram2DView(xchannel = "V2-A",
+                             ychannel = "Y2-A",
+                             xscale = "logicle",
+                             yscale = "logicle",
+                             huefacet = "Dox").plot(self.ex)
+                             
+    def time_stats_1d(self, events):
+        flow.Stats1DView(statistic = ("ByDox", "geom_mean"),
+                         variable = "Dox",
+                         variable_scale = "log",
+                         huefacet = "Well").plot(self.stats_ex)
+                         
+    def peakmem_scatterplot(self, events):
+        self.time_scatterplot(events)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+benchmarks.common
+-----------------
+
+Synthetic experiments for the benchmarks.
+
+The test data in ``cytoflow/tests/data`` is real, but small.  To see how 
+cytoflow scales, :func:`synthetic_experiment` resamples it (with a little 
+noise, so clustering doesn't see exact duplicates) to any number of events,
+keeping the tubes' conditions.  The same ``events`` always gives the same
+experiment.
+'''
+
+import os
+from functools import lru_cache
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+import numpy as np
+
+import cytoflow as flow
+import cytoflow.utility as util
+
+# the experiment sizes every benchmark is run at
+SIZES = [100000, 1000000, 10000000]
+
+# cytoflow's test data
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(flow.__file__)),
+                        "tests", "data")
+PLATE_DIR = os.path.join(DATA_DIR, "Plate01")
+TASBE_DIR = os.path.join(DATA_DIR, "tasbe")
+
+PLATE_CHANNELS = ["FSC-A", "SSC-A", "V2-A", "Y2-A", "B1-A"]
+PLATE_TUBES = [("CFP_Well_A4.fcs", 0.0, 'A'),
+               ("RFP_Well_A3.fcs", 10.0, 'A'),
+               ("YFP_Well_A7.fcs", 100.0, 'A'),
+               ("CFP_Well_B4.fcs", 0.0, 'B'),
+               ("RFP_Well_A6.fcs", 10.0, 'B'),
+               ("YFP_Well_C7.fcs", 100.0, 'B')]
+
+TASBE_CHANNELS = ["Pacific Blue-A", "FITC-A", "PE-Tx-Red-YG-A"]
+TASBE_CONTROLS = {"Pacific Blue-A" : os.path.join(TASBE_DIR, "ebfp.fcs"),
+                  "FITC-A" : os.path.join(TASBE_DIR, "eyfp.fcs"),
+                  "PE-Tx-Red-YG-A" : os.path.join(TASBE_DIR, "mkate.fcs")}
+
+@lru_cache()
+def _plate_experiment():
+    tubes = [flow.Tube(file = os.path.join(PLATE_DIR, f),
+                       conditions = {"Dox" : dox, "Well" : well})
+             for f, dox, well in PLATE_TUBES]
+    
+    return flow.ImportOp(conditions = {"Dox" : "float", "Well" : "category"},
+                         channels = {c : c for c in PLATE_CHANNELS},
+                         tubes = tubes).apply()
+                         
+@lru_cache()
+def _tasbe_experiment():
+    tube = flow.Tube(file = os.path.join(TASBE_DIR, "rby.fcs"),
+                     conditions = {"Dox" : 1.0})
+    
+    return flow.ImportOp(conditions = {"Dox" : "float"},
+                         channels = {c : c for c in TASBE_CHANNELS},
+                         tubes = [tube]).apply()
+
+def resample(ex, events, seed = 0):
+    """
+    Resample ``ex`` (with replacement) to ``events`` events, the same 
+    number from each tube, adding about 1% noise to the channels.
+    """
+
+    rs = np.random.RandomState(seed)
+    
+    conditions = list(ex.conditions)
+    if conditions:
+        groups = list(ex.data.groupby(conditions, observed = True).indices.values())
+    else:
+        groups = [np.arange(len(ex))]
+        
+    positions = np.concatenate([rs.choice(g, size = events // len(groups))
+                                for g in groups])
+    positions = np.concatenate([positions, 
+                                rs.choice(len(ex), size = events - len(positions))])
+    
+    ret = ex.clone()
+    ret.data = ex.data.take(positions).reset_index(drop = True)
+    for c in ret.channels:
+        values = ret.data[c].values
+        ret.data[c] = values + rs.normal(scale = 0.01 * np.std(values),
+                                         size = len(values))
+    
+    return ret
+
+def synthetic_experiment(events, source = "plate"):
+    """
+    An :class:`.Experiment` with ``events`` events, resampled from the test
+    data.  ``source`` is either ``plate`` (six tubes from ``Plate01``, with
+    ``Dox`` and ``Well`` conditions) or ``tasbe`` (``tasbe/rby.fcs``, which
+    has the channels the TASBE controls were taken with.)
+    """
+    
+    if source == "plate":
+        ex = _plate_experiment()
+    elif source == "tasbe":
+        ex = _tasbe_experiment()
+    else:
+        raise ValueError("Unknown source {}".format(source))
+    
+    return resample(ex, events)
+
+def write_tubes(directory, events):
+    """
+    Write a synthetic experiment of ``events`` events as FCS files in
+    ``directory``, one per tube.  Returns a list of :class:`.Tube`.
+    """
+    
+    ex = synthetic_experiment(events)
+    tubes = []
+    for i, (dox, well) in enumerate(ex.data.groupby(["Dox", "Well"], observed = True).groups):
+        data = ex.data[(ex.data["Dox"] == dox) & (ex.data["Well"] == well)]
+        filename = os.path.join(directory, "tube_{}.fcs".format(i))
+        util.write_fcs(filename,
+                       PLATE_CHANNELS,
+                       {c : ex.metadata[c]['range'] for c in PLATE_CHANNELS},
+                       data[PLATE_CHANNELS].values,
+                       compat_chn_names = False,
+                       compat_negative = False)
+        tubes.append(flow.Tube(file = filename,
+                               conditions = {"Dox" : dox, "Well" : well}))
+        
+    return tubes
+
+def apply_memory(op, experiment):
+    """
+    The peak memory, in bytes, used by ``op.apply(experiment)`` -- measured
+    with :class:`.Trace`, so it doesn't include the experiment itself.
+    """
+    
+    trace = flow.Trace()
+    with flow.tracing(trace):
+        op.apply(experiment)
+        
+    memory = trace.events[-1].memory
+    if memory is None:
+        # someone else is running tracemalloc, and this python can't start
+        # a new peak without clearing their traces.  asv skips a benchmark
+        # that raises NotImplementedError.
+        raise NotImplementedError("Can't measure memory while tracemalloc "
+                                  "is already in use")
+    return memory
+
+class _Benchmark(object):
+    """
+    The shared parts of the benchmarks: the parameters (the experiment sizes)
+    and a generous timeout.
+    """
+    
+    params = [SIZES]
+    param_names = ['events']
+    timeout = 1200
+    
+    def teardown(self, *args):
+        plt.close('all')
+
+
+class _EstimateBenchmark(_Benchmark):
+    """
+    Time an operation's :meth:`estimate`.  Subclasses set ``make_op`` (a
+    function that makes the operation) and ``source`` (see 
+    :func:`synthetic_experiment`).
+    """
+    
+    source = "plate"
+    
+    def setup(self, events):
+        self.ex = synthetic_experiment(events, self.source)
+        self.op = self.make_op()
+        
+    def time_estimate(self, events):
+        self.op.estimate(self.ex)
+        
+    def peakmem_estimate(self, events):
+        self.op.estimate(self.ex)
+        
+        
+class _ApplyBenchmark(_Benchmark):
+    """
+    Time an operation's :meth:`apply` (after estimating it, if it needs to
+    be) and measure how much memory it uses.  Subclasses set ``make_op`` 
+    and ``source``, as for :class:`_EstimateBenchmark`.
+    """
+    
+    source = "plate"
+    
+    def setup(self, events):
+        self.ex = synthetic_experiment(events, self.source)
+        self.op = self.make_op()
+        if hasattr(self.op, 'estimate'):
+            self.op.estimate(self.ex)
+        
+    def time_apply(self, events):
+        self.op.apply(self.ex)
+        
+    def track_apply_memory(self, events):
+        return apply_memory(self.op, self.ex)
+    
+    track_apply_memory.unit = "bytes"
@@ -31,7 +31,8 @@ warnings.filterwarnings('ignore', 'axes.color_cycle is deprecated and replaced w
 # warnings.filterwarnings('ignore', 'Using a non-tuple sequence for multidimensional indexing is deprecated.*')
 
 # and from matplotlib 3.1.1 -- there's some weird interaction with seaborn here.
-import matplotlib.text
+# (filter matplotlib.text's logger by name, so we don't have to import
+# matplotlib to do it.)
 import logging
 class MplFilter(logging.Filter):
     def filter(self, record):
@@ -40,72 +41,76 @@ class MplFilter(logging.Filter):
         else:
             return 1
         
-matplotlib.text._log.addFilter(MplFilter())
+logging.getLogger('matplotlib.text').addFilter(MplFilter())
 
 # keep track of whether we're running in the GUI.
 # there is the occasional place where we differ in behavior
 RUNNING_IN_GUI = False
 
-# basics
-from .experiment import Experiment
-from .operations.import_op import ImportOp, Tube
-
-# gates
-from .operations.threshold import ThresholdOp
-from .operations.range import RangeOp
-from .operations.range2d import Range2DOp
-from .operations.polygon import PolygonOp
-from .operations.quad import QuadOp
-
-# TASBE
-from .operations.autofluorescence import AutofluorescenceOp
-from .operations.bleedthrough_piecewise import BleedthroughPiecewiseOp
-from .operations.bleedthrough_linear import BleedthroughLinearOp
-from .operations.bead_calibration import BeadCalibrationOp
-from .operations.color_translation import ColorTranslationOp
-
-# data-driven
-from .operations.ratio import RatioOp
-from .operations.density import DensityGateOp
-from .operations.gaussian_1d import GaussianMixture1DOp
-from .operations.gaussian_2d import GaussianMixture2DOp
-from .operations.gaussian import GaussianMixtureOp
-from .operations.kmeans import KMeansOp
-from .operations.flowpeaks import FlowPeaksOp
-from .operations.pca import PCAOp
-
-# channels
-from .operations.channel_stat import ChannelStatisticOp
-from .operations.frame_stat import FrameStatisticOp
-from .operations.xform_stat import TransformStatisticOp
-
-# misc
-from .operations.binning import BinningOp
-
-# views
-from .views.histogram import HistogramView
-from .views.scatterplot import ScatterplotView
-from .views.densityplot import DensityView
-from .views.stats_1d import Stats1DView
-from .views.stats_2d import Stats2DView
-from .views.bar_chart import BarChartView
-
-from .views.kde_1d import Kde1DView
-from .views.kde_2d import Kde2DView
-
-from .views.histogram_2d import Histogram2DView
-from .views.violin import ViolinPlotView
-from .views.table import TableView
-from .views.radviz import RadvizView
-from .views.parallel_coords import ParallelCoordinatesView
-
-from .views.export_fcs import ExportFCS
-
-# util
-from .utility.util_functions import (geom_mean, geom_sd, geom_sd_range,
-                                     geom_sem, geom_sem_range)
-from .utility.algorithms import (ci, percentiles)
-from .utility.scale import set_default_scale, get_default_scale
+# the public names are imported when they're first used, so 'import cytoflow'
+# is fast.  see cytoflow/utility/lazy.py
+from .utility.lazy import lazy_import
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, {
+    # basics
+    '.experiment' : ['Experiment'],
+    '.operations.import_op' : ['ImportOp', 'Tube'],
+
+    # gates
+    '.operations.threshold' : ['ThresholdOp'],
+    '.operations.range' : ['RangeOp'],
+    '.operations.range2d' : ['Range2DOp'],
+    '.operations.polygon' : ['PolygonOp'],
+    '.operations.quad' : ['QuadOp'],
+    '.operations.gate_chain' : ['GateChainOp'],
+
+    # TASBE
+    '.operations.autofluorescence' : ['AutofluorescenceOp'],
+    '.operations.bleedthrough_piecewise' : ['BleedthroughPiecewiseOp'],
+    '.operations.bleedthrough_linear' : ['BleedthroughLinearOp'],
+    '.operations.bead_calibration' : ['BeadCalibrationOp'],
+    '.operations.color_translation' : ['ColorTranslationOp'],
+
+    # data-driven
+    '.operations.ratio' : ['RatioOp'],
+    '.operations.density' : ['DensityGateOp'],
+    '.operations.gaussian_1d' : ['GaussianMixture1DOp'],
+    '.operations.gaussian_2d' : ['GaussianMixture2DOp'],
+    '.operations.gaussian' : ['GaussianMixtureOp'],
+    '.operations.kmeans' : ['KMeansOp'],
+    '.operations.flowpeaks' : ['FlowPeaksOp'],
+    '.operations.pca' : ['PCAOp'],
+
+    # channels
+    '.operations.channel_stat' : ['ChannelStatisticOp'],
+    '.operations.frame_stat' : ['FrameStatisticOp'],
+    '.operations.xform_stat' : ['TransformStatisticOp'],
+
+    # misc
+    '.operations.binning' : ['BinningOp'],
+
+    # views
+    '.views.histogram' : ['HistogramView'],
+    '.views.scatterplot' : ['ScatterplotView'],
+    '.views.densityplot' : ['DensityView'],
+    '.views.stats_1d' : ['Stats1DView'],
+    '.views.stats_2d' : ['Stats2DView'],
+    '.views.bar_chart' : ['BarChartView'],
+    '.views.kde_1d' : ['Kde1DView'],
+    '.views.kde_2d' : ['Kde2DView'],
+    '.views.histogram_2d' : ['Histogram2DView'],
+    '.views.violin' : ['ViolinPlotView'],
+    '.views.table' : ['TableView'],
+    '.views.radviz' : ['RadvizView'],
+    '.views.parallel_coords' : ['ParallelCoordinatesView'],
+    '.views.export_fcs' : ['ExportFCS'],
+
+    # util
+    '.utility.util_functions' : ['geom_mean', 'geom_sd', 'geom_sd_range',
+                                 'geom_sem', 'geom_sem_range'],
+    '.utility.algorithms' : ['ci', 'percentiles'],
+    '.utility.scale' : ['set_default_scale', 'get_default_scale'],
+    '.utility.profiling' : ['Trace', 'tracing']})
 
 from ._version import get_versions  # @UnresolvedImport
 __version__ = get_versions()['version']
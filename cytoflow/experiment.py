@@ -22,12 +22,207 @@ cytoflow.experiment
 -------------------
 '''
 
+import ast, functools, operator, os, pickle, shutil, tempfile, threading
+from collections import Counter
+from collections.abc import MutableMapping
+from warnings import warn
+
+import numpy as np
 import pandas as pd
 from pandas.api.types import CategoricalDtype, is_categorical_dtype
 from traits.api import (HasStrictTraits, Dict, List, Instance, Str, Any,
-                       Property, Tuple)
+                       Property)
 
 import cytoflow.utility as util
+from cytoflow.utility.bitset import BitsetArray, BitsetDtype
+
+class _Statistic(object):
+    """
+    A memoized statistic.  Holds either a :class:`pandas.Series` or a 
+    function that computes one; the function is called (once!) the first 
+    time the value is needed.  Instances are shared between cloned 
+    :class:`Experiment` s, so the value is made read-only.
+    """
+    
+    __slots__ = ('_func', '_value', '_lock')
+    
+    def __init__(self, value = None, func = None):
+        self._func = func
+        self._value = None
+        self._lock = threading.Lock()
+        
+        if value is not None:
+            self._value = _freeze(value)
+        
+    @property
+    def computed(self):
+        return self._value is not None
+        
+    def get(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    value = self._func()
+                    if not isinstance(value, pd.Series):
+                        raise util.CytoflowError("A statistic must be a pandas.Series, "
+                                                 "not {}".format(type(value)))
+                    self._value = _freeze(value)
+                    self._func = None
+        return self._value
+    
+    def __reduce__(self):
+        # closures don't pickle, so compute the value first.
+        return (_Statistic, (self.get(),))
+    
+def _freeze(series):
+    """
+    Return a copy of ``series`` with read-only values.  (A copy, so the 
+    caller's own series -- and the array under it -- can still be changed.)
+    """
+    series = series.copy()
+    values = series.values
+    if isinstance(values, np.ndarray):
+        values.flags.writeable = False
+    return series
+
+
+class Statistics(MutableMapping):
+    """
+    The container for :attr:`Experiment.statistics`.  Behaves like a 
+    :class:`dict` whose keys are ``(Str, Str)`` tuples and whose values are
+    :class:`pandas.Series`, with two differences:
+    
+      - A statistic can be added with :meth:`set_lazy`, in which case it isn't
+        computed until the first time it's looked up.
+        
+      - :meth:`copy` is cheap: the copy shares the statistics themselves 
+        (computed or not) with the original.  Because of that, the values of
+        a statistic are read-only; to change one, make a copy of it and 
+        assign that instead.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        self._stats = {}
+        self.update(*args, **kwargs)
+        
+    def _check_key(self, key):
+        if not (isinstance(key, tuple) 
+                and len(key) == 2
+                and all(isinstance(k, str) for k in key)):
+            raise util.CytoflowError("A statistic's name must be a tuple "
+                                     "(Str, Str), not {}".format(key))
+        
+    def __getitem__(self, key):
+        return self._stats[key].get()
+    
+    def __setitem__(self, key, value):
+        self._check_key(key)
+        if not isinstance(value, pd.Series):
+            raise util.CytoflowError("A statistic must be a pandas.Series, "
+                                     "not {}".format(type(value)))
+        self._stats[key] = _Statistic(value = value)
+        
+    def __delitem__(self, key):
+        del self._stats[key]
+        
+    def __contains__(self, key):
+        return key in self._stats
+        
+    def __iter__(self):
+        return iter(self._stats)
+    
+    def __len__(self):
+        return len(self._stats)
+    
+    def __repr__(self):
+        return "Statistics({})".format(list(self._stats.keys()))
+    
+    def __eq__(self, other):
+        # equal if they share the same statistics.  (comparing the values, 
+        # as Mapping does, would compute the lazy ones -- and traits compares
+        # a trait's old and new values whenever it's set.)
+        if not isinstance(other, Statistics):
+            return NotImplemented
+        return self._stats == other._stats
+    
+    def set_lazy(self, key, func):
+        """
+        Add a statistic that is computed by calling ``func()`` (with no 
+        arguments) the first time it is looked up.  ``func`` must return a
+        :class:`pandas.Series`, and it must not depend on anything that can
+        change afterwards -- in particular, it should not refer to an 
+        :class:`Experiment` that might be modified in place.
+        """
+        self._check_key(key)
+        self._stats[key] = _Statistic(func = func)
+        
+    def is_computed(self, key):
+        """Has the statistic ``key`` been computed yet?"""
+        return self._stats[key].computed
+        
+    def copy(self):
+        """A (cheap) copy that shares the statistics with this one."""
+        ret = Statistics()
+        ret._stats = dict(self._stats)
+        return ret
+
+def _unique(column):
+    """The unique values of ``column``.  Bitsets are unpacked to ``bool``."""
+    values = column.unique()
+    if isinstance(values, BitsetArray):
+        return values.to_numpy()
+    return values.copy()
+
+class _ConditionIndex(object):
+    """
+    Maps each value of a condition to the (sorted) positions of the rows 
+    that have that value.
+    """
+    
+    def __init__(self, column):
+        if isinstance(column.dtype, BitsetDtype):
+            # no need to sort anything
+            values = column.to_numpy()
+            self.positions = {v : p for v, p in [(False, np.flatnonzero(~values)),
+                                                 (True, np.flatnonzero(values))]
+                              if len(p) > 0}
+            for p in self.positions.values():
+                p.flags.writeable = False
+            return
+        
+        codes, uniques = pd.factorize(column, sort = True)
+        
+        # a stable sort keeps each value's rows in order.  small integers
+        # get a (linear-time) radix sort.
+        if len(uniques) < np.iinfo(np.int16).max:
+            order = np.argsort(codes.astype(np.int16), kind = 'stable')
+        else:
+            order = np.argsort(codes, kind = 'stable')
+        order.flags.writeable = False
+            
+        # missing values have code -1, so they sort first
+        counts = np.bincount(codes + 1, minlength = len(uniques) + 1)
+        bounds = np.cumsum(counts)
+        
+        self.positions = {v : order[bounds[i] : bounds[i + 1]] 
+                          for i, v in enumerate(uniques)}
+        
+    def __contains__(self, value):
+        try:
+            return value in self.positions
+        except TypeError:  # unhashable
+            return False
+        
+    def lookup(self, values):
+        """The (sorted) positions of the rows that have any of ``values``"""
+        found = [self.positions[v] for v in values if v in self]
+        if len(found) == 1:
+            return found[0]
+        elif found:
+            return np.sort(np.concatenate(found))
+        else:
+            return np.array([], dtype = np.intp)
+    
 
 class Experiment(HasStrictTraits):
     """
@@ -66,7 +261,9 @@ class Experiment(HasStrictTraits):
         measurement), a derived channel (eg. the ratio between two channels), 
         or a piece of metadata.  Metadata can be either experimental conditions
         (eg. induction level, timepoint) or added by operations (eg. gate 
-        membership).
+        membership).  Gate membership is stored as a ``bitset``, a boolean
+        column that takes one bit per event instead of one byte (see
+        :mod:`cytoflow.utility.bitset`).
         
     metadata : Dict(Str : Dict(Str : Any)
         Each column in :attr:`data` has an entry in :attr:`metadata` whose key 
@@ -95,7 +292,10 @@ class Experiment(HasStrictTraits):
         :class:`pandas.Series`: each level of the index is a facet, and each 
         combination of indices is a subset for which the statistic was computed.
         The values of the series, of course, are the values of the computed 
-        parameters or statistics for each subset.
+        parameters or statistics for each subset.  Statistics may be computed
+        lazily, the first time they're looked up (see :class:`Statistics`),
+        and they are shared between an :class:`Experiment` and its clones, so
+        their values are read-only.
     
     channels : List(String)
         The channels that this experiment tracks (read-only).
@@ -164,13 +364,22 @@ class Experiment(HasStrictTraits):
     # potentially mutable.  deep copy required
     metadata = Dict(Str, Any, copy = "deep")
     
-    # statistics.  mutable, deep copy required
-    statistics = Dict(Tuple(Str, Str), pd.Series, copy = "deep")
+    # statistics.  the statistics themselves are immutable (and maybe not
+    # computed yet), so clone() shares them instead of copying them.
+    statistics = Instance(Statistics, args = (), copy = "ref")
     
     history = List(Any, copy = "shallow")
     
     channels = Property(List)
     conditions = Property(Dict)
+    
+    # things computed from the data (channels, condition values and 
+    # indices, etc.) that we'd rather not compute again.  keys are 
+    # (what, column) tuples, with column = None for things about all the
+    # columns.  cleared when the data is replaced or its shape changes, and 
+    # per-column by the methods that change a column.
+    _cache = Any(transient = True)
+    _cache_guard = Any(transient = True)
             
     def __getitem__(self, key):
         """Override __getitem__ so we can reference columns like ex.column"""
@@ -180,19 +389,73 @@ class Experiment(HasStrictTraits):
         """Override __setitem__ so we can assign columns like ex.column = ..."""
         if key in self.data:
             self.data.drop(key, axis = 'columns', inplace = True)
+        self._invalidate(key)
         return self.data.__setitem__(key, value)
     
+    def _data_changed(self):
+        self._cache = None
+        
+    def _cached(self, key, func):
+        """
+        Return the cached value for ``key``, calling ``func()`` to compute 
+        it if necessary.
+        """
+        
+        # catch changes made directly to self.data
+        guard = (len(self.data), tuple(self.data.columns))
+        if self._cache is None or guard != self._cache_guard:
+            self._cache = {}
+            self._cache_guard = guard
+            
+        if key not in self._cache:
+            self._cache[key] = func()
+            
+        return self._cache[key]
+    
+    def _invalidate(self, column):
+        """
+        Forget everything cached about ``column``, and everything (like
+        :attr:`channels`) that is about all the columns.
+        """
+        if self._cache:
+            self._cache = {k : v for k, v in self._cache.items() 
+                           if k[1] is not None and k[1] != column}
+            
+    def _condition_index(self, condition):
+        """The (cached) :class:`_ConditionIndex` for ``condition``"""
+        return self._cached(("index", condition),
+                            lambda: _ConditionIndex(self.data[condition]))
+        
+    def _is_condition(self, name):
+        return name in self.data and self.metadata[name]['type'] == "condition"
+    
+    def _take(self, positions):
+        """A clone of this :class:`Experiment` with only the rows at ``positions``"""
+        ret = self.clone_traits()
+        ret.data = self.data.take(positions)
+        ret.data.reset_index(drop = True, inplace = True)
+        ret.statistics = self.statistics.copy()
+        return ret
+    
     def __len__(self):
         """Return the length of the underlying pandas.DataFrame"""
         return len(self.data)
 
     def _get_channels(self):
         """Getter for the `channels` property"""
-        return sorted([x for x in self.data if self.metadata[x]['type'] == "channel"])
+        channels = self._cached(("channels", None),
+                                lambda: sorted([x for x in self.data 
+                                                if self.metadata[x]['type'] == "channel"]))
+        return list(channels)
     
     def _get_conditions(self):
         """Getter for the `conditions` property"""
-        return {x : pd.Series(self.data[x].unique().copy()).sort_values() for x in self.data
+        
+        # the values are cached; the (small) Series are copied so nobody
+        # changes the cached ones.
+        return {x : self._cached(("values", x),
+                                 lambda x = x: pd.Series(_unique(self.data[x])).sort_values()).copy()
+                for x in self.data
                 if self.metadata[x]['type'] == "condition"}
         
     def subset(self, conditions, values):
@@ -219,26 +482,29 @@ class Experiment(HasStrictTraits):
         """
 
         if isinstance(conditions, str):
-            c = conditions
-            v = values
-            if c not in self.conditions:
+            conditions = [conditions]
+            values = [values]
+
+        positions = None
+        for c, v in zip(conditions, values):
+            if not self._is_condition(c):
                 raise util.CytoflowError("{} is not a condition".format(c))
-            if v not in list(self.conditions[c]):
+            
+            index = self._condition_index(c)
+            if v not in index:
                 raise util.CytoflowError("{} is not a value of condition {}".format(v, c))
-        else:
-            for c, v in zip(conditions, values):
-                if c not in self.conditions:
-                    raise util.CytoflowError("{} is not a condition".format(c))
-                if v not in list(self.conditions[c]):
-                    raise util.CytoflowError("{} is not a value of condition {}".format(v, c))
-
-        g = self.data.groupby(conditions)
+            
+            if positions is None:
+                positions = index.positions[v]
+            else:
+                positions = np.intersect1d(positions, index.positions[v], 
+                                           assume_unique = True)
+                
+        if len(positions) == 0:
+            raise util.CytoflowError("No events matched {} = {}"
+                                     .format(conditions, values))
 
-        ret = self.clone()
-        ret.data = g.get_group(values)
-        ret.data.reset_index(drop = True, inplace = True)
-        
-        return ret    
+        return self._take(positions)
     
     def query(self, expr, **kwargs):
         """
@@ -264,8 +530,44 @@ class Experiment(HasStrictTraits):
         Experiment
             A new :class:`Experiment`, a clone of this one with the data 
             returned by :meth:`pandas.DataFrame.query()`
+            
+        Notes
+        -----
+        Queries that only compare conditions to constants with ``==`` or 
+        ``in``, joined with ``and`` or ``&`` (ie, ``Dox == 10.0 and Well in 
+        ['A', 'B']``) are answered from a cached index of each condition's
+        values instead of by scanning the data.
         """
         
+        positions = None if kwargs else self._query_index(expr)
+        
+        if positions is not None:
+            ret = self._take(positions)
+        else:
+            ret = self.clone_traits()
+            ret.data = self.data.query(expr, 
+                                       resolvers = ({}, self._make_resolvers(expr)), 
+                                       **kwargs)
+            ret.data.reset_index(drop = True, inplace = True)
+            ret.statistics = self.statistics.copy()
+        
+        if len(ret.data) == 0:
+            raise util.CytoflowError("No events matched {}".format(expr))
+        
+        return ret
+    
+    def _make_resolvers(self, expr = None):
+        """
+        Map the sanitized column names to the columns, for :meth:`query`.
+        Bitset conditions that ``expr`` uses are unpacked to ``bool``.
+        """
+        
+        try:
+            used = {n.id for n in ast.walk(ast.parse(expr.strip(), mode = 'eval'))
+                    if isinstance(n, ast.Name)} if expr else None
+        except SyntaxError:
+            used = None
+            
         resolvers = {}
         for name, col in self.data.iteritems():
             new_name = util.sanitize_identifier(name)
@@ -274,28 +576,167 @@ class Experiment(HasStrictTraits):
                                          "{2} but it already existed in the "
                                          " DataFrame."
                                          .format(name, new_name))
+            elif isinstance(col.dtype, BitsetDtype) and (used is None or new_name in used):
+                # pandas.eval wants numpy arrays
+                resolvers[new_name] = pd.Series(col.to_numpy(), 
+                                                index = col.index,
+                                                name = name)
             else:
                 resolvers[new_name] = col
                 
-        ret = self.clone()
-        ret.data = self.data.query(expr, resolvers = ({}, resolvers), **kwargs)
-        ret.data.reset_index(drop = True, inplace = True)
+        return resolvers
+    
+    def _query_index(self, expr):
+        """
+        If ``expr`` is only equality (``==``) and membership (``in``) tests of
+        conditions against constants, joined by ``and`` or ``&``, use the 
+        condition indices to find the positions of the matching rows.  Terms
+        that only use bitset conditions are evaluated on the packed bits (see
+        :meth:`_bitset_mask`).  Otherwise, return ``None`` and let 
+        :meth:`pandas.DataFrame.query` handle it.
+        """
         
-        if len(ret.data) == 0:
-            raise util.CytoflowError("No events matched {}".format(expr))
+        try:
+            tree = ast.parse(expr.strip(), mode = 'eval').body
+        except SyntaxError:
+            return None
         
-        return ret
+        bitsets = {util.sanitize_identifier(c) : c for c in self.data
+                   if self._is_condition(c) 
+                   and isinstance(self.data[c].dtype, BitsetDtype)}
+        
+        terms = [tree]
+        tests = []
+        mask = None
+        while terms:
+            term = terms.pop()
+            bits = self._bitset_mask(term, bitsets) if bitsets else None
+            if bits is not None:
+                mask = bits if mask is None else mask & bits
+            elif isinstance(term, ast.BoolOp) and isinstance(term.op, ast.And):
+                terms.extend(term.values)
+            elif isinstance(term, ast.BinOp) and isinstance(term.op, ast.BitAnd):
+                terms.extend([term.left, term.right])
+            elif (isinstance(term, ast.Compare) 
+                  and len(term.ops) == 1
+                  and isinstance(term.ops[0], (ast.Eq, ast.In))):
+                tests.append((term.left, term.ops[0], term.comparators[0]))
+            else:
+                return None
+            
+        names = {util.sanitize_identifier(c) : c for c in self.data
+                 if self._is_condition(c)}
+        
+        positions = None
+        for left, op, right in tests:
+            if isinstance(left, ast.Name) and left.id in names:
+                name, value = names[left.id], right
+            elif isinstance(right, ast.Name) and right.id in names and isinstance(op, ast.Eq):
+                name, value = names[right.id], left
+            else:
+                return None
+
+            try:
+                value = ast.literal_eval(value)
+            except (ValueError, TypeError, SyntaxError):
+                return None
+            
+            # like pandas, "== [list]" means "in [list]"
+            if isinstance(value, (list, tuple, set)):
+                values = value
+            elif isinstance(op, ast.Eq):
+                values = [value]
+            else:
+                return None
+            
+            p = self._condition_index(name).lookup(values)
+            positions = p if positions is None \
+                          else np.intersect1d(positions, p, assume_unique = True)
+            
+        if mask is not None:
+            p = np.flatnonzero(mask.to_numpy())
+            positions = p if positions is None \
+                          else np.intersect1d(positions, p, assume_unique = True)
+            
+        return positions
+    
+    def _bitset_mask(self, node, bitsets):
+        """
+        If ``node`` (part of a parsed query) only combines bitset conditions
+        -- with ``and``, ``or``, ``not``, ``&``, ``|``, ``^`` and ``~``, or 
+        by comparing them to ``True`` or ``False`` -- return the 
+        :class:`.BitsetArray` it evaluates to.  Otherwise, return ``None``.
+        ``bitsets`` maps the sanitized names of the bitset conditions to
+        their columns.
+        """
+        
+        if isinstance(node, ast.Name):
+            return self.data[bitsets[node.id]].values if node.id in bitsets else None
+        
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.Invert)):
+            bits = self._bitset_mask(node.operand, bitsets)
+            return None if bits is None else ~bits
+        
+        elif isinstance(node, (ast.BoolOp, ast.BinOp)):
+            if isinstance(node, ast.BoolOp):
+                operands = node.values
+            else:
+                operands = [node.left, node.right]
+                
+            if isinstance(node.op, (ast.And, ast.BitAnd)):
+                op = operator.and_
+            elif isinstance(node.op, (ast.Or, ast.BitOr)):
+                op = operator.or_
+            elif isinstance(node.op, ast.BitXor):
+                op = operator.xor
+            else:
+                return None
+                
+            masks = [self._bitset_mask(x, bitsets) for x in operands]
+            if any(m is None for m in masks):
+                return None
+            return functools.reduce(op, masks)
+        
+        elif (isinstance(node, ast.Compare) 
+              and len(node.ops) == 1
+              and isinstance(node.ops[0], (ast.Eq, ast.NotEq))):
+            left, right = node.left, node.comparators[0]
+            if not (isinstance(left, ast.Name) and left.id in bitsets):
+                left, right = right, left
+            if not (isinstance(left, ast.Name) and left.id in bitsets):
+                return None
+            
+            try:
+                value = ast.literal_eval(right)
+            except (ValueError, TypeError, SyntaxError):
+                return None
+            
+            if not isinstance(value, bool):
+                return None
+            
+            bits = self.data[bitsets[left.id]].values
+            return bits if value == isinstance(node.ops[0], ast.Eq) else ~bits
+        
+        return None
     
     def clone(self):
         """
-        Create a copy of this :class:`Experiment.` :attr:`metadata` and 
-        :attr:`statistics` are deep copies; :attr:`history` is a shallow copy; and
-        .....
+        Create a copy of this :class:`Experiment.` :attr:`metadata` is a deep
+        copy; :attr:`history` is a shallow copy; and :attr:`data` is a deep
+        copy.  The (immutable) :attr:`statistics` are shared with this 
+        :class:`Experiment`, computed or not.
           
         """
         
-        new_exp = self.clone_traits()
-        new_exp.data = self.data.copy(deep = True)
+        with util.traced("clone", "Experiment.clone", events = len(self)):
+            new_exp = self.clone_traits()
+            new_exp.data = self.data.copy(deep = True)
+            new_exp.statistics = self.statistics.copy()
+        
+        # the data is the same, so the (read-only) cache is still good
+        if self._cache:
+            new_exp._cache = dict(self._cache)
+            new_exp._cache_guard = self._cache_guard
 
         return new_exp
             
@@ -324,7 +765,9 @@ class Experiment(HasStrictTraits):
         dtype : String
             The type of the new column in :attr:`data`.  Must be a string that
             :class:`pandas.Series` recognizes as a ``dtype``: common types are 
-            ``category``, ``float``, ``int``, and ``bool``.
+            ``category``, ``float``, ``int``, and ``bool``.  ``bitset`` is a 
+            ``bool`` that uses one bit per event instead of one byte (see 
+            :mod:`cytoflow.utility.bitset`); the gates use it.
             
         data : pandas.Series (default = None)
             The :class:`pandas.Series` to add to :attr:`data`.  Must be the same
@@ -372,6 +815,7 @@ class Experiment(HasStrictTraits):
                 raise util.CytoflowError("Had trouble converting data to type {0}"
                                     .format(dtype)) from exc
                                         
+        self._invalidate(name)
         self.metadata[name] = {}
         self.metadata[name]['type'] = "condition"      
             
@@ -428,6 +872,7 @@ class Experiment(HasStrictTraits):
         except (ValueError, TypeError) as exc:
                 raise util.CytoflowError("Had trouble converting data to type \"float64\"") from exc
 
+        self._invalidate(name)
         self.metadata[name] = {}
         self.metadata[name]['type'] = "channel"
         
@@ -499,7 +944,7 @@ class Experiment(HasStrictTraits):
                                      .format(list(self.conditions.keys())))
             
         # add the conditions to tube's internal data frame.  specify the conditions
-        # dtype using self.conditions.  check for errors as we do so.
+        # dtype using self.data.  check for errors as we do so.
         
         # take this chance to up-convert the float32s to float64.
         # this happened automatically in DataFrame.append(), below, but 
@@ -511,7 +956,7 @@ class Experiment(HasStrictTraits):
         new_data = data.astype("float64", copy=True)
         
         for meta_name, meta_value in conditions.items():
-            meta_type = self.conditions[meta_name].dtype
+            meta_type = self.data[meta_name].dtype
             
             if is_categorical_dtype(meta_type):
                 meta_type = CategoricalDtype([meta_value])
@@ -526,11 +971,272 @@ class Experiment(HasStrictTraits):
                 cats = set(self.data[meta_name].cat.categories) | set(new_data[meta_name].cat.categories)
                 cats = sorted(cats) 
                 self.data[meta_name] = self.data[meta_name].cat.set_categories(cats)
+                self._invalidate(meta_name)
                 new_data[meta_name] = new_data[meta_name].cat.set_categories(cats)
         
         self.data = self.data.append(new_data, ignore_index = True, sort = True)
         del new_data
 
+    def save(self, path):
+        """
+        Save this :class:`Experiment` -- data, metadata, statistics and
+        history -- to the directory ``path``, so it can be re-opened quickly
+        with :meth:`load`.
+
+        The data are stored as ``.npy`` files.  The numeric columns of the
+        most common type (usually the channels) are stored together, column
+        by column, so they can be memory-mapped as one block; the others are
+        stored a column at a time.  Categorical conditions are stored as 
+        their (integer) codes, with the categories kept alongside the rest 
+        of the metadata.  Everything else is pickled.
+        Metadata that can't be pickled (for example, some operations store
+        functions in the channel metadata) is left out, with a warning.
+
+        Parameters
+        ----------
+        path : String
+            The directory to save to.  It must not exist, or it must be a
+            snapshot written by a previous call to :meth:`save` (which is
+            replaced.)
+
+        Raises
+        ------
+        :exc:`.CytoflowError`
+            If ``path`` exists and isn't a saved :class:`Experiment`.
+        """
+
+        path = os.path.abspath(path)
+        if os.path.exists(path) and \
+           not os.path.isfile(os.path.join(path, _SNAPSHOT_HEADER)):
+            raise util.CytoflowError("{} exists and isn't a saved Experiment"
+                                     .format(path))
+
+        # write to a temporary directory, then move it into place, so
+        # nobody ever sees a half-written snapshot.
+        tmp = tempfile.mkdtemp(prefix = ".tmp-",
+                               dir = os.path.dirname(path))
+        try:
+            # the block: the numeric columns of the most common dtype
+            numeric = [c for c in self.data.columns 
+                       if not is_categorical_dtype(self.data[c].dtype)
+                       and not isinstance(self.data[c].dtype, BitsetDtype)
+                       and self.data[c].dtype.kind in "biuf"]
+            counts = Counter(self.data[c].dtype for c in numeric)
+            block_dtype = counts.most_common(1)[0][0] if counts else None
+            block = [c for c in numeric if self.data[c].dtype == block_dtype]
+            if block:
+                _save_block(os.path.join(tmp, _SNAPSHOT_BLOCK),
+                            [self.data[c].values for c in block])
+            
+            columns = []
+            for i, name in enumerate(self.data.columns):
+                col = self.data[name]
+                filename = "{:05d}.npy".format(i)
+
+                if name in block:
+                    columns.append((name, _SNAPSHOT_BLOCK, col.dtype))
+                elif is_categorical_dtype(col.dtype):
+                    _save_column(os.path.join(tmp, filename),
+                                 col.cat.codes.values)
+                    columns.append((name, filename,
+                                    CategoricalDtype(col.cat.categories,
+                                                     col.cat.ordered)))
+                elif isinstance(col.dtype, BitsetDtype):
+                    # the packed bits
+                    _save_column(os.path.join(tmp, filename), col.values._bits)
+                    columns.append((name, filename, col.dtype))
+                elif col.dtype.kind in "biuf":
+                    _save_column(os.path.join(tmp, filename), col.values)
+                    columns.append((name, filename, col.dtype))
+                else:
+                    # strings, objects, etc. aren't memory-mappable
+                    columns.append((name, None, col))
+
+            index = self.data.index
+            if isinstance(index, pd.RangeIndex) and index.start == 0 and \
+               index.step == 1:
+                index = None
+
+            header = {"version" : _SNAPSHOT_VERSION,
+                      "length" : len(self.data),
+                      "index" : index,
+                      "columns" : columns,
+                      "metadata" : _picklable(self.metadata, "metadata"),
+                      "statistics" : {k : self.statistics[k]
+                                      for k in self.statistics},
+                      "history" : _picklable(self.history, "history")}
+
+            with open(os.path.join(tmp, _SNAPSHOT_HEADER), 'wb') as f:
+                pickle.dump(header, f, protocol = pickle.HIGHEST_PROTOCOL)
+
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.replace(tmp, path)
+
+        finally:
+            if os.path.exists(tmp):
+                shutil.rmtree(tmp, ignore_errors = True)
+
+    @classmethod
+    def load(cls, path, mmap = True):
+        """
+        Load an :class:`Experiment` saved with :meth:`save`.
+
+        Parameters
+        ----------
+        path : String
+            The directory the :class:`Experiment` was saved to.
+
+        mmap : Bool (default = ``True``)
+            If ``True``, the channels (the block of numeric columns; see
+            :meth:`save`) are memory-mapped instead of read, so opening a 
+            large :class:`Experiment` is nearly instant and each channel is
+            only read from disk when (and if) it is used.  The memory maps
+            are copy-on-write, so changing the data never changes the files.
+            Don't delete or re-save ``path`` while the :class:`Experiment` 
+            is in use!  (Some pandas operations on the whole :attr:`data` 
+            frame, like taking a subset of its rows, will still read all of
+            the columns into memory.)
+
+        Returns
+        -------
+        Experiment
+            The re-loaded :class:`Experiment`.
+
+        Raises
+        ------
+        :exc:`.CytoflowError`
+            If ``path`` isn't a saved :class:`Experiment`.
+        """
+
+        try:
+            with open(os.path.join(path, _SNAPSHOT_HEADER), 'rb') as f:
+                header = pickle.load(f)
+        except (OSError, pickle.UnpicklingError) as e:
+            raise util.CytoflowError("{} isn't a saved Experiment: {}"
+                                     .format(path, e)) from e
+
+        if header.get("version") != _SNAPSHOT_VERSION:
+            raise util.CytoflowError("{} was saved by a different version "
+                                     "of Cytoflow".format(path))
+
+        index = header["index"] if header["index"] is not None \
+                else pd.RangeIndex(header["length"])
+        
+        # the DataFrame constructor doesn't copy a 2D array, so the block's
+        # columns stay memory-mapped.  (it would copy the columns of a dict, 
+        # and DataFrame.insert() copies the column it's given.)
+        block = [name for name, filename, _ in header["columns"] 
+                 if filename == _SNAPSHOT_BLOCK]
+        if block:
+            data = pd.DataFrame(np.load(os.path.join(path, _SNAPSHOT_BLOCK),
+                                        mmap_mode = 'c' if mmap else None),
+                                index = index,
+                                columns = block,
+                                copy = False)
+        else:
+            data = pd.DataFrame(index = index)
+        
+        for loc, (name, filename, dtype) in enumerate(header["columns"]):
+            if filename == _SNAPSHOT_BLOCK:
+                continue
+            elif filename is None:
+                values = dtype.values   # the column itself
+            else:
+                values = np.load(os.path.join(path, filename),
+                                 mmap_mode = 'c' if mmap else None)
+                if isinstance(dtype, CategoricalDtype):
+                    values = pd.Categorical.from_codes(values, dtype = dtype)
+                elif isinstance(dtype, BitsetDtype):
+                    values = BitsetArray(values, header["length"])
+                    
+            data.insert(loc, name, values)
+
+        ret = cls(metadata = header["metadata"], history = header["history"])
+        ret.data = data
+        ret.statistics.update(header["statistics"])
+        return ret
+
+# the snapshot format written by Experiment.save()
+_SNAPSHOT_VERSION = 2
+_SNAPSHOT_HEADER = "experiment.pickle"
+_SNAPSHOT_BLOCK = "block.npy"
+_SNAPSHOT_CHUNK_SIZE = 2 ** 20
+
+def _save_column(filename, values):
+    """Write ``values`` to a ``.npy`` file a chunk at a time."""
+    out = np.lib.format.open_memmap(filename, mode = 'w+',
+                                    dtype = values.dtype,
+                                    shape = values.shape)
+    for start in range(0, len(values), _SNAPSHOT_CHUNK_SIZE):
+        out[start : start + _SNAPSHOT_CHUNK_SIZE] = \
+            values[start : start + _SNAPSHOT_CHUNK_SIZE]
+    out.flush()
+    del out
+
+def _save_block(filename, columns):
+    """
+    Write ``columns`` to a 2D ``.npy`` file in Fortran (column-major) order,
+    a chunk at a time.
+    """
+    out = np.lib.format.open_memmap(filename, mode = 'w+',
+                                    dtype = columns[0].dtype,
+                                    shape = (len(columns[0]), len(columns)),
+                                    fortran_order = True)
+    for i, values in enumerate(columns):
+        for start in range(0, len(values), _SNAPSHOT_CHUNK_SIZE):
+            out[start : start + _SNAPSHOT_CHUNK_SIZE, i] = \
+                values[start : start + _SNAPSHOT_CHUNK_SIZE]
+    out.flush()
+    del out
+
+def _picklable(obj, what):
+    """
+    Return ``obj`` (a dict or list) without the values that can't be
+    pickled -- looking one level deeper into dicts of dicts, like the
+    per-column metadata.
+    """
+
+    try:
+        pickle.dumps(obj)
+        return obj
+    except Exception:
+        pass
+
+    dropped = []
+    def ok(x):
+        try:
+            pickle.dumps(x)
+            return True
+        except Exception:
+            return False
+
+    if isinstance(obj, dict):
+        ret = {}
+        for k, v in obj.items():
+            if ok(v):
+                ret[k] = v
+            elif isinstance(v, dict):
+                ret[k] = {}
+                for kk, vv in v.items():
+                    if ok(vv):
+                        ret[k][kk] = vv
+                    else:
+                        dropped.append("{}[{}]".format(k, kk))
+            else:
+                dropped.append(k)
+    else:
+        ret = []
+        for i, v in enumerate(obj):
+            if ok(v):
+                ret.append(v)
+            else:
+                dropped.append(str(i))
+
+    warn("Couldn't save {} {}".format(what, ", ".join(dropped)),
+         util.CytoflowWarning)
+    return ret
+
 if __name__ == "__main__":
     import fcsparser
     ex = Experiment()
@@ -17,37 +17,43 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from .i_operation import IOperation
-from .import_op import ImportOp
- 
-# gates
-from .threshold import ThresholdOp
-from .range import RangeOp
-from .range2d import Range2DOp
-from .polygon import PolygonOp
-from .quad import QuadOp
-
-# data-driven
-from .ratio import RatioOp
-from .density import DensityGateOp
-from .gaussian_1d import GaussianMixture1DOp
-from .gaussian_2d import GaussianMixture2DOp
-from .gaussian import GaussianMixtureOp
-from .kmeans import KMeansOp
-from .flowpeaks import FlowPeaksOp
-from .pca import PCAOp
-
-# statistics
-from .channel_stat import ChannelStatisticOp
-from .frame_stat import FrameStatisticOp
-from .xform_stat import TransformStatisticOp
- 
-# TASBE
-from .autofluorescence import AutofluorescenceOp
-from .bleedthrough_piecewise import BleedthroughPiecewiseOp
-from .bleedthrough_linear import BleedthroughLinearOp
-from .bead_calibration import BeadCalibrationOp
-from .color_translation import ColorTranslationOp
-
-# etc 
-from .binning import BinningOp
+# the names are imported when they're first used.  see
+# cytoflow/utility/lazy.py
+from cytoflow.utility.lazy import lazy_import
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, {
+    '.i_operation' : ['IOperation'],
+    '.import_op' : ['ImportOp'],
+
+    # gates
+    '.threshold' : ['ThresholdOp'],
+    '.range' : ['RangeOp'],
+    '.range2d' : ['Range2DOp'],
+    '.polygon' : ['PolygonOp'],
+    '.quad' : ['QuadOp'],
+    '.gate_chain' : ['GateChainOp'],
+
+    # data-driven
+    '.ratio' : ['RatioOp'],
+    '.density' : ['DensityGateOp'],
+    '.gaussian_1d' : ['GaussianMixture1DOp'],
+    '.gaussian_2d' : ['GaussianMixture2DOp'],
+    '.gaussian' : ['GaussianMixtureOp'],
+    '.kmeans' : ['KMeansOp'],
+    '.flowpeaks' : ['FlowPeaksOp'],
+    '.pca' : ['PCAOp'],
+
+    # statistics
+    '.channel_stat' : ['ChannelStatisticOp'],
+    '.frame_stat' : ['FrameStatisticOp'],
+    '.xform_stat' : ['TransformStatisticOp'],
+
+    # TASBE
+    '.autofluorescence' : ['AutofluorescenceOp'],
+    '.bleedthrough_piecewise' : ['BleedthroughPiecewiseOp'],
+    '.bleedthrough_linear' : ['BleedthroughLinearOp'],
+    '.bead_calibration' : ['BeadCalibrationOp'],
+    '.color_translation' : ['ColorTranslationOp'],
+
+    # etc
+    '.binning' : ['BinningOp']})
@@ -125,6 +125,7 @@ class AutofluorescenceOp(HasStrictTraits):
     _af_histogram = Dict(Str, Tuple(Array, Array), transient = True)
 
     
+    @util.traced_method("estimate")
     def estimate(self, experiment, subset = None): 
         """
         Estimate the autofluorescence from :attr:`blank_file` in channels
@@ -209,6 +210,7 @@ class AutofluorescenceOp(HasStrictTraits):
             self._af_median[channel] = np.median(blank_exp[channel])
             self._af_stdev[channel] = np.std(blank_exp[channel])    
                 
+    @util.traced_method("apply")
     def apply(self, experiment):
         """
         Applies the autofluorescence correction to channels in an experiment.
@@ -256,13 +258,9 @@ class AutofluorescenceOp(HasStrictTraits):
                                "parameter.  Did you forget to (re)run estimate()?")
         
         new_experiment = experiment.clone()
-                
-        for channel in self.channels:
-            new_experiment[channel] = \
-                experiment[channel] - self._af_median[channel]
-                
-            new_experiment.metadata[channel]['af_median'] = self._af_median[channel]
-            new_experiment.metadata[channel]['af_stdev'] = self._af_stdev[channel]
+        _subtract_autofluorescence(new_experiment, 
+                                   {c : self._af_median[c] for c in self.channels},
+                                   self._af_stdev)
 
         new_experiment.history.append(self.clone_traits(transient = lambda t: True))
 
@@ -304,6 +302,7 @@ class AutofluorescenceDiagnosticView(HasStrictTraits):
 
     op = Instance(AutofluorescenceOp)    
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot a faceted histogram view of a channel
@@ -351,3 +350,17 @@ class AutofluorescenceDiagnosticView(HasStrictTraits):
             plt.axvline(self.op._af_median[channel], color = 'r')
             
         plt.tight_layout(pad = 0.8)
+
+
+def _subtract_autofluorescence(experiment, af_median, af_stdev):
+    """
+    Subtract ``af_median[channel]`` from each channel in ``af_median``, in 
+    place, and record the median and ``af_stdev[channel]`` in the channel's
+    metadata.  Shared by :meth:`AutofluorescenceOp.apply` and 
+    :class:`.TasbeTransform`.
+    """
+    
+    for channel, median in af_median.items():
+        experiment[channel] = experiment[channel] - median
+        experiment.metadata[channel]['af_median'] = median
+        experiment.metadata[channel]['af_stdev'] = af_stdev[channel]
@@ -193,6 +193,7 @@ class ByView(OpView):
             
         return plot_enum(by, experiment)
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs): 
         """
         Make the plot.
@@ -319,6 +320,7 @@ class AnnotatingView(BaseDataView):
         they're not documented in the :meth:`plot` docstring.
     """
         
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Parameters
@@ -30,6 +30,17 @@ import math
 import scipy.signal
 import scipy.optimize
 import sys
+
+# scipy doesn't export the steps of find_peaks_cwt, so _find_peaks_cwt uses
+# its private helpers.  they're only known to do the same thing in the 
+# version of scipy we pin (see setup.py); with any other version, or if they 
+# aren't there, _find_peaks_cwt calls find_peaks_cwt on each channel instead.
+_identify_ridge_lines = _filter_ridge_lines = None
+if scipy.__version__ == "1.5.2":
+    try:
+        from scipy.signal._peak_finding import _identify_ridge_lines, _filter_ridge_lines
+    except ImportError:
+        pass
         
 import matplotlib.pyplot as plt
 
@@ -213,6 +224,7 @@ class BeadCalibrationOp(HasStrictTraits):
     _peaks = Dict(Str, Any, transient = True)
     _mefs = Dict(Str, Any, transient = True)
 
+    @util.traced_method("estimate")
     def estimate(self, experiment): 
         """
         Estimate the calibration coefficients from the beads file.
@@ -243,55 +255,50 @@ class BeadCalibrationOp(HasStrictTraits):
         self._peaks.clear()
         self._mefs.clear()
                         
-        # make a little Experiment
+        # make a little Experiment, with just the channels we're calibrating
         check_tube(self.beads_file, experiment)
         beads_exp = ImportOp(tubes = [Tube(file = self.beads_file)],
-                             channels = {experiment.metadata[c]["fcs_name"] : c for c in experiment.channels},
+                             channels = {experiment.metadata[c]["fcs_name"] : c for c in self.units},
                              name_metadata = experiment.metadata['name_metadata']).apply()
         
         channels = list(self.units.keys())
 
-        # make the histogram
-        for channel in channels:
-            data = beads_exp.data[channel]
+        # make the histograms, all at once.  each channel is binned on a log 
+        # scale, up to its own range.
+        # TODO - this assumes the data is on a linear scale.  check it!
+        data_ranges = [experiment.metadata[channel]['range'] for channel in channels]
+        bins = [np.logspace(1, math.log(data_range, 2), num = self.bead_histogram_bins, base = 2)
+                for data_range in data_ranges]
+        counts = _histograms([beads_exp.data[channel].values for channel in channels], bins)
+        
+        # mask off-scale values
+        counts[:, 0] = 0
+        counts[:, -1] = 0
+        
+        # smooth them with a Savitzky-Golay filter
+        smooth = scipy.signal.savgol_filter(counts, 5, 1, axis = 1)
+        
+        # find peaks
+        peak_bins = _find_peaks_cwt(smooth,
+                                    widths = np.arange(3, 20),
+                                    max_distances = np.arange(3, 20) / 2)
+        
+        for i, channel in enumerate(channels):
+            hist = (counts[i], bins[i])
+            hist_bins = bins[i]
+            hist_smooth = smooth[i]
+            
+            self._histograms[channel] = (hist, hist_bins, hist_smooth)
             
-            # TODO - this assumes the data is on a linear scale.  check it!
-            data_range = experiment.metadata[channel]['range']
-
             if self.bead_brightness_cutoff is None:
-                cutoff = 0.7 * data_range
+                cutoff = 0.7 * data_ranges[i]
             else:
                 cutoff = self.bead_brightness_cutoff
-                                            
-            # bin the data on a log scale
-
-            hist_bins = np.logspace(1, math.log(data_range, 2), num = self.bead_histogram_bins, base = 2)
-            hist = np.histogram(data, bins = hist_bins)
-            
-            # mask off-scale values
-            hist[0][0] = 0
-            hist[0][-1] = 0
-            
-            # smooth it with a Savitzky-Golay filter
-            hist_smooth = scipy.signal.savgol_filter(hist[0], 5, 1)
-            
-            self._histograms[channel] = (hist, hist_bins, hist_smooth)
-
-            
-        # find peaks
-        for channel in channels:
-            hist = self._histograms[channel][0]
-            hist_bins = self._histograms[channel][1]
-            hist_smooth = self._histograms[channel][2]
-
-            peak_bins = scipy.signal.find_peaks_cwt(hist_smooth, 
-                                                    widths = np.arange(3, 20),
-                                                    max_distances = np.arange(3, 20) / 2)
                                     
             # filter by height and intensity
             peak_threshold = np.percentile(hist_smooth, self.bead_peak_quantile)
             peak_bins_filtered = \
-                [x for x in peak_bins if hist_smooth[x] > peak_threshold 
+                [x for x in peak_bins[i] if hist_smooth[x] > peak_threshold 
                  and hist[1][x] > self.bead_brightness_threshold
                  and hist[1][x] < cutoff]
             
@@ -324,12 +331,12 @@ class BeadCalibrationOp(HasStrictTraits):
                 # if we only have one peak, assume it's the brightest peak
                 a = mef[-1] / peaks[0]
                 self._mefs[channel] = [mef[-1]]
-                self._calibration_functions[channel] = lambda x, a=a: a * x
+                self._calibration_functions[channel] = _CalibrationFunction(a)
             elif len(peaks) == 2:
                 # if we have only two peaks, assume they're the brightest two
                 self._mefs[channel] = [mef[-2], mef[-1]]
                 a = (mef[-1] - mef[-2]) / (peaks[1] - peaks[0])
-                self._calibration_functions[channel] = lambda x, a=a: a * x
+                self._calibration_functions[channel] = _CalibrationFunction(a)
             else:
                 # if there are n > 2 peaks, check all the contiguous n-subsets
                 # of mef for the one whose linear regression with the peaks
@@ -338,21 +345,7 @@ class BeadCalibrationOp(HasStrictTraits):
                 # do it in log10 space because otherwise the brightest peaks
                 # have an outsized influence.
                                 
-                best_resid = np.inf
-                for start, end in [(x, x+len(peaks)) for x in range(len(mef) - len(peaks) + 1)]:
-                    mef_subset = mef[start:end]
-                    
-                    # linear regression of the peak locations against mef subset
-                    lr = np.polyfit(np.log10(peaks), 
-                                    np.log10(mef_subset), 
-                                    deg = 1, 
-                                    full = True)
-                                        
-                    resid = lr[1][0]
-                    if resid < best_resid:
-                        best_lr = lr[0]
-                        best_resid = resid
-                        self._mefs[channel] = mef_subset
+                self._mefs[channel], best_lr = _best_mef_subset(peaks, mef)
    
                 if self.force_linear:
                     # if we're forcing a linear scale for the calibration
@@ -371,8 +364,7 @@ class BeadCalibrationOp(HasStrictTraits):
                     res = scipy.optimize.minimize(s, [1])
                     
                     a = res.x[0]
-                    self._calibration_functions[channel] = \
-                        lambda x, a=a: a * x
+                    self._calibration_functions[channel] = _CalibrationFunction(a)
                               
                 else:              
                     # remember, these (linear) coefficients came from logspace, so 
@@ -386,10 +378,10 @@ class BeadCalibrationOp(HasStrictTraits):
                     
                     a = best_lr[0]
                     b = 10 ** best_lr[1]
-                    self._calibration_functions[channel] = \
-                        lambda x, a=a, b=b: b * np.power(x, a)
+                    self._calibration_functions[channel] = _CalibrationFunction(a, b)
 
 
+    @util.traced_method("apply")
     def apply(self, experiment):
         """
         Applies the bleedthrough correction to an experiment.
@@ -440,23 +432,9 @@ class BeadCalibrationOp(HasStrictTraits):
         # we filter out negative values here.
 
         new_experiment = experiment.clone()
-        
-        for channel in channels:
-            new_experiment.data = \
-                new_experiment.data[new_experiment.data[channel] > 0]
-                                
-        new_experiment.data.reset_index(drop = True, inplace = True)
-        
-        for channel in channels:
-            calibration_fn = self._calibration_functions[channel]
-            
-            new_experiment[channel] = calibration_fn(new_experiment[channel])
-            new_experiment.metadata[channel]['bead_calibration_fn'] = calibration_fn
-            new_experiment.metadata[channel]['bead_units'] = self.units[channel]
-            if 'range' in experiment.metadata[channel]:
-                new_experiment.metadata[channel]['range'] = calibration_fn(experiment.metadata[channel]['range'])
-            if 'voltage' in experiment.metadata[channel]:
-                del new_experiment.metadata[channel]['voltage']
+        _calibrate(new_experiment, 
+                   {c : self._calibration_functions[c] for c in channels},
+                   self.units)
             
         new_experiment.history.append(self.clone_traits(transient = lambda t: True)) 
         return new_experiment
@@ -604,6 +582,7 @@ class BeadCalibrationDiagnostic(HasStrictTraits):
         
     op = Instance(BeadCalibrationOp)
     
+    @util.traced_method("plot")
     def plot(self, experiment):
         """
         Plots the diagnostic view.
@@ -665,3 +644,134 @@ class BeadCalibrationDiagnostic(HasStrictTraits):
             
         plt.tight_layout(pad = 0.8)
             
+            
+            
+def _histograms(columns, bins):
+    """
+    Histogram each array in ``columns`` with the bin edges in the matching
+    element of ``bins`` -- the same counts as :func:`numpy.histogram`, but
+    binned with :func:`numpy.searchsorted` (instead of sorting the data) and 
+    counted with one :func:`numpy.bincount` for all the columns.  Each 
+    element of ``bins`` must have the same number of edges.  Returns a 2D
+    array, one row of counts per column.
+    """
+    
+    num_bins = len(bins[0]) - 1
+    idx = []
+    
+    for i, (column, edges) in enumerate(zip(columns, bins)):
+        column_idx = np.searchsorted(edges, column, side = 'right') - 1
+        
+        # the last bin includes its right edge
+        column_idx[column == edges[-1]] = num_bins - 1
+        
+        in_range = (column_idx >= 0) & (column_idx < num_bins)
+        idx.append(column_idx[in_range] + i * num_bins)
+        
+    counts = np.bincount(np.concatenate(idx), minlength = len(columns) * num_bins)
+    return counts.reshape(len(columns), num_bins)
+
+def _find_peaks_cwt(histograms, widths, max_distances):
+    """
+    The same as calling :func:`scipy.signal.find_peaks_cwt` on each row of 
+    ``histograms``, except that the continuous wavelet transform is 
+    computed for all the rows at once.  Returns a list of arrays of peak 
+    indices, one per row.
+    """
+    
+    if _identify_ridge_lines is None or _filter_ridge_lines is None:
+        return [np.asarray(scipy.signal.find_peaks_cwt(row, 
+                                                       widths = widths, 
+                                                       max_distances = max_distances),
+                           dtype = np.intp)
+                for row in histograms]
+    
+    num_bins = histograms.shape[1]
+    
+    # the wavelet transform, as scipy.signal.cwt does it.  (the ricker 
+    # wavelet is symmetric, so convolving is the same as correlating.)  
+    # use direct convolution, so the flat (zero) parts of the histograms 
+    # stay exactly flat.
+    cwt = np.empty((histograms.shape[0], len(widths), num_bins))
+    for i, width in enumerate(widths):
+        wavelet = scipy.signal.ricker(min(10 * width, num_bins), width)
+        cwt[:, i, :] = scipy.signal.convolve(histograms, 
+                                             wavelet[np.newaxis, :], 
+                                             mode = 'same',
+                                             method = 'direct')
+        
+    # and find the ridge lines the same way find_peaks_cwt does, with its 
+    # default parameters
+    gap_thresh = np.ceil(widths[0])
+    peaks = []
+    for row_cwt in cwt:
+        ridge_lines = _identify_ridge_lines(row_cwt, max_distances, gap_thresh)
+        filtered = _filter_ridge_lines(row_cwt, ridge_lines, min_snr = 1, noise_perc = 10)
+        peaks.append(np.sort(np.asarray([x[1][0] for x in filtered], dtype = np.intp)))
+        
+    return peaks
+
+def _best_mef_subset(peaks, mef):
+    """
+    Check all the contiguous subsets of ``mef`` as long as ``peaks`` for the
+    one whose linear regression (in log10 space) with the peaks has the
+    smallest sum of squared residuals.  All the regressions are done at 
+    once; they share the same x values (the peaks), so each is just a dot
+    product.  Returns the subset and its regression's ``[slope, intercept]``.
+    """
+    
+    x = np.log10(peaks)
+    x_centered = x - x.mean()
+    
+    # one row per subset
+    starts = np.arange(len(mef) - len(peaks) + 1)
+    y = np.log10(mef)[starts[:, np.newaxis] + np.arange(len(peaks))]
+    
+    slopes = np.dot(y, x_centered) / np.dot(x_centered, x_centered)
+    intercepts = y.mean(axis = 1) - slopes * x.mean()
+    resid = np.sum((y - slopes[:, np.newaxis] * x - intercepts[:, np.newaxis]) ** 2, axis = 1)
+    
+    best = np.argmin(resid)
+    return mef[best : best + len(peaks)], [slopes[best], intercepts[best]]
+            
+class _CalibrationFunction(object):
+    """
+    The calibration function for one channel: ``a * x``, or ``b * x ** a`` 
+    if ``b`` is set.  (A class instead of a lambda, so it can be pickled.)
+    """
+    
+    def __init__(self, a, b = None):
+        self.a = a
+        self.b = b
+        
+    def __call__(self, x):
+        if self.b is None:
+            return self.a * x
+        else:
+            return self.b * np.power(x, self.a)
+        
+def _calibrate(experiment, calibration_functions, units):
+    """
+    Drop the events that aren't positive in every channel in
+    ``calibration_functions``, then calibrate those channels in place and
+    record the calibration in their metadata.  Shared by
+    :meth:`BeadCalibrationOp.apply` and :class:`.TasbeTransform`.
+    """
+    
+    keep = np.ones(len(experiment), dtype = bool)
+    for channel in calibration_functions:
+        keep &= experiment.data[channel].values > 0
+        
+    experiment.data = experiment.data[keep]
+    experiment.data.reset_index(drop = True, inplace = True)
+    
+    for channel, calibration_fn in calibration_functions.items():
+        experiment[channel] = calibration_fn(experiment[channel])
+        
+        metadata = experiment.metadata[channel]
+        metadata['bead_calibration_fn'] = calibration_fn
+        metadata['bead_units'] = units[channel]
+        if 'range' in metadata:
+            metadata['range'] = calibration_fn(metadata['range'])
+        if 'voltage' in metadata:
+            del metadata['voltage']
@@ -111,6 +111,7 @@ class BinningOp(HasStrictTraits):
     
     _max_num_bins = Int(100)
 
+    @util.traced_method("apply")
     def apply(self, experiment):
         """
         Applies the binning to an experiment.
@@ -260,6 +261,7 @@ class BinningView(Op1DView, AnnotatingView, HistogramView):
     id = Constant('edu.mit.synbio.cytoflow.views.binning')
     friendly_id = Constant('Binning Setup')                                 
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the histogram.
@@ -27,7 +27,6 @@ from traits.api import HasStrictTraits, Str, File, Dict, Instance, \
                        Constant, Tuple, Float, Any, provides
     
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 import scipy.optimize
 
@@ -36,6 +35,7 @@ import cytoflow.utility as util
 
 from .i_operation import IOperation
 from .import_op import Tube, ImportOp, check_tube
+from .compensation import apply_compensation
 
 @provides(IOperation)
 class BleedthroughLinearOp(HasStrictTraits):
@@ -157,6 +157,7 @@ class BleedthroughLinearOp(HasStrictTraits):
     
     _sample = Dict(Str, Any, transient = True)
     
+    @util.traced_method("estimate")
     def estimate(self, experiment, subset = None): 
         """
         Estimate the bleedthrough from simgle-channel controls in :attr:`controls`
@@ -256,6 +257,7 @@ class BleedthroughLinearOp(HasStrictTraits):
                  
                 self.spillover[(from_channel, to_channel)] = popt[0]
                 
+    @util.traced_method("apply")
     def apply(self, experiment):
         """Applies the bleedthrough correction to an experiment.
         
@@ -304,35 +306,9 @@ class BleedthroughLinearOp(HasStrictTraits):
                                            "Must have both (from, to) and "
                                            "(to, from) keys in self.spillover")
         
-        new_experiment = experiment.clone()
-        
-        # the completely arbitrary ordering of the channels
-        channels = list(set([x for (x, _) in list(self.spillover.keys())]))
-         
-        # build the spillover matrix from the spillover dictionary
-        a = [  [self.spillover[(y, x)] if x != y else 1.0 for x in channels]
-               for y in channels]
-         
-        # invert it.  use the pseudoinverse in case a is singular
-        a_inv = np.linalg.pinv(a)
-         
-        # compute the corrected channels
-        new_channels = np.dot(experiment.data[channels], a_inv)
-         
-        # and assign to the new experiment
-        for i, c in enumerate(channels):
-            new_experiment[c] = pd.Series(new_channels[:, i])
-            
-        # make sure the new experiment has the same column order as the old one
-        new_experiment.data = new_experiment.data[list(experiment.data.columns)]
-         
-        for channel in channels:
-            # add the spillover values to the channel's metadata
-            new_experiment.metadata[channel]['linear_bleedthrough'] = \
-                {x : self.spillover[(x, channel)]
-                     for x in channels if x != channel}
-            new_experiment.metadata[channel]['bleedthrough_channels'] = list(channels)
-            new_experiment.metadata[channel]['bleedthrough_fn'] = lambda x, a_inv = a_inv: np.dot(x, a_inv)
+        new_experiment = _correct_bleedthrough(experiment, 
+                                               self.spillover,
+                                               *_bleedthrough_matrix(self.spillover))
       
         new_experiment.history.append(self.clone_traits(transient = lambda _: True))   
         return new_experiment
@@ -385,6 +361,7 @@ class BleedthroughLinearDiagnostic(HasStrictTraits):
     # TODO - why can't I use BleedthroughPiecewiseOp here?
     op = Instance(IOperation)
     
+    @util.traced_method("plot")
     def plot(self, experiment = None, **kwargs):
         """
         Plot a diagnostic of the bleedthrough model computation.
@@ -457,3 +434,42 @@ class BleedthroughLinearDiagnostic(HasStrictTraits):
 
                 
         plt.tight_layout(pad = 0.8)
+
+
+def _bleedthrough_matrix(spillover):
+    """
+    Returns the channels in ``spillover`` (in a completely arbitrary order)
+    and the inverse of the spillover matrix, for :func:`_correct_bleedthrough`.
+    """
+    
+    channels = list(set([x for (x, _) in list(spillover.keys())]))
+     
+    # build the spillover matrix from the spillover dictionary
+    a = [  [spillover[(y, x)] if x != y else 1.0 for x in channels]
+           for y in channels]
+     
+    # invert it.  use the pseudoinverse in case a is singular
+    return channels, np.linalg.pinv(a)
+
+def _correct_bleedthrough(experiment, spillover, channels, a_inv):
+    """
+    Returns a new :class:`.Experiment` with the bleedthrough corrected and
+    the corrections recorded in the channels' metadata.  Shared by
+    :meth:`BleedthroughLinearOp.apply` and :class:`.TasbeTransform`.
+    """
+    
+    # compute the corrected channels, a chunk at a time, straight into
+    # the new experiment
+    new_experiment = apply_compensation(experiment, 
+                                        channels, 
+                                        lambda x: np.dot(x, a_inv))
+     
+    for channel in channels:
+        # add the spillover values to the channel's metadata
+        new_experiment.metadata[channel]['linear_bleedthrough'] = \
+            {x : spillover[(x, channel)]
+                 for x in channels if x != channel}
+        new_experiment.metadata[channel]['bleedthrough_channels'] = list(channels)
+        new_experiment.metadata[channel]['bleedthrough_fn'] = lambda x, a_inv = a_inv: np.dot(x, a_inv)
+        
+    return new_experiment
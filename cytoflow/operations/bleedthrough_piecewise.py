@@ -38,6 +38,7 @@ import cytoflow.utility as util
 
 from .i_operation import IOperation
 from .import_op import Tube, ImportOp, check_tube
+from .compensation import apply_compensation
 
 @provides(IOperation)
 class BleedthroughPiecewiseOp(HasStrictTraits):
@@ -161,6 +162,7 @@ class BleedthroughPiecewiseOp(HasStrictTraits):
     # TODO - this is ugly and unpythonic.  :-/
     _channels = List(Str, transient = True)
     
+    @util.traced_method("estimate")
     def estimate(self, experiment, subset = None): 
         """
         Estimate the bleedthrough from the single-channel controls in 
@@ -307,6 +309,7 @@ class BleedthroughPiecewiseOp(HasStrictTraits):
 
         # TODO - some sort of validity checking.
 
+    @util.traced_method("apply")
     def apply(self, experiment):
         """Applies the bleedthrough correction to an experiment.
         
@@ -348,10 +351,9 @@ class BleedthroughPiecewiseOp(HasStrictTraits):
             raise util.CytoflowOpError(None,
                                        "Module parameters don't match experiment channels")
 
-        new_experiment = experiment.clone()
-        
         # get rid of data outside of the interpolators' mesh 
         # (-3 * autofluorescence sigma)
+        keep = np.ones(len(experiment), dtype = np.bool_)
         for channel in self._channels:     
             
             # if you update the mesh calculation above, update it here too!
@@ -362,16 +364,17 @@ class BleedthroughPiecewiseOp(HasStrictTraits):
             else:
                 mesh_min = -0.01 * experiment.metadata[channel]['range']  # TODO - does this even work?
 
-            new_experiment.data = \
-                new_experiment.data[new_experiment.data[channel] > mesh_min]
-        
-        new_experiment.data.reset_index(drop = True, inplace = True)
+            keep &= experiment.data[channel].values > mesh_min
         
-        old_data = new_experiment.data[self._channels]
+        # interpolate the corrected channels, a chunk at a time, straight
+        # into the new experiment
+        interpolators = [self._interpolators[channel] for channel in self._channels]
+        new_experiment = apply_compensation(experiment,
+                                            self._channels,
+                                            lambda x: np.column_stack([f(x) for f in interpolators]),
+                                            keep = keep)
         
         for channel in self._channels:
-            new_experiment[channel] = self._interpolators[channel](old_data)
-
             new_experiment.metadata[channel]['bleedthrough_channels'] = self._channels
             new_experiment.metadata[channel]['bleedthrough_fn'] = self._interpolators[channel]
 
@@ -453,6 +456,7 @@ class BleedthroughPiecewiseDiagnostic(HasStrictTraits):
     # TODO - why can't I use BleedthroughPiecewiseOp here?
     op = Instance(BleedthroughPiecewiseOp)
     
+    @util.traced_method("plot")
     def plot(self, experiment = None, **kwargs):
         """Plot a faceted histogram view of a channel"""
         
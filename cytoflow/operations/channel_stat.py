@@ -138,6 +138,7 @@ class ChannelStatisticOp(HasStrictTraits):
     subset = Str
     fill = Any(0)
     
+    @util.traced_method("apply")
     def apply(self, experiment):
         """
         Apply the operation to an :class:`.Experiment`.
@@ -220,6 +221,7 @@ class ChannelStatisticOp(HasStrictTraits):
         groupby = experiment.data.groupby(self.by)
 
         for group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 warn("Group {} had no data"
                      .format(group), 
@@ -238,6 +240,7 @@ class ChannelStatisticOp(HasStrictTraits):
                          dtype = np.dtype(object)).sort_index()
         
         for group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 continue
             
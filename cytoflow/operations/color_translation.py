@@ -28,7 +28,6 @@ from traits.api import (HasStrictTraits, Str, File, Dict, Any, Callable,
 import numpy as np
 import matplotlib.pyplot as plt
 import sklearn.mixture
-import scipy.optimize
 
 import cytoflow.views
 import cytoflow.utility as util
@@ -155,6 +154,7 @@ class ColorTranslationOp(HasStrictTraits):
     _sample = Dict(Tuple(Str, Str), Any, transient = True)
     _means = Dict(Tuple(Str, Str), Tuple(Float, Float), transient = True)
 
+    @util.traced_method("estimate")
     def estimate(self, experiment, subset = None): 
         """
         Estimate the mapping from the two-channel controls
@@ -188,6 +188,10 @@ class ColorTranslationOp(HasStrictTraits):
         
         translation = {x[0] : x[1] for x in list(self.controls.keys())}
         
+        # the channel pairs to fit, and the (log-scaled) data to fit them to
+        fits = []
+        fit_data = []
+        
         for from_channel, to_channel in translation.items():
             
             if from_channel not in experiment.channels:
@@ -252,62 +256,31 @@ class ColorTranslationOp(HasStrictTraits):
                 tubes[tube_file] = tube_data
 
                 
-            data = tubes[tube_file][[from_channel, to_channel]].copy()
-            data = data[data[from_channel] > 0]
-            data = data[data[to_channel] > 0]
-            
-            _ = data.reset_index(drop = True, inplace = True)
+            data = tubes[tube_file][[from_channel, to_channel]]
+            data = data[(data[from_channel] > 0) & (data[to_channel] > 0)]
+            data = data.reset_index(drop = True)
             
             self._sample[(from_channel, to_channel)] = data.sample(n = min(len(data), 5000))
             
-            data[from_channel] = np.log10(data[from_channel])
-            data[to_channel] = np.log10(data[to_channel])
+            fits.append((from_channel, to_channel))
+            fit_data.append((np.log10(data[from_channel].values),
+                             np.log10(data[to_channel].values)))
             
-            if self.mixture_model:    
-                gmm = sklearn.mixture.BayesianGaussianMixture(n_components=2,
-                                                              random_state = 1)
-                fit = gmm.fit(data)
-                
-                self._means[(from_channel), (to_channel)] = \
-                    (10 ** fit.means_[0][0], 10 ** fit.means_[1][0])
-
-                # pick the component with the maximum mean
-                idx = 0 if fit.means_[0][0] > fit.means_[1][0] else 1
-                weights = [x[idx] for x in fit.predict_proba(data)]
-            else:
-                weights = [1] * len(data.index)
-                
-            if self.linear_model:
-                # this mimics the TASBE approach, which constrains the fit to
-                # a multiplicative scaling (eg, a linear fit with an intercept
-                # of 0.)  I disagree that this is the right approach, which is
-                # why it's not the default.
-                 
-                f = lambda x: weights * (data[to_channel] - x[0] * data[from_channel])
-                x0 = [1]
-                
-                trans_fn = lambda data, x: np.power(data, x[0])
-                 
-            else:
-
-                # this code uses a different approach from TASBE. instead of
-                # computing a multiplicative scaling constant, it computes a
-                # full linear regression on the log-scaled data (ie, allowing
-                # the intercept to vary as well as the slope).  this is a 
-                # more general model of the underlying physical behavior, and
-                # fits the data better -- but it may not be more "correct."
-                 
-                f = lambda x: weights * (data[to_channel] - x[0] * data[from_channel] - x[1])
-                x0 = [1, 0]
-                
-                trans_fn = lambda data, x: (10 ** x[1]) * np.power(data, x[0])
-                 
-                 
-            opt = scipy.optimize.least_squares(f, x0)
-            self._coefficients[(from_channel, to_channel)] = opt.x
-            self._trans_fn[(from_channel, to_channel)] = lambda data, x = opt.x: trans_fn(data, x)
+        # the fits are independent, so do them in parallel.
+        results = util.parallel_map(_fit_translation,
+                                    fit_data,
+                                    size = sum(len(x) for x, _ in fit_data),
+                                    mixture_model = self.mixture_model,
+                                    linear_model = self.linear_model)
+        
+        for (from_channel, to_channel), (coefficients, means) in zip(fits, results):
+            if self.mixture_model:
+                self._means[(from_channel, to_channel)] = means
+            self._coefficients[(from_channel, to_channel)] = coefficients
+            self._trans_fn[(from_channel, to_channel)] = _TranslationFunction(coefficients)
 
 
+    @util.traced_method("apply")
     def apply(self, experiment):
         """Applies the color translation to an experiment
         
@@ -340,7 +313,6 @@ class ColorTranslationOp(HasStrictTraits):
                                        "Did you forget to call estimate()?")
             
         translation = {x[0] : x[1] for x in list(self.controls.keys())}
-        from_channels = [x[0] for x in list(self.controls.keys())]
 
         for key, val in translation.items():
             if (key, val) not in self._coefficients:
@@ -350,17 +322,9 @@ class ColorTranslationOp(HasStrictTraits):
                                            .format(key, val))
                        
         new_experiment = experiment.clone()
-        
-        for channel in from_channels:
-            new_experiment.data = \
-                new_experiment.data[new_experiment.data[channel] > 0]
-        
-        for from_channel, to_channel in translation.items():
-            trans_fn = self._trans_fn[(from_channel, to_channel)]
-                        
-            new_experiment[from_channel] = trans_fn(experiment[from_channel])
-            new_experiment.metadata[from_channel]['channel_translation_fn'] = trans_fn
-            new_experiment.metadata[from_channel]['channel_translation'] = to_channel
+        _translate(new_experiment, 
+                   translation, 
+                   {f : self._trans_fn[(f, t)] for f, t in translation.items()})
             
         new_experiment.history.append(self.clone_traits(transient = lambda _: True))
             
@@ -407,6 +371,7 @@ class ColorTranslationDiagnostic(HasStrictTraits):
     # TODO - why can't I use ColorTranslationOp here?
     op = Instance(IOperation)
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the plots
@@ -486,3 +451,104 @@ class ColorTranslationDiagnostic(HasStrictTraits):
             plt_idx = plt_idx + 1
         
         plt.tight_layout(pad = 0.8)
+        
+        
+# fit the mixture model to at most this many events...
+_MIXTURE_SAMPLE_SIZE = 50000
+
+def _fit_translation(log_from, log_to, mixture_model, linear_model):
+    """
+    Fit the translation from ``log_from`` to ``log_to`` (the log10 of the
+    channels.)  Returns the coefficients and, if ``mixture_model`` is set, 
+    the means of the two mixture components (or else ``None``.)
+    
+    A module-level function, so :func:`.parallel_map` can run it in a 
+    worker process.
+    """
+    
+    means = None
+    
+    if mixture_model:
+        data = np.column_stack((log_from, log_to))
+        
+        # ... chosen by stratifying on the "from" channel: divide the events,
+        # sorted, into equal-sized strata and pick one event at random from 
+        # each.  that keeps both components in proportion, even a small one.
+        if len(data) > _MIXTURE_SAMPLE_SIZE:
+            rng = np.random.RandomState(1)
+            ranks = (np.arange(_MIXTURE_SAMPLE_SIZE) + rng.random_sample(_MIXTURE_SAMPLE_SIZE)) \
+                    * (len(data) / _MIXTURE_SAMPLE_SIZE)
+            ranks = np.minimum(ranks.astype(np.intp), len(data) - 1)
+            sample = data[np.argsort(log_from, kind = 'stable')[ranks]]
+        else:
+            sample = data
+        
+        gmm = sklearn.mixture.BayesianGaussianMixture(n_components=2,
+                                                      random_state = 1)
+        fit = gmm.fit(sample)
+        
+        means = (10 ** fit.means_[0][0], 10 ** fit.means_[1][0])
+
+        # pick the component with the maximum mean
+        idx = 0 if fit.means_[0][0] > fit.means_[1][0] else 1
+        weights = fit.predict_proba(data)[:, idx]
+    else:
+        weights = np.ones(len(log_from))
+        
+    # weighted least squares, in closed form: minimize 
+    # sum((weights * (log_to - model)) ** 2)
+    if linear_model:
+        # this mimics the TASBE approach, which constrains the fit to
+        # a multiplicative scaling (eg, a linear fit with an intercept
+        # of 0.)  I disagree that this is the right approach, which is
+        # why it's not the default.
+        a = (weights * log_from)[:, np.newaxis]
+        
+    else:
+        # this code uses a different approach from TASBE. instead of
+        # computing a multiplicative scaling constant, it computes a
+        # full linear regression on the log-scaled data (ie, allowing
+        # the intercept to vary as well as the slope).  this is a 
+        # more general model of the underlying physical behavior, and
+        # fits the data better -- but it may not be more "correct."
+        a = np.column_stack((weights * log_from, weights))
+        
+    coefficients, _, _, _ = np.linalg.lstsq(a, weights * log_to, rcond = None)
+    return coefficients, means
+
+class _TranslationFunction(object):
+    """
+    Translates one channel to another.  With one coefficient, ``x ** c[0]``;
+    with two, ``10 ** c[1] * x ** c[0]``.  (A class instead of a lambda, so 
+    it can be pickled.)
+    """
+    
+    def __init__(self, coefficients):
+        self.coefficients = coefficients
+        
+    def __call__(self, data):
+        if len(self.coefficients) == 1:
+            return np.power(data, self.coefficients[0])
+        else:
+            return (10 ** self.coefficients[1]) * np.power(data, self.coefficients[0])
+        
+def _translate(experiment, translation, translation_functions):
+    """
+    Drop the events that aren't positive in every "from" channel in 
+    ``translation``, then translate those channels in place with
+    ``translation_functions`` and record the translation in their metadata.  
+    Shared by :meth:`ColorTranslationOp.apply` and :class:`.TasbeTransform`.
+    """
+    
+    keep = np.ones(len(experiment), dtype = bool)
+    for channel in translation:
+        keep &= experiment.data[channel].values > 0
+        
+    experiment.data = experiment.data[keep]
+    
+    for from_channel, to_channel in translation.items():
+        trans_fn = translation_functions[from_channel]
+                    
+        experiment[from_channel] = trans_fn(experiment[from_channel])
+        experiment.metadata[from_channel]['channel_translation_fn'] = trans_fn
+        experiment.metadata[from_channel]['channel_translation'] = to_channel
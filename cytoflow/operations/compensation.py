@@ -0,0 +1,150 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+cytoflow.operations.compensation
+--------------------------------
+
+Applying a bleedthrough correction (a compensation) to a block of channels.
+
+A compensation maps each event's values in several channels to new values
+in the same channels -- by multiplying by the inverse of the spillover
+matrix (:class:`.BleedthroughLinearOp`) or by interpolating
+(:class:`.BleedthroughPiecewiseOp`).  Doing that to the whole block at once
+needs a copy of the block going in, the result coming out, and a new
+:class:`pandas.DataFrame` to put it in.  :func:`compensate` instead works a
+chunk of events at a time, writing into an array it allocates up front, and
+:func:`apply_compensation` makes the new :class:`.Experiment` around that
+array without copying it again -- so compensating needs about one extra
+copy of the channels, not three or four.
+'''
+
+import numpy as np
+import pandas as pd
+
+import cytoflow.utility as util
+
+# compensate this many events at a time: the chunk (and its result) are
+# small enough to stay in the cache.
+_CHUNK_SIZE = 2 ** 14
+
+def compensate(columns, transform, rows = None):
+    """
+    Apply ``transform`` to the events in ``columns``, a chunk at a time.
+
+    Parameters
+    ----------
+    columns : list of numpy.ndarray
+        The channels to compensate, one array per channel.
+
+    transform : Callable
+        Called with a 2D array, one row per event and one column per channel
+        (in the same order as ``columns``); returns an array of the same
+        shape with the compensated values.
+
+    rows : numpy.ndarray of int (optional)
+        If set, only compensate these events.
+
+    Returns
+    -------
+    numpy.ndarray
+        The compensated channels: a 2D array in Fortran (column-major) order,
+        one row per event and one column per channel, in the same order as
+        ``columns``.
+    """
+
+    num_events = len(columns[0]) if rows is None else len(rows)
+    out = np.empty((num_events, len(columns)), dtype = np.float64, order = 'F')
+    block = np.empty((min(num_events, _CHUNK_SIZE), len(columns)), dtype = np.float64)
+
+    for start in range(0, num_events, _CHUNK_SIZE):
+        util.check_cancelled()
+        stop = min(start + _CHUNK_SIZE, num_events)
+        chunk = block[:stop - start]
+
+        for i, column in enumerate(columns):
+            if rows is None:
+                chunk[:, i] = column[start : stop]
+            else:
+                chunk[:, i] = column[rows[start : stop]]
+
+        out[start : stop] = transform(chunk)
+
+    return out
+
+def apply_compensation(experiment, channels, transform, keep = None):
+    """
+    Make a new :class:`.Experiment` with ``channels`` compensated by
+    ``transform`` (see :func:`compensate`).  The other columns are copied
+    (as :meth:`.Experiment.clone` would), but the old values of
+    ``channels`` aren't.
+
+    Parameters
+    ----------
+    experiment : Experiment
+        The experiment to compensate.
+
+    channels : list of Str
+        The channels to compensate, in the order ``transform`` expects them.
+
+    transform : Callable
+        See :func:`compensate`.
+
+    keep : numpy.ndarray of bool (optional)
+        If set, only keep these events.
+
+    Returns
+    -------
+    Experiment
+        The compensated experiment.  Its :attr:`~.Experiment.data` has the
+        same columns, in the same order, as ``experiment``; its index starts
+        over at 0 if ``keep`` was set.
+    """
+
+    old_data = experiment.data
+    rows = None if keep is None else np.flatnonzero(keep)
+
+    # compensate the channels in the order they're in the data frame, so
+    # the result can go into the new one as it is.
+    order = np.argsort([old_data.columns.get_loc(c) for c in channels])
+    inverse = np.argsort(order)
+
+    with util.traced("compensate", "compensate", events = len(old_data)):
+        new_channels = compensate([old_data[channels[i]].values for i in order],
+                                  lambda x: transform(x[:, inverse])[:, order],
+                                  rows)
+
+    # wrap the new channels in a frame as they are (see Experiment.load),
+    # then copy the other columns in where they were.
+    data = pd.DataFrame(new_channels,
+                        index = old_data.index if rows is None
+                                else pd.RangeIndex(len(rows)),
+                        columns = [channels[i] for i in order],
+                        copy = False)
+
+    for loc, c in enumerate(old_data.columns):
+        if c not in channels:
+            values = old_data[c].values
+            data.insert(loc, c, values if rows is None else values.take(rows))
+
+    new_experiment = experiment.clone_traits()
+    new_experiment.data = data
+    new_experiment.statistics = experiment.statistics.copy()
+
+    return new_experiment
@@ -186,6 +186,7 @@ class DensityGateOp(HasStrictTraits):
     _keep_ybins = Dict(Any, Array, transient = True)
     _histogram = Dict(Any, Array, transient = True)
     
+    @util.traced_method("estimate")
     def estimate(self, experiment, subset = None):
         """
         Split the data set into bins and determine which ones to keep.
@@ -278,6 +279,7 @@ class DensityGateOp(HasStrictTraits):
                                                          self.bins))
                     
         for group, group_data in groupby:
+            util.check_cancelled()
             if len(group_data) == 0:
                 raise util.CytoflowOpError('by',
                                            "Group {} had no data"
@@ -305,6 +307,7 @@ class DensityGateOp(HasStrictTraits):
             self._histogram[group] = h
 
             
+    @util.traced_method("apply")
     def apply(self, experiment):
         """
         Creates a new condition based on membership in the gate that was
@@ -389,6 +392,7 @@ class DensityGateOp(HasStrictTraits):
         event_assignments = pd.Series([False] * len(experiment), dtype = "bool")
         
         for group, group_data in groupby:
+            util.check_cancelled()
             if group not in self._keep_xbins:
                 # there weren't any events in this group, so we didn't get
                 # an estimate
@@ -411,7 +415,7 @@ class DensityGateOp(HasStrictTraits):
                     
         new_experiment = experiment.clone()
         
-        new_experiment.add_condition(self.name, "bool", event_assignments)
+        new_experiment.add_condition(self.name, "bitset", event_assignments)
 
         new_experiment.history.append(self.clone_traits(transient = lambda _: True))
         return new_experiment
@@ -446,6 +450,7 @@ class DensityGateView(By2DView, AnnotatingView, DensityView):
 
     huefacet = Constant(None)
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the plots.
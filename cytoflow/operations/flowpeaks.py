@@ -236,6 +236,7 @@ class FlowPeaksOp(HasStrictTraits):
     _cluster_group = Dict(Any, List, transient = True) # kmeans cluster idx --> group idx
     _scale = Dict(Str, Instance(util.IScale), transient = True)
     
+    @util.traced_method("estimate")
     def estimate(self, experiment, subset = None):
         """
         Estimate the k-means clusters, then hierarchically merge them.
@@ -310,6 +311,7 @@ class FlowPeaksOp(HasStrictTraits):
                 self._scale[c] = util.scale_factory(util.get_default_scale(), experiment, channel = c)
                                     
         for data_group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 raise util.CytoflowOpError('by',
                                            "Group {} had no data".format(data_group))
@@ -369,6 +371,7 @@ class FlowPeaksOp(HasStrictTraits):
         ### use optimization on the finite gmm to find the local peak for 
         ### each kmeans cluster
         for data_group, data_subset in groupby:
+            util.check_cancelled()
             kmeans = self._kmeans[data_group]
             num_clusters = kmeans.n_clusters
             means = self._means[data_group]
@@ -457,6 +460,7 @@ class FlowPeaksOp(HasStrictTraits):
             ### merge peaks that are sufficiently close
             
         for data_group, data_subset in groupby:
+            util.check_cancelled()
             kmeans = self._kmeans[data_group]
             num_clusters = kmeans.n_clusters
             means = self._means[data_group]
@@ -571,6 +575,7 @@ class FlowPeaksOp(HasStrictTraits):
             self._cluster_group[data_group] = cluster_group    
                                                  
          
+    @util.traced_method("apply")
     def apply(self, experiment):
         """
         Assign events to a cluster.
@@ -656,6 +661,7 @@ class FlowPeaksOp(HasStrictTraits):
 #         centers_stat = pd.Series(index = idx, dtype = np.dtype(object)).sort_index()
                      
         for group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 raise util.CytoflowOpError('by',
                                            "Group {} had no data"
@@ -862,6 +868,7 @@ class FlowPeaks1DView(By1DView, AnnotatingView, HistogramView):
     channel = Str
     scale = util.ScaleEnum
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the plots.
@@ -926,6 +933,7 @@ class FlowPeaks2DView(By2DView, AnnotatingView, ScatterplotView):
     xscale = util.ScaleEnum
     yscale = util.ScaleEnum
  
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the plots.
@@ -1021,6 +1029,7 @@ class FlowPeaks2DDensityView(By2DView, AnnotatingView, NullView):
     yscale = util.ScaleEnum
     huefacet = Constant(None)
  
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the plots.
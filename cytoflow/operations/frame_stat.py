@@ -98,6 +98,7 @@ class FrameStatisticOp(HasStrictTraits):
     subset = Str
     fill = Any(0)
     
+    @util.traced_method("apply")
     def apply(self, experiment):
         if experiment is None:
             raise util.CytoflowOpError('experiment',
@@ -159,6 +160,7 @@ class FrameStatisticOp(HasStrictTraits):
         groupby = experiment.data.groupby(self.by)
                         
         for group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 warn("Group {} had no data"
                      .format(group), 
@@ -177,6 +179,7 @@ class FrameStatisticOp(HasStrictTraits):
                          dtype = np.dtype(object)).sort_index()
         
         for group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 continue
             
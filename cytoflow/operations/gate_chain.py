@@ -0,0 +1,248 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+cytoflow.operations.gate_chain
+------------------------------
+
+Applying several geometric gates at once.
+
+Each of the geometric gates (:class:`.ThresholdOp`, :class:`.RangeOp`,
+:class:`.Range2DOp`, :class:`.QuadOp` and :class:`.PolygonOp`) has a
+``_compile`` method that checks its parameters against an experiment and
+returns a :class:`_CompiledGate`: the channels (and scales) it needs and a
+function that computes the gate from them.  :func:`apply_gates` scales each
+channel that any of the gates needs just once, evaluates all the gates in
+one pass over the events (a chunk at a time, so there are no full-length
+temporary arrays), and adds all the new conditions to a single clone of the
+experiment.
+'''
+
+from traits.api import HasStrictTraits, Constant, List, Any, provides
+
+import numpy as np
+import pandas as pd
+
+import cytoflow.utility as util
+from cytoflow.utility.bitset import BitsetArray
+
+from .i_operation import IOperation
+
+# evaluate the gates this many events at a time.  must be a multiple of 8,
+# so each chunk fills whole bytes of the bitsets.
+_CHUNK_SIZE = 2 ** 18
+
+class _CompiledGate(object):
+    """
+    A gate, ready to evaluate.
+
+    Parameters
+    ----------
+    name : Str
+        The name of the new condition.
+
+    channels : List((Str, Str))
+        The ``(channel, scale)`` pairs the gate needs.  ``scale`` is the
+        name of a scale, or ``None`` for the unscaled channel.
+
+    predicate : Callable
+        Called with one array for each of ``channels`` (a chunk of events);
+        returns an array of ``bool`` -- or, if ``categories`` is set, of
+        integer codes into ``categories`` (``-1`` for none of them).
+
+    categories : List(Str) (optional)
+        If set, the gate makes a categorical condition instead of a bitset.
+    """
+
+    def __init__(self, name, channels, predicate, categories = None):
+        self.name = name
+        self.channels = channels
+        self.predicate = predicate
+        self.categories = categories
+
+class _ScaleCache(object):
+    """
+    Makes each ``(scale, channel)`` scale for an experiment just once --
+    some scales (like ``logicle``) estimate their parameters from the data.
+    """
+
+    def __init__(self, experiment):
+        self._experiment = experiment
+        self._scales = {}
+
+    def __call__(self, scale, channel):
+        if (scale, channel) not in self._scales:
+            self._scales[(scale, channel)] = \
+                util.scale_factory(scale, self._experiment, channel = channel)
+        return self._scales[(scale, channel)]
+
+def apply_gates(experiment, gates):
+    """
+    Apply the geometric gates in ``gates`` to ``experiment`` in one pass.
+    The result is the same as applying them one after another.
+
+    Parameters
+    ----------
+    experiment : Experiment
+        The experiment to gate.
+
+    gates : List(IOperation)
+        The gates to apply.  Each must have a ``_compile`` method (see
+        :mod:`cytoflow.operations.gate_chain`).
+
+    Returns
+    -------
+    Experiment
+        A clone of ``experiment`` with a new condition for each gate.
+    """
+
+    scales = _ScaleCache(experiment)
+    compiled = [gate._compile(experiment, scales) for gate in gates]
+
+    names = [c.name for c in compiled]
+    for name in names:
+        if names.count(name) > 1:
+            raise util.CytoflowOpError('gates',
+                                       "More than one gate is named {}"
+                                       .format(name))
+
+    # the (channel, scale) pairs that any gate needs, in the order they're
+    # first needed
+    needed = []
+    for c in compiled:
+        needed.extend([x for x in c.channels if x not in needed])
+
+    num_events = len(experiment)
+    results = []
+    for c in compiled:
+        if c.categories is None:
+            results.append(np.zeros((num_events + 7) // 8, dtype = np.uint8))
+        else:
+            results.append(np.empty(num_events, dtype = np.int8))
+
+    for start in range(0, num_events, _CHUNK_SIZE):
+        util.check_cancelled()
+        stop = min(start + _CHUNK_SIZE, num_events)
+
+        values = {}
+        for channel, scale in needed:
+            x = experiment.data[channel].values[start : stop]
+            values[(channel, scale)] = scales(scale, channel)(x) if scale else x
+
+        for c, result in zip(compiled, results):
+            gate = c.predicate(*[values[x] for x in c.channels])
+            if c.categories is None:
+                result[start // 8 : (stop + 7) // 8] = \
+                    np.packbits(np.asarray(gate, dtype = np.bool_))
+            else:
+                result[start : stop] = gate
+
+    new_experiment = experiment.clone()
+    for c, result in zip(compiled, results):
+        if c.categories is None:
+            values = BitsetArray(result, num_events)
+            new_experiment.add_condition(c.name,
+                                         "bitset",
+                                         pd.Series(values, index = experiment.data.index))
+        else:
+            values = pd.Categorical.from_codes(result, categories = c.categories)
+            new_experiment.add_condition(c.name,
+                                         "category",
+                                         pd.Series(values.remove_unused_categories(),
+                                                   index = experiment.data.index))
+
+    for gate in gates:
+        new_experiment.history.append(gate.clone_traits(transient = lambda _: True))
+
+    return new_experiment
+
+@provides(IOperation)
+class GateChainOp(HasStrictTraits):
+    """
+    Apply a sequence of geometric gates -- :class:`.ThresholdOp`,
+    :class:`.RangeOp`, :class:`.Range2DOp`, :class:`.QuadOp` and
+    :class:`.PolygonOp` -- all at once.
+
+    The result is the same as applying each gate in turn, but each channel
+    is scaled only once, the gates are evaluated together in a single pass
+    over the data, and the experiment is only cloned once.  Each gate is
+    added to the new experiment's :attr:`~.Experiment.history`, just as if
+    it had been applied by itself.
+
+    Attributes
+    ----------
+    gates : List(IOperation)
+        The gates to apply.  Their names must all be different.
+
+    Examples
+    --------
+    Make a little data set.
+
+    >>> import cytoflow as flow
+    >>> import_op = flow.ImportOp()
+    >>> import_op.tubes = [flow.Tube(file = "Plate01/RFP_Well_A3.fcs",
+    ...                              conditions = {'Dox' : 10.0}),
+    ...                    flow.Tube(file = "Plate01/CFP_Well_A4.fcs",
+    ...                              conditions = {'Dox' : 1.0})]
+    >>> import_op.conditions = {'Dox' : 'float'}
+    >>> ex = import_op.apply()
+
+    Apply two gates at once.
+
+    >>> chain_op = flow.GateChainOp(
+    ...     gates = [flow.ThresholdOp(name = 'Y2', channel = 'Y2-A', threshold = 2000),
+    ...              flow.RangeOp(name = 'V2', channel = 'V2-A', low = 100, high = 1000)])
+    >>> ex2 = chain_op.apply(ex)
+    """
+
+    id = Constant('edu.mit.synbio.cytoflow.operations.gate_chain')
+    friendly_id = Constant("Gate Chain")
+
+    gates = List(Any)
+
+    @util.traced_method("apply")
+    def apply(self, experiment):
+        """
+        Applies the gates to an experiment.
+
+        Parameters
+        ----------
+        experiment : Experiment
+            the experiment to which the gates are applied
+
+        Returns
+        -------
+        Experiment
+            a new :class:`~Experiment`, the same as the old experiment but
+            with a new condition for each gate.
+        """
+
+        if experiment is None:
+            raise util.CytoflowOpError('experiment', "No experiment specified")
+
+        if not self.gates:
+            raise util.CytoflowOpError('gates', "Must specify some gates")
+
+        for gate in self.gates:
+            if not hasattr(gate, '_compile'):
+                raise util.CytoflowOpError('gates',
+                                           "{} isn't a geometric gate"
+                                           .format(gate.__class__.__name__))
+
+        return apply_gates(experiment, self.gates)
@@ -22,7 +22,7 @@ cytoflow.operations.gaussian
 ----------------------------
 '''
 
-import re
+import re, functools
 from warnings import warn
 
 import matplotlib.pyplot as plt
@@ -206,6 +206,7 @@ class GaussianMixtureOp(HasStrictTraits):
     _gmms = Dict(Any, Instance(sklearn.mixture.GaussianMixture), transient = True)
     _scale = Dict(Str, Instance(util.IScale), transient = True)
     
+    @util.traced_method("estimate")
     def estimate(self, experiment, subset = None):
         """
         Estimate the Gaussian mixture model parameters
@@ -280,6 +281,7 @@ class GaussianMixtureOp(HasStrictTraits):
         gmms = {}
             
         for group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 raise util.CytoflowOpError(None,
                                            "Group {} had no data"
@@ -326,6 +328,7 @@ class GaussianMixtureOp(HasStrictTraits):
             
         self._gmms = gmms
      
+    @util.traced_method("apply")
     def apply(self, experiment):
         """
         Assigns new metadata to events using the mixture model estimated
@@ -447,34 +450,8 @@ class GaussianMixtureOp(HasStrictTraits):
             # contains all the events
             groupby = experiment.data.groupby(lambda _: True)   
 
-        # make the statistics       
-        components = [x + 1 for x in range(self.num_components)]
-         
-        prop_idx = pd.MultiIndex.from_product([experiment[x].unique() for x in self.by] + [components], 
-                                         names = list(self.by) + ["Component"])
-        prop_stat = pd.Series(name = "{} : {}".format(self.name, "proportion"),
-                              index = prop_idx, 
-                              dtype = np.dtype(object)).sort_index()
-                  
-        mean_idx = pd.MultiIndex.from_product([experiment[x].unique() for x in self.by] + [components] + [self.channels], 
-                                              names = list(self.by) + ["Component"] + ["Channel"])
-        mean_stat = pd.Series(name = "{} : {}".format(self.name, "mean"),
-                              index = mean_idx, 
-                              dtype = np.dtype(object)).sort_index()
-        sigma_stat = pd.Series(name = "{} : {}".format(self.name, "sigma"),
-                               index = mean_idx,
-                               dtype = np.dtype(object)).sort_index()
-        interval_stat = pd.Series(name = "{} : {}".format(self.name, "interval"),
-                                  index = mean_idx, 
-                                  dtype = np.dtype(object)).sort_index()
-
-        corr_idx = pd.MultiIndex.from_product([experiment[x].unique() for x in self.by] + [components] + [self.channels] + [self.channels], 
-                                              names = list(self.by) + ["Component"] + ["Channel_1"] + ["Channel_2"])
-        corr_stat = pd.Series(name = "{} : {}".format(self.name, "correlation"),
-                              index = corr_idx, 
-                              dtype = np.dtype(object)).sort_index()  
-                 
         for group, data_subset in groupby:
+            util.check_cancelled()
             if group not in self._gmms:
                 # there weren't any events in this group, so we didn't get
                 # a gmm.
@@ -535,31 +512,6 @@ class GaussianMixtureOp(HasStrictTraits):
                 for c in range(self.num_components):
                     event_posteriors[c].iloc[group_idx] = p[:, c]
                     
-            for c in range(self.num_components):
-                if len(self.by) == 0:
-                    g = tuple([c + 1])
-                elif hasattr(group, '__iter__') and not isinstance(group, (str, bytes)):
-                    g = tuple(list(group) + [c + 1])
-                else:
-                    g = tuple([group] + [c + 1])
-
-                prop_stat.at[g] = gmm.weights_[c]
-                
-                for cidx1, channel1 in enumerate(self.channels):
-                    g2 = tuple(list(g) + [channel1])
-                    mean_stat.at[g2] = self._scale[channel1].inverse(gmm.means_[c, cidx1])
-                    
-                    s, corr = util.cov2corr(gmm.covariances_[c])
-                    sigma_stat[g2] = (self._scale[channel1].inverse(s[cidx1]))
-                    interval_stat.at[g2] = (self._scale[channel1].inverse(gmm.means_[c, cidx1] - s[cidx1]),
-                                             self._scale[channel1].inverse(gmm.means_[c, cidx1] + s[cidx1]))
-            
-                    for cidx2, channel2 in enumerate(self.channels):
-                        g3 = tuple(list(g2) + [channel2])
-                        corr_stat[g3] = corr[cidx1, cidx2]
-                        
-                    corr_stat.drop(tuple(list(g2) + [channel1]), inplace = True)
-
         new_experiment = experiment.clone()
           
         if self.num_components > 1:
@@ -568,20 +520,40 @@ class GaussianMixtureOp(HasStrictTraits):
         if self.sigma > 0:
             for c in range(self.num_components):
                 gate_name = "{}_{}".format(self.name, c + 1)
-                new_experiment.add_condition(gate_name, "bool", event_gate[c])              
+                new_experiment.add_condition(gate_name, "bitset", event_gate[c])              
                 
         if self.posteriors:
             for c in range(self.num_components):
                 post_name = "{}_{}_posterior".format(self.name, c + 1)
                 new_experiment.add_condition(post_name, "double", event_posteriors[c])
                 
-        new_experiment.statistics[(self.name, "mean")] = pd.to_numeric(mean_stat)
-        new_experiment.statistics[(self.name, "sigma")] = sigma_stat
-        new_experiment.statistics[(self.name, "interval")] = interval_stat
-        if len(corr_stat) > 0:
-            new_experiment.statistics[(self.name, "correlation")] = pd.to_numeric(corr_stat)
+        # the statistics only depend on the fitted models, so don't compute
+        # them until (unless!) someone looks at them.  
+        by_values = [experiment[x].unique() for x in self.by]
+        groups = [g for g in groupby.groups if g in self._gmms]
+        stats = functools.lru_cache()(functools.partial(_gmm_statistics,
+                                                        self.name,
+                                                        list(self.by),
+                                                        by_values,
+                                                        list(self.channels),
+                                                        self.num_components,
+                                                        groups,
+                                                        dict(self._gmms),
+                                                        dict(self._scale)))
+        
+        stat_names = ["mean", "sigma", "interval"]
+        
+        # each group that had a model drops its diagonal correlations
+        num_corr = np.prod([len(v) for v in by_values]) * self.num_components * len(self.channels) ** 2
+        if num_corr > len(groups) * self.num_components * len(self.channels):
+            stat_names.append("correlation")
+            
         if self.num_components > 1:
-            new_experiment.statistics[(self.name, "proportion")] = pd.to_numeric(prop_stat)
+            stat_names.append("proportion")
+            
+        for stat_name in stat_names:
+            new_experiment.statistics.set_lazy((self.name, stat_name),
+                                               lambda stat_name = stat_name: stats()[stat_name])
 
         new_experiment.history.append(self.clone_traits(transient = lambda _: True))
         return new_experiment
@@ -638,6 +610,69 @@ class GaussianMixtureOp(HasStrictTraits):
             raise util.CytoflowViewError('channels',
                                          "Can't specify more than two channels for a default view")
 
+def _gmm_statistics(name, by, by_values, channels, num_components, groups, gmms, scale):
+    """Make :class:`GaussianMixtureOp`'s statistics from the fitted models."""
+
+    components = [x + 1 for x in range(num_components)]
+     
+    prop_idx = pd.MultiIndex.from_product(by_values + [components], 
+                                          names = by + ["Component"])
+    prop_stat = pd.Series(name = "{} : {}".format(name, "proportion"),
+                          index = prop_idx, 
+                          dtype = np.dtype(object)).sort_index()
+              
+    mean_idx = pd.MultiIndex.from_product(by_values + [components] + [channels], 
+                                          names = by + ["Component"] + ["Channel"])
+    mean_stat = pd.Series(name = "{} : {}".format(name, "mean"),
+                          index = mean_idx, 
+                          dtype = np.dtype(object)).sort_index()
+    sigma_stat = pd.Series(name = "{} : {}".format(name, "sigma"),
+                           index = mean_idx,
+                           dtype = np.dtype(object)).sort_index()
+    interval_stat = pd.Series(name = "{} : {}".format(name, "interval"),
+                              index = mean_idx, 
+                              dtype = np.dtype(object)).sort_index()
+
+    corr_idx = pd.MultiIndex.from_product(by_values + [components] + [channels] + [channels], 
+                                          names = by + ["Component"] + ["Channel_1"] + ["Channel_2"])
+    corr_stat = pd.Series(name = "{} : {}".format(name, "correlation"),
+                          index = corr_idx, 
+                          dtype = np.dtype(object)).sort_index()  
+    
+    for group in groups:
+        gmm = gmms[group]
+        for c in range(num_components):
+            if len(by) == 0:
+                g = tuple([c + 1])
+            elif hasattr(group, '__iter__') and not isinstance(group, (str, bytes)):
+                g = tuple(list(group) + [c + 1])
+            else:
+                g = tuple([group] + [c + 1])
+
+            prop_stat.at[g] = gmm.weights_[c]
+            
+            for cidx1, channel1 in enumerate(channels):
+                g2 = tuple(list(g) + [channel1])
+                mean_stat.at[g2] = scale[channel1].inverse(gmm.means_[c, cidx1])
+                
+                s, corr = util.cov2corr(gmm.covariances_[c])
+                sigma_stat[g2] = (scale[channel1].inverse(s[cidx1]))
+                interval_stat.at[g2] = (scale[channel1].inverse(gmm.means_[c, cidx1] - s[cidx1]),
+                                        scale[channel1].inverse(gmm.means_[c, cidx1] + s[cidx1]))
+        
+                for cidx2, channel2 in enumerate(channels):
+                    g3 = tuple(list(g2) + [channel2])
+                    corr_stat[g3] = corr[cidx1, cidx2]
+                    
+                corr_stat.drop(tuple(list(g2) + [channel1]), inplace = True)
+                
+    return {"mean" : pd.to_numeric(mean_stat),
+            "sigma" : sigma_stat,
+            "interval" : interval_stat,
+            "correlation" : pd.to_numeric(corr_stat),
+            "proportion" : pd.to_numeric(prop_stat)}
+
+
 @provides(IView)
 class GaussianMixture1DView(By1DView, AnnotatingView, HistogramView):
     """
@@ -655,6 +690,7 @@ class GaussianMixture1DView(By1DView, AnnotatingView, HistogramView):
     channel = Str
     scale = util.ScaleEnum
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the plots.
@@ -786,6 +822,7 @@ class GaussianMixture2DView(By2DView, AnnotatingView, ScatterplotView):
     ychannel = Str
     yscale = util.ScaleEnum
         
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the plots.
@@ -180,6 +180,7 @@ class GaussianMixture1DOp(HasStrictTraits):
     _gmms = Dict(Any, Instance(mixture.GaussianMixture), transient = True)
     _scale = Instance(util.IScale, transient = True)
     
+    @util.traced_method("estimate")
     def estimate(self, experiment, subset = None):
         """
         Estimate the Gaussian mixture model parameters.
@@ -245,6 +246,7 @@ class GaussianMixture1DOp(HasStrictTraits):
         gmms = {}
             
         for group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 raise util.CytoflowOpError(None, 
                                            "Group {} had no data".format(group))
@@ -278,6 +280,7 @@ class GaussianMixture1DOp(HasStrictTraits):
             
         self._gmms = gmms
     
+    @util.traced_method("apply")
     def apply(self, experiment):
         """
         Assigns new metadata to events using the mixture model estimated
@@ -388,6 +391,7 @@ class GaussianMixture1DOp(HasStrictTraits):
         # the faster it's going to be.
         
         for group, data_subset in groupby:
+            util.check_cancelled()
             
             # if there weren't any events in this group, there's no gmm
             if group not in self._gmms:
@@ -447,7 +451,7 @@ class GaussianMixture1DOp(HasStrictTraits):
         new_experiment = experiment.clone()
         
         if self.num_components == 1 and self.sigma > 0:
-            new_experiment.add_condition(self.name, "bool", event_assignments == "{0}_1".format(self.name))
+            new_experiment.add_condition(self.name, "bitset", event_assignments == "{0}_1".format(self.name))
         elif self.num_components > 1:
             new_experiment.add_condition(self.name, "category", event_assignments)
             
@@ -533,6 +537,7 @@ class GaussianMixture1DView(By1DView, AnnotatingView, HistogramView):
     id = Constant('edu.mit.synbio.cytoflow.view.gaussianmixture1dview')
     friendly_id = Constant("1D Gaussian Mixture Diagnostic Plot")
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the plots.
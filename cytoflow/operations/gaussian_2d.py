@@ -191,6 +191,7 @@ class GaussianMixture2DOp(HasStrictTraits):
     _xscale = Instance(util.IScale, transient = True)
     _yscale = Instance(util.IScale, transient = True)
     
+    @util.traced_method("estimate")
     def estimate(self, experiment, subset = None):
         """
         Estimate the Gaussian mixture model parameters.
@@ -262,6 +263,7 @@ class GaussianMixture2DOp(HasStrictTraits):
         gmms = {}
             
         for group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 raise util.CytoflowOpError(None,
                                            "Group {} had no data"
@@ -304,6 +306,7 @@ class GaussianMixture2DOp(HasStrictTraits):
             
         self._gmms = gmms
     
+    @util.traced_method("apply")
     def apply(self, experiment):
         """
         Assigns new metadata to events using the mixture model estimated
@@ -421,6 +424,7 @@ class GaussianMixture2DOp(HasStrictTraits):
             groupby = experiment.data.groupby(lambda _: True)
         
         for group, data_subset in groupby:
+            util.check_cancelled()
             if group not in self._gmms:
                 # there weren't any events in this group, so we didn't get
                 # a gmm.
@@ -510,7 +514,7 @@ class GaussianMixture2DOp(HasStrictTraits):
         new_experiment = experiment.clone()
         
         if self.num_components == 1 and self.sigma > 0:
-            new_experiment.add_condition(self.name, "bool", event_assignments == "{0}_1".format(self.name))
+            new_experiment.add_condition(self.name, "bitset", event_assignments == "{0}_1".format(self.name))
         elif self.num_components > 1:
             new_experiment.add_condition(self.name, "category", event_assignments)
             
@@ -604,6 +608,7 @@ class GaussianMixture2DView(By2DView, AnnotatingView, ScatterplotView):
     id = Constant('edu.mit.synbio.cytoflow.view.gaussianmixture2dview')
     friendly_id = Constant("2D Gaussian Mixture Diagnostic Plot")
         
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the plots.
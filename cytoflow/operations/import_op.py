@@ -225,6 +225,7 @@ class ImportOp(HasStrictTraits):
     # DON'T DO THIS
     ignore_v = List(Str)
       
+    @util.traced_method("apply")
     def apply(self, experiment = None, metadata_only = False):
         """
         Load a new :class:`.Experiment`.  
@@ -360,15 +361,19 @@ class ImportOp(HasStrictTraits):
                                 
         experiment.metadata['fcs_metadata'] = {}
         for tube in self.tubes:
+            util.check_cancelled()
             if metadata_only:
                 tube_meta, tube_data = parse_tube(tube.file,
                                                   experiment,
                                                   data_set = self.data_set,
                                                   metadata_only = True)
             else:
-                tube_meta, tube_data = parse_tube(tube.file, 
-                                                  experiment, 
-                                                  data_set = self.data_set)
+                with util.traced("import", tube.file) as t:
+                    tube_meta, tube_data = parse_tube(tube.file, 
+                                                      experiment, 
+                                                      data_set = self.data_set)
+                    if t:
+                        t.events = len(tube_data)
     
                 if self.events:
                     if self.events <= len(tube_data):
@@ -146,6 +146,7 @@ class KMeansOp(HasStrictTraits):
     _kmeans = Dict(Any, Instance(sklearn.cluster.MiniBatchKMeans), transient = True)
     _scale = Dict(Str, Instance(util.IScale), transient = True)
     
+    @util.traced_method("estimate")
     def estimate(self, experiment, subset = None):
         """
         Estimate the k-means clusters
@@ -222,6 +223,7 @@ class KMeansOp(HasStrictTraits):
                 self._scale[c] = util.scale_factory(util.get_default_scale(), experiment, channel = c)
                     
         for group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 raise util.CytoflowOpError('by',
                                            "Group {} had no data"
@@ -242,6 +244,7 @@ class KMeansOp(HasStrictTraits):
             kmeans.fit(x)
                                                  
          
+    @util.traced_method("apply")
     def apply(self, experiment):
         """
         Apply the KMeans clustering to the data.
@@ -326,6 +329,7 @@ class KMeansOp(HasStrictTraits):
         centers_stat = pd.Series(index = idx, dtype = np.dtype(object)).sort_index()
                      
         for group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 raise util.CytoflowOpError('by',
                                            "Group {} had no data"
@@ -449,6 +453,7 @@ class KMeans1DView(By1DView, AnnotatingView, HistogramView):
     channel = Str
     scale = util.ScaleEnum
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the plots.
@@ -516,6 +521,7 @@ class KMeans2DView(By2DView, AnnotatingView, ScatterplotView):
     xscale = util.ScaleEnum
     yscale = util.ScaleEnum
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the plots.
@@ -165,6 +165,7 @@ class PCAOp(HasStrictTraits):
     _pca = Dict(Any, Any, transient = True)
     _scale = Dict(Str, Instance(util.IScale), transient = True)
     
+    @util.traced_method("estimate")
     def estimate(self, experiment, subset = None):
         """
         Estimate the decomposition
@@ -243,6 +244,7 @@ class PCAOp(HasStrictTraits):
                 self._scale[c] = util.scale_factory(util.get_default_scale(), experiment, channel = c)
                     
         for group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 raise util.CytoflowOpError('by',
                                            "Group {} had no data"
@@ -264,6 +266,7 @@ class PCAOp(HasStrictTraits):
             pca.fit(x)
                                                  
          
+    @util.traced_method("apply")
     def apply(self, experiment):
         """
         Apply the PCA decomposition to the data.
@@ -339,6 +342,7 @@ class PCAOp(HasStrictTraits):
             new_channels.append(cname)            
                    
         for group, data_subset in groupby:
+            util.check_cancelled()
             if len(data_subset) == 0:
                 raise util.CytoflowOpError('by',
                                            "Group {} had no data"
@@ -34,8 +34,134 @@ import cytoflow.utility as util
 from cytoflow.views import ISelectionView, ScatterplotView
 
 from .i_operation import IOperation
+from .gate_chain import apply_gates, _CompiledGate
 from .base_op_views import Op2DView
 
+# the number of rows (and columns) in the grid a _PolygonIndex puts over
+# the polygon's bounding box
+_GRID_SIZE = 64
+
+# how close (in grid cells) an edge has to come to a cell to make it a
+# boundary cell -- covers the rounding in mapping the edges to the grid
+_GRID_EPS = 1e-6
+
+class _PolygonIndex(object):
+    """
+    Tests whether points are in a polygon, quickly, even if the polygon has 
+    lots of vertices (like the ones drawn free-hand with 
+    :class:`~.matplotlib_widgets.PolygonSelector`).
+    
+    Points outside the polygon's bounding box are outside the polygon.  The
+    bounding box is divided into a :data:`_GRID_SIZE` x :data:`_GRID_SIZE` 
+    grid, and each cell that an edge doesn't pass through is entirely inside
+    or entirely outside the polygon -- so only the points in the cells on
+    the polygon's boundary need the exact (and slow) test, 
+    :meth:`matplotlib.path.Path.contains_points`.
+    
+    Parameters
+    ----------
+    vertices : array_like
+        The polygon's vertices, shape ``(n, 2)``.
+    """
+    
+    # cell states
+    OUTSIDE, INSIDE, BOUNDARY = 0, 1, 2
+    
+    def __init__(self, vertices):
+        # use a matplotlib Path because testing for membership is a fast C fn.
+        self._path = mpl.path.Path(np.asarray(vertices, dtype = np.float64))
+        self._cells = None
+        
+        vertices = self._path.vertices
+        if not np.isfinite(vertices).all():
+            return
+        
+        self._lo = vertices.min(axis = 0)
+        self._hi = vertices.max(axis = 0)
+        if (self._hi <= self._lo).any():
+            # no area, so no grid
+            return
+        
+        self._scale = _GRID_SIZE / (self._hi - self._lo)
+        
+        # find the boundary cells.  for each edge, for each column of cells 
+        # it crosses, mark the rows that the piece of the edge in that column
+        # spans.
+        boundary = np.zeros((_GRID_SIZE, _GRID_SIZE), dtype = np.bool_)
+        uv = (vertices - self._lo) * self._scale
+        for (u0, v0), (u1, v1) in zip(uv, np.roll(uv, -1, axis = 0)):
+            umin, umax = min(u0, u1), max(u0, u1)
+            cols = np.arange(max(0, int(np.floor(umin - _GRID_EPS))),
+                             min(_GRID_SIZE - 1, int(np.floor(umax + _GRID_EPS))) + 1)
+            
+            if u1 == u0:
+                va = np.full(len(cols), v0)
+                vb = np.full(len(cols), v1)
+            else:
+                slope = (v1 - v0) / (u1 - u0)
+                va = v0 + (np.clip(cols, umin, umax) - u0) * slope
+                vb = v0 + (np.clip(cols + 1, umin, umax) - u0) * slope
+                
+            rows_lo = np.floor(np.minimum(va, vb) - _GRID_EPS).astype(np.intp)
+            rows_hi = np.floor(np.maximum(va, vb) + _GRID_EPS).astype(np.intp)
+            rows_lo = np.clip(rows_lo, 0, _GRID_SIZE - 1)
+            rows_hi = np.clip(rows_hi, 0, _GRID_SIZE - 1)
+            for col, row_lo, row_hi in zip(cols, rows_lo, rows_hi):
+                boundary[col, row_lo : row_hi + 1] = True
+                
+        # every other cell is inside the polygon if its center is
+        cells = np.full((_GRID_SIZE, _GRID_SIZE), self.BOUNDARY, dtype = np.int8)
+        cols, rows = np.nonzero(~boundary)
+        centers = np.column_stack((cols + 0.5, rows + 0.5)) / self._scale + self._lo
+        cells[cols, rows] = np.where(self._path.contains_points(centers),
+                                     self.INSIDE, 
+                                     self.OUTSIDE)
+        self._cells = cells
+        
+    def contains(self, x, y):
+        """
+        Which of the points ``(x, y)`` are inside the polygon?  The same as
+        :meth:`matplotlib.path.Path.contains_points`.
+        
+        Parameters
+        ----------
+        x, y : numpy.ndarray
+            The points' coordinates.
+            
+        Returns
+        -------
+        numpy.ndarray
+            An array of ``bool``, ``True`` if the point is inside the polygon.
+        """
+        
+        if self._cells is None:
+            return self._path.contains_points(np.column_stack((x, y)))
+        
+        x = np.asarray(x)
+        y = np.asarray(y)
+        ret = np.zeros(len(x), dtype = np.bool_)
+        
+        # NaNs fail the comparisons, so they're outside too
+        idx = np.flatnonzero((x >= self._lo[0]) & (x <= self._hi[0]) & 
+                             (y >= self._lo[1]) & (y <= self._hi[1]))
+        x = x[idx]
+        y = y[idx]
+        
+        cols = ((x - self._lo[0]) * self._scale[0]).astype(np.intp)
+        rows = ((y - self._lo[1]) * self._scale[1]).astype(np.intp)
+        np.minimum(cols, _GRID_SIZE - 1, out = cols)
+        np.minimum(rows, _GRID_SIZE - 1, out = rows)
+        state = self._cells[cols, rows]
+        
+        ret[idx[state == self.INSIDE]] = True
+        
+        on_boundary = state == self.BOUNDARY
+        ret[idx[on_boundary]] = \
+            self._path.contains_points(np.column_stack((x[on_boundary], 
+                                                        y[on_boundary])))
+        
+        return ret
+
 @provides(IOperation)
 class PolygonOp(HasStrictTraits):
     """
@@ -60,7 +186,10 @@ class PolygonOp(HasStrictTraits):
     Notes
     -----
     This module uses :meth:`matplotlib.path.Path` to represent the polygon, because
-    membership testing is very fast.
+    membership testing is very fast.  Events outside the polygon's bounding
+    box, or in a part of it well inside or well outside the polygon, don't
+    need the exact test at all, so even polygons with many vertices are 
+    quick to apply.
     
     You can set the verticies by hand, I suppose, but it's much easier to use
     the interactive view you get from :meth:`default_view` to do so.
@@ -151,6 +280,7 @@ class PolygonOp(HasStrictTraits):
     
     _selection_view = Instance('PolygonSelection', transient = True)
         
+    @util.traced_method("apply")
     def apply(self, experiment):
         """Applies the threshold to an experiment.
         
@@ -163,7 +293,7 @@ class PolygonOp(HasStrictTraits):
         -------
         Experiment
             a new :class:'Experiment`, the same as ``old_experiment`` but with 
-            a new column of type `bool` with the same as the operation name.  
+            a new ``bitset`` (boolean) column with the same as the operation name.  
             The bool is ``True`` if the event's measurement is within the 
             polygon, and ``False`` otherwise.
             
@@ -173,6 +303,14 @@ class PolygonOp(HasStrictTraits):
             if for some reason the operation can't be applied to this
             experiment. The reason is in :attr:`.CytoflowOpError.args`
         """
+
+        return apply_gates(experiment, [self])
+    
+    def _compile(self, experiment, scale):
+        """
+        Check the parameters against ``experiment`` and return the gate,
+        ready to evaluate (see :func:`.apply_gates`.)
+        """
         
         if experiment is None:
             raise util.CytoflowOpError('experiment',
@@ -211,7 +349,7 @@ class PolygonOp(HasStrictTraits):
                                        "Must have at least 3 vertices")
        
         if any([len(x) != 2 for x in self.vertices]):
-            return util.CytoflowOpError('vertices',
+            raise util.CytoflowOpError('vertices',
                                         "All vertices must be lists or tuples "
                                         "of length = 2") 
         
@@ -231,25 +369,17 @@ class PolygonOp(HasStrictTraits):
         # selected with an interactive plot, and that plot had scaled
         # axes, we need to apply that scale function to both the
         # vertices and the data before looking for path membership
-        xscale = util.scale_factory(self.xscale, experiment, channel = self.xchannel)
-        yscale = util.scale_factory(self.yscale, experiment, channel = self.ychannel)
+        xscale = scale(self.xscale, self.xchannel)
+        yscale = scale(self.yscale, self.ychannel)
         
         vertices = [(xscale(x), yscale(y)) for (x, y) in self.vertices]
-        data = experiment.data[[self.xchannel, self.ychannel]].copy()
-        data[self.xchannel] = xscale(data[self.xchannel])
-        data[self.ychannel] = yscale(data[self.ychannel])
             
-        # use a matplotlib Path because testing for membership is a fast C fn.
-        path = mpl.path.Path(np.array(vertices))
-        xy_data = data[[self.xchannel, self.ychannel]].values
-        
-        new_experiment = experiment.clone()        
-        new_experiment.add_condition(self.name, 
-                                     "bool", 
-                                     path.contains_points(xy_data))
-        new_experiment.history.append(self.clone_traits(transient = lambda _: True))
-            
-        return new_experiment
+        index = _PolygonIndex(vertices)
+        
+        return _CompiledGate(self.name,
+                             [(self.xchannel, self.xscale), 
+                              (self.ychannel, self.yscale)],
+                             index.contains)
     
     def default_view(self, **kwargs):
         self._selection_view = PolygonSelection(op = self)
@@ -292,6 +422,7 @@ class PolygonSelection(Op2DView, ScatterplotView):
     _widget = Instance(util.PolygonSelector, transient = True)
     _patch = Instance(mpl.patches.PathPatch, transient = True)
         
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the scatter plot, and then plot the selection on top of it.
@@ -29,12 +29,12 @@ import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 
 import numpy as np
-import pandas as pd
 
 import cytoflow.utility as util
 from cytoflow.views import ISelectionView, ScatterplotView
 
 from .i_operation import IOperation
+from .gate_chain import apply_gates, _CompiledGate
 from .base_op_views import Op2DView
 
 
@@ -145,6 +145,7 @@ class QuadOp(HasStrictTraits):
     
     _selection_view = Instance('QuadSelection', transient = True)
 
+    @util.traced_method("apply")
     def apply(self, experiment):
         """Applies the quad gate to an experiment.
         
@@ -163,6 +164,14 @@ class QuadOp(HasStrictTraits):
 
         """
 
+        return apply_gates(experiment, [self])
+    
+    def _compile(self, experiment, scale):
+        """
+        Check the parameters against ``experiment`` and return the gate,
+        ready to evaluate (see :func:`.apply_gates`.)
+        """
+
         # TODO - the naming scheme (name_1, name_2, etc) is semantically weak.  
         # Add some (generalizable??) way to rename these populations?  
         # It's an Enum; should be pretty easy.
@@ -208,36 +217,27 @@ class QuadOp(HasStrictTraits):
         if not self.ythreshold:
             raise util.CytoflowOpError('ythreshold', 'ythreshold must be set!')
 
-        gate = pd.Series([None] * len(experiment))
-        
-        # perhaps there's some more pythonic way to do this?
-        
         # these gate names match FACSDiva.  They are ARBITRARY.
-
-        # lower-left
-        ll = np.logical_and(experiment[self.xchannel] < self.xthreshold,
-                            experiment[self.ychannel] < self.ythreshold)
-        gate.loc[ll] = self.name + '_3'
+        categories = [self.name + '_1',    # upper-left
+                      self.name + '_2',    # upper-right
+                      self.name + '_3',    # lower-left
+                      self.name + '_4']    # lower-right
         
-        # upper-left
-        ul = np.logical_and(experiment[self.xchannel] < self.xthreshold,
-                            experiment[self.ychannel] > self.ythreshold)
-        gate.loc[ul] = self.name + '_1'
-
-        # upper-right
-        ur = np.logical_and(experiment[self.xchannel] > self.xthreshold,
-                            experiment[self.ychannel] > self.ythreshold)
-        gate.loc[ur] = self.name + '_2'
+        xthreshold, ythreshold = self.xthreshold, self.ythreshold
         
-        # lower-right
-        lr = np.logical_and(experiment[self.xchannel] > self.xthreshold,
-                            experiment[self.ychannel] < self.ythreshold)
-        gate.loc[lr] = self.name + '_4'
+        def quadrant(x, y):
+            # events right on a threshold aren't in any quadrant
+            codes = np.full(len(x), -1, dtype = np.int8)
+            codes[(x < xthreshold) & (y > ythreshold)] = 0
+            codes[(x > xthreshold) & (y > ythreshold)] = 1
+            codes[(x < xthreshold) & (y < ythreshold)] = 2
+            codes[(x > xthreshold) & (y < ythreshold)] = 3
+            return codes
 
-        new_experiment = experiment.clone()
-        new_experiment.add_condition(self.name, "category", gate)
-        new_experiment.history.append(self.clone_traits(transient = lambda t: True))
-        return new_experiment
+        return _CompiledGate(self.name,
+                             [(self.xchannel, None), (self.ychannel, None)],
+                             quadrant,
+                             categories = categories)
     
     def default_view(self, **kwargs):
         self._selection_view = QuadSelection(op = self)
@@ -290,6 +290,7 @@ class QuadSelection(Op2DView, ScatterplotView):
     _vline = Instance(Line2D, transient = True)
     _cursor = Instance(util.Cursor, transient = True)
         
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the underlying scatterplot and then plot the selection on top of it.
@@ -32,6 +32,7 @@ import cytoflow.utility as util
 from cytoflow.views import HistogramView, ISelectionView
 
 from .i_operation import IOperation
+from .gate_chain import apply_gates, _CompiledGate
 from .base_op_views import Op1DView
 
 @provides(IOperation)
@@ -125,6 +126,7 @@ class RangeOp(HasStrictTraits):
     
     _selection_view = Instance('RangeSelection', transient = True)
         
+    @util.traced_method("apply")
     def apply(self, experiment):
         """Applies the range gate to an experiment.
         
@@ -137,12 +139,20 @@ class RangeOp(HasStrictTraits):
         -------
         Experiment
             a new experiment, the same as old :class:`~Experiment` but with a new
-            column of type ``bool`` with the same as the operation name.  The 
+            ``bitset`` (boolean) column with the same as the operation name.  The 
             bool is ``True`` if the event's measurement in :attr:`channel` is 
             greater than :attr:`low` and less than :attr:`high`; it is ``False`` 
             otherwise.
         """
 
+        return apply_gates(experiment, [self])
+    
+    def _compile(self, experiment, scale):
+        """
+        Check the parameters against ``experiment`` and return the gate,
+        ready to evaluate (see :func:`.apply_gates`.)
+        """
+
         if experiment is None:
             raise util.CytoflowOpError('experiment', "No experiment specified")
         
@@ -183,12 +193,10 @@ class RangeOp(HasStrictTraits):
                                        "range low must be < {0}"
                                        .format(experiment[self.channel].max()))
         
-        gate = experiment[self.channel].between(self.low, self.high)
-        new_experiment = experiment.clone()
-        new_experiment.add_condition(self.name, "bool", gate)
-        new_experiment.history.append(self.clone_traits(transient = lambda _: True))
-            
-        return new_experiment
+        low, high = self.low, self.high
+        return _CompiledGate(self.name,
+                             [(self.channel, None)],
+                             lambda x: (x >= low) & (x <= high))
     
     def default_view(self, **kwargs):
         self._selection_view = RangeSelection(op = self)
@@ -244,6 +252,7 @@ class RangeSelection(Op1DView, HistogramView):
     _high_line = Instance(Line2D, transient = True)
     _hline = Instance(Line2D, transient = True)
             
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the underlying histogram and then plot the selection on top of it.
@@ -22,7 +22,6 @@ cytoflow.operations.range2d
 ---------------------------
 '''
 
-import pandas as pd
 
 from traits.api import HasStrictTraits, Float, Str, Bool, Instance, \
     provides, on_trait_change, Any, Constant
@@ -35,6 +34,7 @@ import cytoflow.utility as util
 from cytoflow.views import ScatterplotView, ISelectionView
 
 from .i_operation import IOperation
+from .gate_chain import apply_gates, _CompiledGate
 from .base_op_views import Op2DView
 
 @provides(IOperation)
@@ -151,6 +151,7 @@ class Range2DOp(HasStrictTraits):
     
     _selection_view = Instance('RangeSelection2D', transient = True)
 
+    @util.traced_method("apply")
     def apply(self, experiment):
         """Applies the threshold to an experiment.
         
@@ -163,13 +164,21 @@ class Range2DOp(HasStrictTraits):
         -------
         Experiment
             a new :class:`~Experiment`, the same as the old experiment but with 
-            a new column with a data type of ``bool`` and the same as the 
+            a new ``bitset`` (boolean) column with the same as the 
             operation :attr:`name`.  The bool is ``True`` if the event's 
             measurement in :attr:`xchannel` is greater than :attr:`xlow` and
             less than :attr:`high`, and the event's measurement in 
             :attr:`ychannel` is greater than :attr:`ylow` and less than 
             :attr:`yhigh`; it is ``False`` otherwise.
         """
+
+        return apply_gates(experiment, [self])
+    
+    def _compile(self, experiment, scale):
+        """
+        Check the parameters against ``experiment`` and return the gate,
+        ready to evaluate (see :func:`.apply_gates`.)
+        """
         
         if experiment is None:
             raise util.CytoflowOpError('experiment',
@@ -226,14 +235,11 @@ class Range2DOp(HasStrictTraits):
                                        "y channel range low must be < {0}"
                                        .format(experiment[self.ychannel].max()))
         
-        x = experiment[self.xchannel].between(self.xlow, self.xhigh)
-        y = experiment[self.ychannel].between(self.ylow, self.yhigh)
-        gate = pd.Series(x & y)
-        
-        new_experiment = experiment.clone() 
-        new_experiment.add_condition(self.name, "bool", gate)   
-        new_experiment.history.append(self.clone_traits(transient = lambda t: True))    
-        return new_experiment
+        xlow, xhigh, ylow, yhigh = self.xlow, self.xhigh, self.ylow, self.yhigh
+        return _CompiledGate(self.name,
+                             [(self.xchannel, None), (self.ychannel, None)],
+                             lambda x, y: (x >= xlow) & (x <= xhigh) & 
+                                          (y >= ylow) & (y <= yhigh))
     
     def default_view(self, **kwargs):
         self._selection_view = RangeSelection2D(op = self)
@@ -285,6 +291,7 @@ class RangeSelection2D(Op2DView, ScatterplotView):
     _selector = Instance(RectangleSelector, transient = True)
     _box = Instance(Rectangle, transient = True)
         
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the underlying scatterplot and then plot the selection on top of it.
@@ -61,6 +61,7 @@ class RatioOp(HasStrictTraits):
     numerator = Str
     denominator = Str
     
+    @util.traced_method("apply")
     def apply(self, experiment):
         """Applies the ratio operation to an experiment
         
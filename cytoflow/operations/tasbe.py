@@ -0,0 +1,282 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+cytoflow.operations.tasbe
+-------------------------
+
+Converting many FCS files with a calibrated TASBE pipeline.
+
+Once the autofluorescence, bleedthrough, bead calibration and (optionally)
+color translation operations have been estimated, :class:`TasbeTransform`
+keeps a copy of just the numbers they estimated, and applies them with the
+same routines the operations use.  Unlike the operations, it can be pickled, so :func:`convert_files` can send it to the worker processes
+in :mod:`cytoflow.utility.parallel` and convert the files in parallel, one
+file at a time per worker.
+"""
+
+from pathlib import Path
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+import cytoflow.utility as util
+import cytoflow.utility.parallel
+from cytoflow.views.export_fcs import ExportFCS
+
+from .import_op import Tube, ImportOp, parse_tube
+from .autofluorescence import _subtract_autofluorescence
+from .bleedthrough_linear import _bleedthrough_matrix, _correct_bleedthrough
+from .bead_calibration import _calibrate
+from .color_translation import _translate
+
+class TasbeTransform(object):
+    """
+    A frozen copy of a calibrated TASBE pipeline.
+
+    Parameters
+    ----------
+    af_op : AutofluorescenceOp
+        An estimated autofluorescence operation.
+
+    bleedthrough_op : BleedthroughLinearOp
+        An estimated linear bleedthrough operation.
+
+    bead_op : BeadCalibrationOp
+        An estimated bead calibration operation.
+
+    color_op : ColorTranslationOp (optional)
+        An estimated color translation operation.  If ``None``, don't
+        translate colors.
+    """
+
+    def __init__(self, af_op, bleedthrough_op, bead_op, color_op = None):
+
+        if not af_op._af_median:
+            raise util.CytoflowOpError(None, "Autofluorescence values aren't set. Did "
+                                       "you forget to run estimate()?")
+
+        self.af_median = dict(af_op._af_median)
+        self.af_stdev = dict(af_op._af_stdev)
+
+        if not bleedthrough_op.spillover:
+            raise util.CytoflowOpError(None,
+                                       "Spillover matrix isn't set. "
+                                       "Did you forget to run estimate()?")
+
+        self.spillover = dict(bleedthrough_op.spillover)
+        self.bleedthrough_channels, self.bleedthrough_matrix = \
+            _bleedthrough_matrix(self.spillover)
+
+        if not bead_op._calibration_functions:
+            raise util.CytoflowOpError(None,
+                                       "Calibration not found. "
+                                       "Did you forget to call estimate()?")
+
+        self.bead_units = dict(bead_op.units)
+        self.bead_functions = {c : bead_op._calibration_functions[c]
+                               for c in self.bead_units}
+
+        self.translation = {}
+        self.translation_functions = {}
+        if color_op is not None:
+            if not color_op._trans_fn:
+                raise util.CytoflowOpError(None, "Transfer functions aren't set. "
+                                           "Did you forget to call estimate()?")
+
+            self.translation = {x[0] : x[1] for x in color_op.controls.keys()}
+            self.translation_functions = {f : color_op._trans_fn[(f, t)]
+                                          for f, t in self.translation.items()}
+
+        # the operations' history entries (minus anything transient, like
+        # the functions above, when this is pickled.)
+        ops = [af_op, bleedthrough_op, bead_op] + ([color_op] if color_op is not None else [])
+        self.history = [op.clone_traits(transient = lambda _: True) for op in ops]
+
+    def apply(self, experiment):
+        """
+        Apply the pipeline to ``experiment`` -- the same as applying each
+        operation in turn, with fewer copies.  ``experiment`` is changed 
+        in place (by the autofluorescence correction), so pass a clone if 
+        you still need it.
+
+        Returns
+        -------
+        Experiment
+            A new experiment, with the same data, metadata and history as if
+            each operation had been applied in turn.
+        """
+
+        channels = set(self.af_median) | set(self.bleedthrough_channels) | \
+                   set(self.bead_functions) | set(self.translation)
+        for channel in channels:
+            if channel not in experiment.channels:
+                raise util.CytoflowOpError(None,
+                                           "Can't find channel {0} in experiment"
+                                           .format(channel))
+                
+        history = iter(self.history)
+
+        _subtract_autofluorescence(experiment, self.af_median, self.af_stdev)
+        experiment.history.append(next(history))
+
+        experiment = _correct_bleedthrough(experiment,
+                                           self.spillover,
+                                           self.bleedthrough_channels,
+                                           self.bleedthrough_matrix)
+        experiment.history.append(next(history))
+
+        _calibrate(experiment, self.bead_functions, self.bead_units)
+        experiment.history.append(next(history))
+
+        if self.translation:
+            _translate(experiment, self.translation, self.translation_functions)
+            experiment.history.append(next(history))
+
+        return experiment
+
+
+def convert_file(transform, filename, output_directory):
+    """
+    Import ``filename``, apply ``transform`` and write the result to a file
+    with the same name in ``output_directory``.  Only one file's events are
+    in memory at a time, and they're streamed back out to disk by
+    :func:`.write_fcs`.
+    """
+
+    tube = Tube(file = filename, conditions = {'filename' : Path(filename).stem})
+    experiment = ImportOp(tubes = [tube],
+                          conditions = {'filename' : 'category'}).apply()
+
+    experiment = transform.apply(experiment)
+
+    ExportFCS(path = output_directory,
+              by = ['filename'],
+              _include_by = False).export(experiment)
+
+def _convert_file(transform, filename, output_directory):
+    # return exceptions instead of raising them, so one bad file doesn't
+    # stop the others.
+    try:
+        convert_file(transform, filename, output_directory)
+        return filename, None
+    except Exception as e:
+        return filename, "{}: {}".format(e.__class__.__name__, e)
+
+def convert_files(transform, filenames, output_directory, progress = None):
+    """
+    Convert each file in ``filenames`` with :func:`convert_file`, using the
+    worker processes in :mod:`cytoflow.utility.parallel` if there is more
+    than one and the files have at least 
+    :const:`~cytoflow.utility.parallel.MIN_PARALLEL_EVENTS` events between
+    them.  If a file can't be converted, carry on with the others.
+
+    Parameters
+    ----------
+    transform : TasbeTransform
+        The pipeline to apply.
+
+    filenames : list of Str
+        The files to convert.
+
+    output_directory : Str
+        Where to write the converted files.
+
+    progress : Callable (optional)
+        Called as ``progress(done, total, filename)`` after each file is
+        converted (or fails), in the calling thread.
+
+    Returns
+    -------
+    dict
+        The files that couldn't be converted, mapped to the error.
+    """
+
+    filenames = list(filenames)
+    total = len(filenames)
+
+    # converting a few small files isn't worth starting the workers for
+    if (util.get_num_workers() < 2 
+        or total < 2
+        or _count_events(filenames) < cytoflow.utility.parallel.MIN_PARALLEL_EVENTS):
+        return _convert_serial(transform, filenames, output_directory, progress)
+
+    try:
+        executor = cytoflow.utility.parallel.get_executor()
+        if executor is None:
+            return _convert_serial(transform, filenames, output_directory, progress)
+    
+        futures = {executor.submit(_convert_file, transform, f, output_directory) : f
+                   for f in filenames}
+    except BrokenProcessPool:
+        # the pool was already broken.  make a new one next time.
+        cytoflow.utility.parallel._shutdown_executor()
+        return _convert_serial(transform, filenames, output_directory, progress)
+
+    failed = {}
+
+    try:
+        for done, future in enumerate(as_completed(futures)):
+            util.check_cancelled()
+            try:
+                filename, error = future.result()
+            except BrokenProcessPool as e:
+                # a worker died (out of memory?)  make a new pool next time.
+                cytoflow.utility.parallel._shutdown_executor()
+                filename, error = futures[future], "Worker process died: {}".format(e)
+
+            if error:
+                failed[filename] = error
+            if progress:
+                progress(done + 1, total, filename)
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+    return failed
+
+def _convert_serial(transform, filenames, output_directory, progress):
+    total = len(filenames)
+    failed = {}
+    
+    for done, filename in enumerate(filenames):
+        util.check_cancelled()
+        _, error = _convert_file(transform, filename, output_directory)
+        if error:
+            failed[filename] = error
+        if progress:
+            progress(done + 1, total, filename)
+
+    return failed
+
+def _count_events(filenames):
+    # the total number of events in the files, from their headers.  (files
+    # that can't be read are counted as empty; converting them will fail
+    # soon enough.)
+    events = 0
+    for filename in filenames:
+        try:
+            metadata, _ = parse_tube(filename, metadata_only = True)
+            events += int(metadata['$TOT'])
+        except Exception:
+            pass
+        
+    return events
@@ -25,8 +25,6 @@ cytoflow.operations.threshold
 from traits.api import (HasStrictTraits, Float, Str, Instance, 
                         Bool, on_trait_change, provides, Any, 
                         Constant)
-    
-import pandas as pd
 
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
@@ -35,6 +33,7 @@ import cytoflow.utility as util
 from cytoflow.views import ISelectionView, HistogramView
 
 from .i_operation import IOperation
+from .gate_chain import apply_gates, _CompiledGate
 from .base_op_views import Op1DView
 
 @provides(IOperation)
@@ -123,6 +122,7 @@ class ThresholdOp(HasStrictTraits):
     
     _selection_view = Instance('ThresholdSelection', transient = True)
         
+    @util.traced_method("apply")
     def apply(self, experiment):
         """Applies the threshold to an experiment.
         
@@ -135,12 +135,20 @@ class ThresholdOp(HasStrictTraits):
         -------
         Experiment
             a new :class:`~experiment`, the same as the old experiment but with 
-            a new column of type ``bool`` with the same name as the operation 
+            a new ``bitset`` (boolean) column with the same name as the operation 
             :attr:`name`.  The new condition is ``True`` if the event's 
             measurement in :attr:`channel` is greater than :attr:`threshold`;
             it is ``False`` otherwise.
         """
         
+        return apply_gates(experiment, [self])
+    
+    def _compile(self, experiment, scale):
+        """
+        Check the parameters against ``experiment`` and return the gate,
+        ready to evaluate (see :func:`.apply_gates`.)
+        """
+        
         if experiment is None:
             raise util.CytoflowOpError('experiment', "No experiment specified")
         
@@ -166,12 +174,10 @@ class ThresholdOp(HasStrictTraits):
                                        "{0} isn't a channel in the experiment"
                                        .format(self.channel))
 
-        gate = pd.Series(experiment[self.channel] > self.threshold)
-
-        new_experiment = experiment.clone()
-        new_experiment.add_condition(self.name, "bool", gate)
-        new_experiment.history.append(self.clone_traits(transient = lambda t: True))
-        return new_experiment
+        threshold = self.threshold
+        return _CompiledGate(self.name, 
+                             [(self.channel, None)], 
+                             lambda x: x > threshold)
     
     def default_view(self, **kwargs):
         self._selection_view = ThresholdSelection(op = self)
@@ -223,6 +229,7 @@ class ThresholdSelection(Op1DView, HistogramView):
     _line = Instance(Line2D, transient = True)
     _cursor = Instance(util.Cursor, transient = True)
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot the histogram and then plot the threshold on top of it.
@@ -103,6 +103,7 @@ class TransformStatisticOp(HasStrictTraits):
     by = List(Str)    
     fill = Any(0)
 
+    @util.traced_method("apply")
     def apply(self, experiment):
         """
         Applies :attr:`function` to a statistic.
@@ -206,6 +207,10 @@ class TransformStatisticOp(HasStrictTraits):
                                            "in this case, you must set 'by'"
                                            .format(self.function))
                 
+            # the function may have returned the statistic itself, which is
+            # shared with other experiments; rename a copy.
+            new_stat = new_stat.copy()
+                
         new_stat.name = "{} : {}".format(stat_name[0], stat_name[1])
                                                     
         matched_series = True
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest, functools
+
+import numpy as np
+import pandas as pd
+
+import cytoflow.utility as util
+from cytoflow.utility.algorithms import bootstrap
+
+class TestBootstrap(unittest.TestCase):
+    
+    def setUp(self):
+        rs = np.random.RandomState(1)
+        
+        # mostly positive, but a few negative values to exercise geom_mean
+        self.data = pd.Series(rs.normal(loc = 100, scale = 50, size = 500))
+        
+    def check_vectorized(self, func):
+        # wrapping func in a lambda forces the one-at-a-time loop
+        loop = bootstrap(self.data, func = lambda x: func(x), n_boot = 200, random_seed = 2)
+        vec = bootstrap(self.data, func = func, n_boot = 200, random_seed = 2)
+        np.testing.assert_allclose(loop, vec)
+        
+    def testMean(self):
+        self.check_vectorized(np.mean)
+        
+    def testMedian(self):
+        self.check_vectorized(np.median)
+        
+    def testGeomMean(self):
+        self.check_vectorized(util.geom_mean)
+        
+        self.data = self.data.abs()
+        self.check_vectorized(util.geom_mean)
+        
+    def testQuantile(self):
+        self.check_vectorized(functools.partial(np.percentile, q = 90))
+        self.check_vectorized(functools.partial(np.quantile, q = 0.1))
+        
+    def testChunks(self):
+        chunk_size = util.algorithms.BOOT_CHUNK_SIZE
+        try:
+            util.algorithms.BOOT_CHUNK_SIZE = 1000
+            self.check_vectorized(np.mean)
+        finally:
+            util.algorithms.BOOT_CHUNK_SIZE = chunk_size
+        
+    def testCallable(self):
+        boots = bootstrap(self.data, func = lambda x: np.max(x) - np.min(x), n_boot = 10)
+        self.assertEqual(len(boots), 10)
+        
+    def testCI(self):
+        low, high = util.ci(self.data, np.mean, boots = 100)
+        self.assertLess(low, self.data.mean())
+        self.assertGreater(high, self.data.mean())
+
+if __name__ == "__main__":
+    unittest.main()
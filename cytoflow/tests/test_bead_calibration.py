@@ -24,7 +24,15 @@ Created on Nov 15, 2015
 '''
 
 import unittest
+from unittest import mock
+
+import numpy as np
+import scipy.signal
+
 import cytoflow as flow
+from cytoflow.operations import bead_calibration
+from cytoflow.operations.bead_calibration import (_histograms, _find_peaks_cwt,
+                                                  _best_mef_subset)
 from test_base import ClosePlotsWhenDoneTest
 
 
@@ -74,6 +82,69 @@ class TestBeads(ClosePlotsWhenDoneTest):
         self.assertAlmostEqual(self.op._calibration_functions["PE-Tx-Red-YG-A"](100000),
                                898360.9384, delta = 100)
         
+    def testMultipleChannels(self):
+        # calibrating several channels at once is the same as calibrating 
+        # them one at a time
+        units = {"Pacific Blue-A" : "MEBFP",
+                 "FITC-A" : "MEFL",
+                 "PE-Tx-Red-YG-A" : "MEPTR"}
+        self.op.units = units
+        self.op.estimate(self.ex)
+        
+        for channel, unit in units.items():
+            op = flow.BeadCalibrationOp(units = {channel : unit},
+                                        beads_file = self.op.beads_file,
+                                        beads = self.op.beads)
+            op.estimate(self.ex)
+            
+            self.assertEqual(op._peaks[channel], self.op._peaks[channel])
+            self.assertEqual(list(op._mefs[channel]), list(self.op._mefs[channel]))
+            self.assertAlmostEqual(op._calibration_functions[channel](1000),
+                                   self.op._calibration_functions[channel](1000))
+            
+    def testPeakFinding(self):
+        # the vectorized steps give the same answers as numpy and scipy
+        channel = "PE-Tx-Red-YG-A"
+        (counts, bins), _, smooth = self.op._histograms[channel]
+        
+        rng = np.random.RandomState(0)
+        columns = [self.ex[channel].values, rng.lognormal(5, 2, 10000)]
+        expected = [np.histogram(c, bins = bins)[0] for c in columns]
+        np.testing.assert_array_equal(_histograms(columns, [bins, bins]), expected)
+        
+        widths = np.arange(3, 20)
+        smooth2 = scipy.signal.savgol_filter(expected[1], 5, 1)
+        peaks = _find_peaks_cwt(np.vstack((smooth, smooth2)), 
+                                widths = widths, 
+                                max_distances = widths / 2)
+        
+        # ... and so does the fallback, without scipy's private helpers
+        with mock.patch.object(bead_calibration, '_identify_ridge_lines', None):
+            fallback_peaks = _find_peaks_cwt(np.vstack((smooth, smooth2)), 
+                                             widths = widths, 
+                                             max_distances = widths / 2)
+            
+        for p, fp, h in zip(peaks, fallback_peaks, [smooth, smooth2]):
+            expected_peaks = scipy.signal.find_peaks_cwt(h, 
+                                                         widths = widths, 
+                                                         max_distances = widths / 2)
+            np.testing.assert_array_equal(p, expected_peaks)
+            np.testing.assert_array_equal(fp, expected_peaks)
+            
+        mef = self.op.beads["MEPTR"]
+        peaks = self.op._peaks[channel]
+        best_resid = np.inf
+        for start in range(len(mef) - len(peaks) + 1):
+            lr = np.polyfit(np.log10(peaks), np.log10(mef[start : start + len(peaks)]), 
+                            deg = 1, full = True)
+            if lr[1][0] < best_resid:
+                best_resid = lr[1][0]
+                best_mef, best_lr = mef[start : start + len(peaks)], lr[0]
+                
+        mef_subset, lr = _best_mef_subset(peaks, mef)
+        self.assertEqual(list(mef_subset), list(best_mef))
+        np.testing.assert_allclose(lr, best_lr)
+        
     def testApply(self):
         # this is just to make sure the code doesn't crash;
         # nothing about correctness.
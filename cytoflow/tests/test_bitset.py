@@ -0,0 +1,142 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Tests for the packed boolean conditions, cytoflow.utility.bitset
+'''
+
+import unittest, pickle
+
+import numpy as np
+import pandas as pd
+
+from cytoflow.utility.bitset import BitsetArray, BitsetDtype
+
+class TestBitset(unittest.TestCase):
+    
+    def setUp(self):
+        rs = np.random.RandomState(0)
+        
+        # not a multiple of 8, so there are padding bits
+        self.a = rs.rand(1003) > 0.5
+        self.b = rs.rand(1003) > 0.3
+        self.bits_a = BitsetArray._from_sequence(self.a)
+        self.bits_b = BitsetArray._from_sequence(self.b)
+        
+    def testRoundtrip(self):
+        self.assertEqual(len(self.bits_a), len(self.a))
+        self.assertEqual(self.bits_a.nbytes, 126)
+        np.testing.assert_array_equal(np.asarray(self.bits_a), self.a)
+        self.assertEqual(list(self.bits_a), self.a.tolist())
+        
+        self.assertIsInstance(self.bits_a[3], np.bool_)
+        self.assertEqual(self.bits_a[3], self.a[3])
+        self.assertEqual(self.bits_a[-1], self.a[-1])
+        
+        with self.assertRaises(ValueError):
+            BitsetArray._from_sequence([True, np.nan])
+        
+    def testLogical(self):
+        for result, expected in [(self.bits_a & self.bits_b, self.a & self.b),
+                                 (self.bits_a | self.bits_b, self.a | self.b),
+                                 (self.bits_a ^ self.bits_b, self.a ^ self.b),
+                                 (self.bits_a & self.b, self.a & self.b),
+                                 (~self.bits_a, ~self.a),
+                                 (self.bits_a == True, self.a),
+                                 (self.bits_a == False, ~self.a),
+                                 (self.bits_a != self.bits_b, self.a != self.b),
+                                 (self.bits_a | True, np.ones_like(self.a))]:
+            self.assertIsInstance(result, BitsetArray)
+            np.testing.assert_array_equal(np.asarray(result), expected)
+        
+        # the padding stays clear
+        self.assertEqual((~self.bits_a).sum(), (~self.a).sum())
+        self.assertEqual((self.bits_a | True).sum(), len(self.a))
+        
+    def testReductions(self):
+        self.assertEqual(self.bits_a.sum(), self.a.sum())
+        self.assertTrue(self.bits_a.any())
+        self.assertFalse(self.bits_a.all())
+        self.assertTrue((self.bits_a | True).all())
+        self.assertFalse((self.bits_a & False).any())
+        
+    def testTake(self):
+        for item in [slice(16, 100), 
+                     slice(3, 50), 
+                     slice(None, None, -3), 
+                     self.b, 
+                     [5, 0, 1002, -1]]:
+            np.testing.assert_array_equal(np.asarray(self.bits_a[item]), 
+                                          self.a[item])
+            
+        taken = self.bits_a.take([0, -1, 5], allow_fill = True)
+        np.testing.assert_array_equal(np.asarray(taken), [self.a[0], False, self.a[5]])
+            
+        with self.assertRaises(IndexError):
+            self.bits_a.take([1003])
+            
+    def testSetitem(self):
+        for key, value in [(5, True),
+                           (-1, False),
+                           (slice(10, 500, 7), False),
+                           (slice(None), self.b),
+                           (self.b, True),
+                           ([3, 900, 3], [True, True, False])]:
+            bits = self.bits_a.copy()
+            expected = self.a.copy()
+            bits[key] = value
+            expected[key] = value
+            np.testing.assert_array_equal(np.asarray(bits), expected)
+            self.assertEqual(bits.sum(), expected.sum())
+            
+        # the original wasn't changed
+        np.testing.assert_array_equal(np.asarray(self.bits_a), self.a)
+            
+        with self.assertRaises(IndexError):
+            self.bits_a.copy()[1003] = True
+            
+    def testConcat(self):
+        for x, y in [(self.a[:16], self.a[16:]), (self.a[:5], self.a[5:])]:
+            bits = BitsetArray._concat_same_type([BitsetArray._from_sequence(x),
+                                                  BitsetArray._from_sequence(y)])
+            np.testing.assert_array_equal(np.asarray(bits), self.a)
+            
+    def testSeries(self):
+        s = pd.Series(self.a).astype("bitset")
+        self.assertIsInstance(s.dtype, BitsetDtype)
+        self.assertEqual(s.sum(), self.a.sum())
+        
+        df = pd.DataFrame({"x" : np.arange(len(self.a)), "gate" : s})
+        pd.testing.assert_frame_equal(df[df["gate"]],
+                                      df[self.a])
+        self.assertEqual(df.groupby("gate").size()[True], self.a.sum())
+        
+        df2 = df.copy()
+        self.assertIsNot(df2["gate"].values._bits, df["gate"].values._bits)
+        
+        np.testing.assert_array_equal(s.astype(bool).values, self.a)
+        np.testing.assert_array_equal(s.to_numpy(), self.a)
+        
+    def testPickle(self):
+        bits = pickle.loads(pickle.dumps(self.bits_a))
+        np.testing.assert_array_equal(np.asarray(bits), self.a)
+
+if __name__ == "__main__":
+#     import sys;sys.argv = ['', 'TestBitset.testLogical']
+    unittest.main()
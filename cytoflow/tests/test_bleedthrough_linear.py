@@ -23,8 +23,13 @@ Created on Nov 16, 2015
 @author: brian
 '''
 import unittest
+from unittest import mock
+
+import numpy as np
 import pandas as pd
+
 import cytoflow as flow
+import cytoflow.operations.compensation
 from test_base import ClosePlotsWhenDoneTest
 
 
@@ -61,6 +66,20 @@ class TestBleedthroughLinear(ClosePlotsWhenDoneTest):
         with self.assertRaises(AssertionError):
             pd.testing.assert_frame_equal(self.ex.data, ex2.data)
             
+    def testApplyMatrix(self):
+        # compensating a chunk at a time is the same as doing it all at once
+        with mock.patch.object(cytoflow.operations.compensation, '_CHUNK_SIZE', 1000):
+            ex2 = self.op.apply(self.ex)
+        
+        channels = ex2.metadata['FITC-A']['bleedthrough_channels']
+        a = [[self.op.spillover[(y, x)] if x != y else 1.0 for x in channels]
+             for y in channels]
+        expected = np.dot(self.ex.data[channels].values, np.linalg.pinv(a))
+        
+        np.testing.assert_allclose(ex2.data[channels].values, expected)
+        self.assertEqual(list(ex2.data.columns), list(self.ex.data.columns))
+        pd.testing.assert_series_equal(ex2.data['Dox'], self.ex.data['Dox'])
+            
     def testApplyDoesntAlterOriginal(self):
         ex_data_copy = self.ex.data.copy(deep = True)
         self.op.apply(self.ex)
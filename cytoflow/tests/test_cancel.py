@@ -0,0 +1,91 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest, threading
+
+import cytoflow as flow
+import cytoflow.utility as util
+
+from test_base import ImportedDataSmallTest
+
+class TestCancel(unittest.TestCase):
+    
+    def testNotCancellable(self):
+        # outside of cancellable(), check_cancelled() does nothing
+        util.check_cancelled()
+        
+    def testCancel(self):
+        token = util.CancelToken()
+        with util.cancellable(token):
+            util.check_cancelled()
+            token.cancel()
+            with self.assertRaises(util.CytoflowCancelled):
+                util.check_cancelled()
+                
+        # the token is only checked inside cancellable()
+        util.check_cancelled()
+        
+    def testOtherThread(self):
+        # each thread has its own token
+        token = util.CancelToken()
+        token.cancel()
+        
+        errors = []
+        def check():
+            try:
+                util.check_cancelled()
+            except util.CytoflowCancelled as e:
+                errors.append(e)
+        
+        with util.cancellable(token):
+            t = threading.Thread(target = check)
+            t.start()
+            t.join()
+            
+        self.assertEqual(errors, [])
+        
+    def testParallelMap(self):
+        token = util.CancelToken()
+        token.cancel()
+        with util.cancellable(token):
+            with self.assertRaises(util.CytoflowCancelled):
+                util.parallel_map(abs, [(-1,), (-2,)])
+                
+                
+class TestCancelOp(ImportedDataSmallTest):
+    
+    def testCancelEstimate(self):
+        op = flow.GaussianMixtureOp(name = "Gauss",
+                                    channels = ["Y2-A"],
+                                    scale = {"Y2-A" : "logicle"},
+                                    by = ["Dox"],
+                                    num_components = 2)
+        
+        token = util.CancelToken()
+        token.cancel()
+        with util.cancellable(token):
+            with self.assertRaises(util.CytoflowCancelled):
+                op.estimate(self.ex)
+                
+        # and it's not an error: nothing was estimated
+        self.assertEqual(op._gmms, {})
+                
+                
+if __name__ == "__main__":
+    unittest.main()
@@ -23,7 +23,15 @@ Created on Nov 16, 2015
 @author: brian
 '''
 import unittest
+from unittest import mock
+
+import numpy as np
+import scipy.optimize
+
 import cytoflow as flow
+import cytoflow.utility as util
+import cytoflow.operations.color_translation
+from cytoflow.operations.color_translation import _fit_translation
 
 class Test(unittest.TestCase):
 
@@ -58,6 +66,63 @@ class Test(unittest.TestCase):
                                       ("Pacific Blue-A", "FITC-A") : {'Dox' : 1}}
         self.op.estimate(self.ex)
         
+    def test_no_pool(self):
+        # before Python 3.7, ProcessPoolExecutor doesn't take an mp_context,
+        # so there's no worker pool; the fits are done in this process.
+        coefficients = dict(self.op._coefficients)
+        
+        workers = util.get_num_workers()
+        util.set_num_workers(2)
+        try:
+            with mock.patch.object(util.parallel, '_executor', None), \
+                 mock.patch.object(util.parallel, 'MIN_PARALLEL_EVENTS', 0), \
+                 mock.patch.object(util.parallel, 'ProcessPoolExecutor', 
+                                   side_effect = TypeError):
+                self.op.estimate(self.ex)
+        finally:
+            util.set_num_workers(workers)
+            
+        for key, value in coefficients.items():
+            np.testing.assert_allclose(self.op._coefficients[key], value)
+        
+    def test_fit(self):
+        rng = np.random.RandomState(0)
+        log_from = np.concatenate((rng.normal(1.5, 0.3, 5000),
+                                   rng.normal(3.5, 0.5, 15000)))
+        log_to = 0.9 * log_from + 0.3 + rng.normal(0, 0.1, len(log_from))
+        
+        # the closed form is the same as the least-squares fit
+        for linear_model in [False, True]:
+            coefficients, means = _fit_translation(log_from, log_to, 
+                                                   mixture_model = False, 
+                                                   linear_model = linear_model)
+            self.assertIsNone(means)
+            
+            if linear_model:
+                f = lambda x: log_to - x[0] * log_from
+                x0 = [1]
+            else:
+                f = lambda x: log_to - x[0] * log_from - x[1]
+                x0 = [1, 0]
+            np.testing.assert_allclose(coefficients, 
+                                       scipy.optimize.least_squares(f, x0).x,
+                                       rtol = 1e-5)
+            
+        # fitting the mixture model to a subsample gives nearly the same answer
+        coefficients, means = _fit_translation(log_from, log_to, 
+                                               mixture_model = True, 
+                                               linear_model = False)
+        np.testing.assert_allclose(coefficients, [0.9, 0.3], atol = 0.05)
+        
+        with mock.patch.object(cytoflow.operations.color_translation, 
+                               '_MIXTURE_SAMPLE_SIZE', 2000):
+            sub_coefficients, sub_means = _fit_translation(log_from, log_to, 
+                                                           mixture_model = True, 
+                                                           linear_model = False)
+        np.testing.assert_allclose(sub_coefficients, coefficients, atol = 0.01)
+        np.testing.assert_allclose(np.log10(sorted(sub_means)), 
+                                   np.log10(sorted(means)), 
+                                   atol = 0.05)
         
 
 if __name__ == "__main__":
@@ -24,8 +24,12 @@ Created on Dec 1, 2015
 '''
 import unittest
 import os
+import pickle
+import tempfile
 import cytoflow as flow
+import cytoflow.utility as util
 import pandas as pd
+import numpy as np
 from test_base import ImportedDataSmallTest
 
 
@@ -37,11 +41,194 @@ class TestExperiment(ImportedDataSmallTest):
     def testAddChannel(self):
         # TODO
         pass
+    
+    def testCachedConditions(self):
+        self.assertEqual(list(self.ex.conditions["Dox"]), [1.0, 10.0])
+        
+        # the cached values can't be changed from outside
+        self.ex.conditions["Dox"].iloc[0] = 5.0
+        self.assertEqual(list(self.ex.conditions["Dox"]), [1.0, 10.0])
+        
+        self.ex["Dox"] = self.ex["Dox"] * 2
+        self.assertEqual(list(self.ex.conditions["Dox"]), [2.0, 20.0])
+        
+        self.ex.add_condition("Big", "bool", self.ex["B1-A"] > 1000)
+        self.assertIn("Big", self.ex.conditions)
+        
+        self.assertNotIn("B1-A_half", self.ex.channels)
+        self.ex.add_channel("B1-A_half", self.ex["B1-A"] / 2)
+        self.assertIn("B1-A_half", self.ex.channels)
         
     def testAddCondition(self):
         # TODO
         pass
     
+    def testSubset(self):
+        sub = self.ex.subset(["Dox", "Well"], (10.0, 'A'))
+        expected = self.ex.data[(self.ex.data["Dox"] == 10.0) & (self.ex.data["Well"] == 'A')]
+        pd.testing.assert_frame_equal(sub.data, expected.reset_index(drop = True))
+        
+        with self.assertRaises(util.CytoflowError):
+            self.ex.subset("Dox", 5.0)
+            
+        with self.assertRaises(util.CytoflowError):
+            self.ex.subset("B1-A", 5.0)
+            
+    def testQuery(self):
+        for expr in ["Dox == 10.0",
+                     "Dox == 1 and Well == 'B'",
+                     "Well in ['A', 'C'] & Dox == [1.0, 10.0]",
+                     "Dox == 10 and B1_A > 100"]:
+            # Experiment.query() names channels by their sanitized names
+            expected = self.ex.data.query(expr.replace("B1_A", "`B1-A`")).reset_index(drop = True)
+            pd.testing.assert_frame_equal(self.ex.query(expr).data, expected)
+            
+        with self.assertRaises(util.CytoflowError):
+            self.ex.query("Dox == 5.0")
+            
+    def testBitsetQuery(self):
+        ex = flow.ThresholdOp(name = "T", channel = "Y2-A", threshold = 500).apply(self.ex)
+        ex = flow.ThresholdOp(name = "U", channel = "B1-A", threshold = 100).apply(ex)
+        self.assertIsInstance(ex["T"].dtype, util.BitsetDtype)
+        self.assertEqual(list(ex.conditions["T"]), [False, True])
+        
+        data = ex.data.astype({"T" : "bool", "U" : "bool"})
+        for expr in ["T",
+                     "T == True",
+                     "not T",
+                     "T and U",
+                     "T | ~U",
+                     "False == U",
+                     "T != True and Dox == 10.0",
+                     "T and B1_A > 100"]:
+            expected = data.query(expr.replace("B1_A", "`B1-A`")).reset_index(drop = True)
+            result = ex.query(expr).data.astype({"T" : "bool", "U" : "bool"})
+            pd.testing.assert_frame_equal(result, expected)
+            
+        self.assertEqual(len(ex.query("T ^ U")), 
+                         (data["T"] ^ data["U"]).sum())
+        
+        sub = ex.subset("T", True)
+        pd.testing.assert_frame_equal(sub.data.astype({"T" : "bool", "U" : "bool"}),
+                                      data[data["T"]].reset_index(drop = True))
+            
+    def testIndexInvalidated(self):
+        self.assertEqual(len(self.ex.subset("Dox", 10.0)), len(self.ex) / 2)
+        
+        self.ex["Dox"] = self.ex["Dox"].replace({10.0 : 20.0})
+        with self.assertRaises(util.CytoflowError):
+            self.ex.subset("Dox", 10.0)
+        self.assertEqual(len(self.ex.subset("Dox", 20.0)), len(self.ex) / 2)
+        
+        # changes made directly to the data frame
+        self.ex.data = self.ex.data.iloc[0:10]
+        self.assertEqual(len(self.ex.query("Dox == 20.0")), 10)
+        
+    def testStatistics(self):
+        stat = pd.Series([1.0, 2.0], index = pd.Index([1.0, 10.0], name = 'Dox'))
+        self.ex.statistics[("Test", "stat")] = stat
+        self.assertIn(("Test", "stat"), self.ex.statistics)
+        self.assertEqual(list(self.ex.statistics.keys()), [("Test", "stat")])
+        
+        # statistics are read-only
+        with self.assertRaises(ValueError):
+            self.ex.statistics[("Test", "stat")].iloc[0] = 5.0
+            
+        # ... but the series they were made from isn't
+        stat.iloc[0] = 5.0
+        self.assertEqual(self.ex.statistics[("Test", "stat")].iloc[0], 1.0)
+            
+        with self.assertRaises(util.CytoflowError):
+            self.ex.statistics["Test"] = stat
+            
+        with self.assertRaises(util.CytoflowError):
+            self.ex.statistics[("Test", "stat2")] = [1.0, 2.0]
+    
+    def testLazyStatistics(self):
+        calls = []
+        def make_stat():
+            calls.append(True)
+            return pd.Series([1.0, 2.0], index = pd.Index([1.0, 10.0], name = 'Dox'))
+        
+        self.ex.statistics.set_lazy(("Test", "lazy"), make_stat)
+        ex2 = self.ex.clone()
+        
+        self.assertIn(("Test", "lazy"), ex2.statistics)
+        self.assertFalse(ex2.statistics.is_computed(("Test", "lazy")))
+        self.assertEqual(len(calls), 0)
+        
+        # nor by assigning a copy (which traits compares to the old one, 
+        # if anyone is listening)
+        ex2.on_trait_change(lambda: None, 'statistics')
+        ex2.statistics = ex2.statistics.copy()
+        self.assertFalse(ex2.statistics.is_computed(("Test", "lazy")))
+        self.assertEqual(len(calls), 0)
+        
+        # computed once, and shared between clones
+        self.assertEqual(ex2.statistics[("Test", "lazy")].iloc[1], 2.0)
+        self.assertTrue(self.ex.statistics.is_computed(("Test", "lazy")))
+        self.assertIs(self.ex.statistics[("Test", "lazy")],
+                      ex2.statistics[("Test", "lazy")])
+        self.assertEqual(len(calls), 1)
+        
+        # but adding a statistic to a clone doesn't change the original
+        ex2.statistics[("Test", "eager")] = make_stat()
+        self.assertNotIn(("Test", "eager"), self.ex.statistics)
+        
+    def testPickleStatistics(self):
+        self.ex.statistics.set_lazy(("Test", "lazy"), 
+                                    lambda: pd.Series([1.0], index = pd.Index([1.0], name = 'Dox')))
+        stats = pickle.loads(pickle.dumps(self.ex.statistics))
+        self.assertEqual(stats[("Test", "lazy")].iloc[0], 1.0)
+
+    def testSaveLoad(self):
+        ex = flow.ThresholdOp(name = "T", channel = "Y2-A", threshold = 500).apply(self.ex)
+        ex.add_condition("Label", "str", pd.Series("x", index = ex.data.index))
+        ex.add_condition("Count", "int", pd.Series(range(len(ex)), index = ex.data.index))
+        ex.statistics.set_lazy(("Test", "lazy"),
+                               lambda: pd.Series([1.0], index = pd.Index([1.0], name = 'Dox')))
+        ex.metadata["Y2-A"]["fn"] = lambda x: x   # doesn't pickle
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "ex")
+            with self.assertWarns(util.CytoflowWarning):
+                ex.save(path)
+
+            for mmap in [True, False]:
+                ex2 = flow.Experiment.load(path, mmap = mmap)
+                pd.testing.assert_frame_equal(ex.data, ex2.data)
+                self.assertEqual(ex2.conditions.keys(), ex.conditions.keys())
+                self.assertEqual(ex2.channels, ex.channels)
+                self.assertEqual(ex2.statistics[("Test", "lazy")].iloc[0], 1.0)
+                self.assertEqual(len(ex2.history), 1)
+                self.assertNotIn("fn", ex2.metadata["Y2-A"])
+                self.assertEqual(ex2.metadata["Y2-A"]["range"],
+                                 ex.metadata["Y2-A"]["range"])
+
+            # the columns are still memory-mapped once they're loaded
+            ex2 = flow.Experiment.load(path)
+            for channel in ex2.channels:
+                values = ex2.data[channel].values
+                while values is not None and not isinstance(values, np.memmap):
+                    values = values.base
+                self.assertIsInstance(values, np.memmap)
+                
+            # memory-mapped columns are copy-on-write
+            ex2.data["Y2-A"] += 1.0
+            pd.testing.assert_series_equal(flow.Experiment.load(path)["Y2-A"],
+                                           ex["Y2-A"])
+
+            # a new save replaces the old one
+            ex.data = ex.data.iloc[0:10]
+            with self.assertWarns(util.CytoflowWarning):
+                ex.save(path)
+            self.assertEqual(len(flow.Experiment.load(path)), 10)
+
+            with self.assertRaises(util.CytoflowError):
+                ex.save(d)
+            with self.assertRaises(util.CytoflowError):
+                flow.Experiment.load(d)
+
 #     def testCloneIsShallow(self):
 #         ex2 = self.ex.clone()
 #         self.assertNotEqual(self.ex['B1-A'].at[100], 100.0)
@@ -24,6 +24,7 @@ Created on Dec 1, 2015
 '''
 import unittest, os, tempfile, shutil, pathlib
 import cytoflow as flow
+import cytoflow.utility as util
 from test_base import ImportedDataSmallTest
 
 
@@ -78,6 +79,38 @@ class Test(ImportedDataSmallTest):
                               
         self.assertNotIn('voltage', ex_rt.metadata['PE-Tx-Red-YG-A'])             
 
+
+    def testParallel(self):
+        workers = util.get_num_workers()
+        util.set_num_workers(2)
+        try:
+            done = []
+            flow.ExportFCS(path = self.directory,
+                           by = ['Dox', 'Well'],
+                           parallel = True).export(self.ex, 
+                                                   progress = lambda *x: done.append(x))
+        finally:
+            util.set_num_workers(workers)
+            
+        files = sorted(x[2] for x in done)
+        self.assertEqual(files, sorted(flow.ExportFCS(by = ['Dox', 'Well']).enum_files(self.ex)))
+        self.assertEqual([x[0] for x in done], list(range(1, len(files) + 1)))
+        self.assertTrue(all(x[1] == len(files) for x in done))
+        
+        tubes = []
+        for dox, well in self.ex.data.groupby(['Dox', 'Well'], observed = True).groups:
+            tubes.append(flow.Tube(file = self.directory / 'Dox_{}_Well_{}.fcs'.format(dox, well),
+                                   conditions = {"Dox" : dox, "Well" : well}))
+        
+        ex_rt = flow.ImportOp(conditions = {"Dox" : "float", "Well": "category"},
+                              tubes = tubes).apply()
+        
+        self.assertEqual(len(ex_rt), len(self.ex))
+        for channel in self.ex.channels:
+            self.assertAlmostEqual(ex_rt[channel].sum(), self.ex[channel].sum(), 
+                                   delta = abs(self.ex[channel].sum()) * 1e-6)
+
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Tests for cytoflow.utility.fcswrite
+'''
+
+import unittest, tempfile, shutil, os
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import fcsparser
+
+import cytoflow.utility as util
+import cytoflow.utility.fcswrite
+
+class TestWriteFCS(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "test.fcs")
+
+        rng = np.random.RandomState(0)
+        self.data = pd.DataFrame({"FSC-A" : rng.uniform(0, 1000, 1000),
+                                  "B1-A" : rng.normal(100, 20, 1000),
+                                  "V2-A" : rng.uniform(0, 1, 1000)})
+        self.ranges = {c : 1024 for c in self.data.columns}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, dtype = 'float32'):
+        return fcsparser.parse(self.filename, reformat_meta = True, dtype = dtype)
+
+    def testRoundtrip(self):
+        util.write_fcs(self.filename,
+                       list(self.data.columns),
+                       self.ranges,
+                       self.data.values,
+                       compat_chn_names = False,
+                       compat_percent = False,
+                       CF_TEST = "foo")
+
+        meta, data = self.read()
+        self.assertEqual(list(data.columns), list(self.data.columns))
+        np.testing.assert_array_equal(data.values,
+                                      self.data.values.astype(np.float32))
+        self.assertEqual(meta['$DATATYPE'], 'F')
+        self.assertEqual(meta["CF_TEST"], "foo")
+
+    def testChunks(self):
+        util.write_fcs(self.filename,
+                       list(self.data.columns),
+                       self.ranges,
+                       self.data,
+                       compat_chn_names = False,
+                       compat_percent = False,
+                       chunk_size = 300)
+
+        _, data = self.read()
+        np.testing.assert_array_equal(data.values,
+                                      self.data.values.astype(np.float32))
+
+    def testRows(self):
+        rows = np.arange(0, 1000, 3)
+        util.write_fcs(self.filename,
+                       list(self.data.columns),
+                       self.ranges,
+                       [self.data[c].values for c in self.data.columns],
+                       compat_chn_names = False,
+                       compat_percent = False,
+                       chunk_size = 100,
+                       rows = rows)
+
+        meta, data = self.read()
+        self.assertEqual(int(meta['$TOT']), len(rows))
+        np.testing.assert_array_equal(data.values,
+                                      self.data.values[rows].astype(np.float32))
+
+    def testDouble(self):
+        util.write_fcs(self.filename,
+                       list(self.data.columns),
+                       self.ranges,
+                       self.data,
+                       compat_chn_names = False,
+                       compat_percent = False,
+                       double = True,
+                       version = "3.1")
+
+        # fcsparser casts to float32 unless it's told not to
+        meta, data = self.read(dtype = None)
+        np.testing.assert_array_equal(data.values, self.data.values)
+        self.assertEqual(meta['$DATATYPE'], 'D')
+        self.assertEqual(meta['__header__']['FCS format'], b'FCS3.1')
+
+    def testLargeOffsets(self):
+        # pretend the file is too big for the HEADER offsets
+        with mock.patch.object(cytoflow.utility.fcswrite, '_MAX_HEADER_OFFSET', 1000):
+            util.write_fcs(self.filename,
+                           list(self.data.columns),
+                           self.ranges,
+                           self.data,
+                           compat_chn_names = False,
+                           compat_percent = False)
+
+        meta, data = self.read()
+        self.assertEqual(meta['__header__']['data start'], 0)
+        np.testing.assert_array_equal(data.values,
+                                      self.data.values.astype(np.float32))
+
+    def testCompat(self):
+        names = ["FSC A", "B1-A", "V2-A"]
+        ranges = {n : 1024 for n in names}
+        data = self.data.copy()
+        data["B1-A"] *= -1
+        orig = data.copy()
+
+        util.write_fcs(self.filename, names, ranges, data)
+
+        _, data_rt = self.read()
+        self.assertEqual(list(data_rt.columns), ["FSCA", "B1-A", "V2-A"])
+        np.testing.assert_allclose(data_rt["B1-A"], -orig["B1-A"], rtol = 1e-6)
+        np.testing.assert_allclose(data_rt["V2-A"], orig["V2-A"] * 100, rtol = 1e-6)
+
+        # the input isn't changed
+        pd.testing.assert_frame_equal(data, orig)
+        self.assertEqual(names, ["FSC A", "B1-A", "V2-A"])
+
+
+if __name__ == "__main__":
+#     import sys;sys.argv = ['', 'TestWriteFCS.testRoundtrip']
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Tests for applying several gates at once, cytoflow.operations.gate_chain
+'''
+
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import cytoflow as flow
+import cytoflow.utility as util
+import cytoflow.operations.gate_chain
+from test_base import ImportedDataSmallTest
+
+
+class TestGateChain(ImportedDataSmallTest):
+    
+    def setUp(self):
+        super().setUp()
+        self.gates = [flow.ThresholdOp(name = "T",
+                                       channel = "Y2-A",
+                                       threshold = 500),
+                      flow.RangeOp(name = "R",
+                                   channel = "V2-A",
+                                   low = 100,
+                                   high = 1000),
+                      flow.Range2DOp(name = "R2",
+                                     xchannel = "V2-A",
+                                     xlow = 10,
+                                     xhigh = 1000,
+                                     ychannel = "Y2-A",
+                                     ylow = 1000,
+                                     yhigh = 20000),
+                      flow.QuadOp(name = "Quad",
+                                  xchannel = "V2-A",
+                                  ychannel = "Y2-A",
+                                  xthreshold = 216,
+                                  ythreshold = 2144),
+                      flow.PolygonOp(name = "Polygon",
+                                     xchannel = "V2-A",
+                                     ychannel = "Y2-A",
+                                     xscale = "logicle",
+                                     yscale = "logicle",
+                                     vertices = [(-95.86, 12436.45),
+                                                 (116.29, 22530.75),
+                                                 (767.63, 4873.08),
+                                                 (101.64, 939.38),
+                                                 (-266.93, 2914.59)])]
+        
+    def testApply(self):
+        ex = flow.GateChainOp(gates = self.gates).apply(self.ex)
+        
+        # the same as applying the gates one at a time
+        ex2 = self.ex
+        for gate in self.gates:
+            ex2 = gate.apply(ex2)
+            
+        pd.testing.assert_frame_equal(ex.data, ex2.data)
+        self.assertEqual(len(ex.history), len(ex2.history))
+        self.assertEqual(len(self.ex.history) + len(self.gates), len(ex.history))
+        
+        y2 = self.ex["Y2-A"]
+        v2 = self.ex["V2-A"]
+        np.testing.assert_array_equal(ex["T"].to_numpy(), (y2 > 500).values)
+        np.testing.assert_array_equal(ex["R"].to_numpy(), v2.between(100, 1000).values)
+        np.testing.assert_array_equal(ex["R2"].to_numpy(),
+                                      (v2.between(10, 1000) & y2.between(1000, 20000)).values)
+        self.assertEqual(ex.data.groupby("Quad").size().loc["Quad_2"], 1132)
+        
+    def testChunks(self):
+        ex = flow.GateChainOp(gates = self.gates).apply(self.ex)
+        
+        with mock.patch.object(cytoflow.operations.gate_chain, '_CHUNK_SIZE', 64):
+            ex2 = flow.GateChainOp(gates = self.gates).apply(self.ex)
+            
+        pd.testing.assert_frame_equal(ex.data, ex2.data)
+        
+    def testBadGates(self):
+        with self.assertRaises(util.CytoflowOpError):
+            flow.GateChainOp(gates = [self.gates[0], self.gates[0]]).apply(self.ex)
+            
+        with self.assertRaises(util.CytoflowOpError):
+            flow.GateChainOp(gates = [flow.RatioOp(name = "Ratio",
+                                                   numerator = "V2-A",
+                                                   denominator = "Y2-A")]).apply(self.ex)
+            
+        with self.assertRaises(util.CytoflowOpError):
+            flow.GateChainOp().apply(self.ex)
+
+if __name__ == "__main__":
+#     import sys;sys.argv = ['', 'TestGateChain.testApply']
+    unittest.main()
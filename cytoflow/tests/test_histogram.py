@@ -24,7 +24,11 @@ Created on Mar 5, 2018
 '''
 
 import unittest
+import matplotlib.pyplot as plt
+import numpy as np
+
 import cytoflow as flow
+import cytoflow.utility as util
 
 from test_base import View1DTestBase  # @UnresolvedImport
 
@@ -57,6 +61,30 @@ class TestHistogram(View1DTestBase, unittest.TestCase):
     def testNormed(self):
         self.view.huefacet = "Dox"
         self.view.plot(self.ex, histtype = 'step', density = True)
+        
+    def testParallel(self):
+        self.view.xfacet = "Dox"
+        self.view.huefacet = "Well"
+        
+        self.view.plot(self.ex)
+        serial = [p.get_path().vertices for ax in plt.gcf().axes for p in ax.patches]
+        plt.close('all')
+        
+        min_events = util.parallel.MIN_PARALLEL_EVENTS
+        num_workers = util.get_num_workers()
+        try:
+            util.parallel.MIN_PARALLEL_EVENTS = 0
+            util.set_num_workers(2)
+            self.view.plot(self.ex)
+        finally:
+            util.parallel.MIN_PARALLEL_EVENTS = min_events
+            util.set_num_workers(num_workers)
+            
+        parallel = [p.get_path().vertices for ax in plt.gcf().axes for p in ax.patches]
+        
+        self.assertEqual(len(serial), len(parallel))
+        for s, p in zip(serial, parallel):
+            np.testing.assert_array_equal(s, p)
 
         
 if __name__ == "__main__":
@@ -24,6 +24,10 @@ Created on Mar 5, 2018
 '''
 
 import unittest
+
+import numpy as np
+import seaborn as sns
+
 import cytoflow as flow
 
 from test_base import View1DTestBase  # @UnresolvedImport
@@ -67,6 +71,16 @@ class TestKde1D(View1DTestBase, unittest.TestCase):
         for bw in ['scott', 'silverman', 1.0, 0.1, 0.01]:
             self.view.plot(self.ex, bw = bw)
 
+    def testDropna(self):
+        self.ex.data.loc[0:9, "B1-A"] = np.nan
+        grid = sns.FacetGrid(self.ex.data)
+        
+        lengths = self.view._grid_compute(grid, len, "B1-A")
+        self.assertEqual(lengths, [len(self.ex) - 10])
+        
+        lengths = self.view._grid_compute(grid, len, "B1-A", dropna = False)
+        self.assertEqual(lengths, [len(self.ex)])
+
         
 if __name__ == "__main__":
 #     import sys;sys.argv = ['', 'Test.testName']
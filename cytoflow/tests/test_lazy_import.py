@@ -0,0 +1,101 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest, subprocess, sys, os, json
+
+import cytoflow as flow
+import cytoflow.utility as util
+
+# the packages that make importing all of cytoflow slow
+HEAVY = ["matplotlib", "seaborn", "scipy", "sklearn", "statsmodels", "fcsparser"]
+
+def run_python(code):
+    """Run ``code`` in a new python and return what it prints, parsed as JSON"""
+    
+    root = os.path.dirname(os.path.dirname(os.path.abspath(flow.__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([root, env.get("PYTHONPATH", "")])
+    
+    out = subprocess.run([sys.executable, "-c", code],
+                         stdout = subprocess.PIPE,
+                         env = env,
+                         check = True).stdout
+    return json.loads(out.decode())
+
+class TestLazyImport(unittest.TestCase):
+    
+    def testImportIsLight(self):
+        modules = run_python("import sys, json, cytoflow\n"
+                             "print(json.dumps(list(sys.modules)))")
+        for m in HEAVY:
+            self.assertNotIn(m, modules)
+            
+    def testImportOpIsLight(self):
+        # the command-line scripts just import some FCS files
+        modules = run_python("import sys, json, cytoflow\n"
+                             "cytoflow.ImportOp, cytoflow.Tube, cytoflow.Experiment\n"
+                             "print(json.dumps(list(sys.modules)))")
+        for m in ["matplotlib", "seaborn", "scipy", "sklearn", "statsmodels"]:
+            self.assertNotIn(m, modules)
+        
+    def testImportTime(self):
+        # importing everything takes several seconds; the lazy import should
+        # take a small fraction of one, even on a slow machine.
+        elapsed = run_python("import time, json\n"
+                             "start = time.perf_counter()\n"
+                             "import cytoflow\n"
+                             "print(json.dumps(time.perf_counter() - start))")
+        self.assertLess(elapsed, 1.0)
+        
+    def testNames(self):
+        for m in [flow, flow.operations, flow.views, util]:
+            for name in m.__all__:
+                self.assertIn(name, dir(m))
+                self.assertIsNotNone(getattr(m, name))
+                
+        self.assertIs(flow.ThresholdOp, flow.operations.ThresholdOp)
+        
+    def testStarImport(self):
+        names = {}
+        exec("from cytoflow import *", names)
+        self.assertIn("HistogramView", names)
+        self.assertIn("geom_mean", names)
+        
+    def testPython36(self):
+        # no PEP 562 on python 3.6: pretend that's what we're running
+        names = run_python("import sys, json\n"
+                           "from unittest import mock\n"
+                           "with mock.patch.object(sys, 'version_info', (3, 6, 12)):\n"
+                           "    import cytoflow\n"
+                           "    from cytoflow import Tube\n"
+                           "print(json.dumps([type(cytoflow).__name__,\n"
+                           "                  cytoflow.ImportOp.__name__,\n"
+                           "                  Tube.__name__,\n"
+                           "                  'ThresholdOp' in dir(cytoflow)]))")
+        self.assertEqual(names, ["LazyModule", "ImportOp", "Tube", True])
+        
+    def testMissing(self):
+        with self.assertRaises(AttributeError):
+            flow.NotAnOp
+        with self.assertRaises(ImportError):
+            from cytoflow import NotAnOp  # @UnresolvedImport @UnusedImport
+        
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,7 +18,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import unittest
+from unittest import mock
 
+import numpy as np
 import pandas as pd
 
 import cytoflow as flow
@@ -46,6 +48,66 @@ class TestLogicle(unittest.TestCase):
         self.assertAlmostEqual(scale.A, 0.0)
         self.assertAlmostEqual(scale.W, 0.533191950161284)
         
+    def test_logicle_cached(self):
+        """
+        The estimate is remembered (by clones, too) until the channel changes
+        """
+        
+        scale = util.scale_factory("logicle", self.ex, channel = "Y2-A")
+        W = scale.W
+        
+        ex2 = self.ex.clone()
+        with mock.patch("cytoflow.utility.logicle_scale._negative_quantile") as q:
+            self.assertEqual(util.scale_factory("logicle", ex2, channel = "Y2-A").W, W)
+            q.assert_not_called()
+            
+        ex2["Y2-A"] = ex2["Y2-A"] * 2
+        self.assertNotEqual(util.scale_factory("logicle", ex2, channel = "Y2-A").W, W)
+        
+        # ... even if it's changed directly in the data frame
+        ex3 = self.ex.clone()
+        ex3.data["Y2-A"] = ex3.data["Y2-A"] * 2
+        self.assertNotEqual(util.scale_factory("logicle", ex3, channel = "Y2-A").W, W)
+        
+        # a different r is a different estimate
+        self.assertNotEqual(util.scale_factory("logicle", self.ex, channel = "Y2-A", r = 0.1).W, W)
+
+    def test_logicle_cached_warning(self):
+        """
+        A cached estimate still warns about a channel without negative data
+        """
+
+        self.ex["Y2-A"] = self.ex["Y2-A"].abs()
+
+        with self.assertWarns(util.CytoflowWarning):
+            util.scale_factory("logicle", self.ex, channel = "Y2-A").W
+
+        with self.assertWarns(util.CytoflowWarning):
+            util.scale_factory("logicle", self.ex.clone(), channel = "Y2-A").W
+
+    def test_logicle_sampled(self):
+        """
+        Big channels are estimated from a sample
+        """
+        
+        from cytoflow.utility import logicle_scale
+        
+        values = np.random.RandomState(1).normal(100, 500, 100000)
+        exact = np.quantile(values[values < 0], 0.05)
+        
+        with mock.patch.object(logicle_scale, '_QUANTILE_SAMPLE_SIZE', 20000), \
+             mock.patch.object(logicle_scale, '_QUANTILE_MIN_NEGATIVE', 1000):
+            sampled = logicle_scale._negative_quantile(values, 0.05)
+            
+            # not enough negative values in the sample: use them all
+            self.assertAlmostEqual(logicle_scale._negative_quantile(values + 1200, 0.05),
+                                   np.quantile(values[values < -1200], 0.05) + 1200)
+            
+        self.assertNotEqual(sampled, exact)
+        self.assertAlmostEqual(sampled / exact, 1, delta = 0.05)
+        
+        self.assertIsNone(logicle_scale._negative_quantile(np.abs(values), 0.05))
+        
     ### TODO - test the estimator failure modes
         
     def test_logicle_apply(self):
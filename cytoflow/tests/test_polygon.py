@@ -24,7 +24,12 @@ Created on Dec 1, 2015
 '''
 import unittest
 import os
+
+import numpy as np
+import matplotlib as mpl
+
 import cytoflow as flow
+from cytoflow.operations.polygon import _PolygonIndex, _GRID_SIZE
 from test_base import ImportedDataSmallTest
 
 
@@ -46,6 +51,48 @@ class Test(ImportedDataSmallTest):
         # how many events ended up in the gate?
         self.assertEqual(ex2.data.groupby("Polygon").size()[True], 4126)
         
+    def testLasso(self):
+        # a free-hand gate with lots of vertices
+        theta = np.linspace(0, 2 * np.pi, 500, endpoint = False)
+        r = 1 + 0.3 * np.sin(12 * theta)
+        self.gate.vertices = list(zip(300 + 400 * r * np.cos(theta),
+                                      6000 + 8000 * r * np.sin(theta)))
+        ex2 = self.gate.apply(self.ex)
+        
+        path = mpl.path.Path(np.array(self.gate.vertices))
+        expected = path.contains_points(self.ex.data[["V2-A", "Y2-A"]].values)
+        np.testing.assert_array_equal(ex2["Polygon"].to_numpy(), expected)
+        
+    def testIndex(self):
+        rng = np.random.RandomState(0)
+        for n in [3, 5, 50, 500]:
+            theta = np.sort(rng.uniform(0, 2 * np.pi, n))
+            r = rng.uniform(0.2, 1, n)
+            vertices = np.column_stack((r * np.cos(theta), r * np.sin(theta)))
+            
+            # random points, the vertices themselves and points on the grid 
+            # lines
+            lo, hi = vertices.min(axis = 0), vertices.max(axis = 0)
+            grid = np.linspace(lo, hi, _GRID_SIZE + 1)
+            points = np.concatenate((rng.uniform(-1.1, 1.1, (20000, 2)),
+                                     vertices,
+                                     np.column_stack((grid[:, 0], rng.uniform(-1, 1, len(grid)))),
+                                     np.column_stack((rng.uniform(-1, 1, len(grid)), grid[:, 1]))))
+            
+            index = _PolygonIndex(vertices)
+            path = mpl.path.Path(vertices)
+            np.testing.assert_array_equal(index.contains(points[:, 0], points[:, 1]),
+                                          path.contains_points(points))
+            
+    def testIndexDegenerate(self):
+        # no area, or not finite: fall back to the exact test
+        for vertices in [[(0, 0), (1, 0), (2, 0)],
+                         [(0, 0), (1, np.nan), (1, 1)]]:
+            index = _PolygonIndex(vertices)
+            points = np.array([[0.5, 0], [0.5, 0.5], [np.nan, 0]])
+            np.testing.assert_array_equal(index.contains(points[:, 0], points[:, 1]),
+                                          mpl.path.Path(np.array(vertices, dtype = float)).contains_points(points))
+        
     def testPlot(self):
         self.gate.default_view().plot(self.ex)
 
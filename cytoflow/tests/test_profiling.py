@@ -0,0 +1,152 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest, os, json, tempfile
+
+import numpy as np
+
+import cytoflow as flow
+import cytoflow.utility as util
+
+from test_base import ImportedDataSmallTest
+
+class TestTrace(unittest.TestCase):
+    
+    def testNotTracing(self):
+        # outside of tracing(), traced() does nothing
+        self.assertIsNone(util.current_trace())
+        with util.traced("test", "nothing") as t:
+            self.assertIsNone(t)
+        
+    def testNested(self):
+        trace = util.Trace()
+        with util.tracing(trace):
+            with util.traced("test", "outer", events = 10):
+                with util.traced("test", "inner") as t:
+                    t.events = 5
+                    x = np.ones(2 ** 20)
+                del x
+                
+        self.assertIsNone(util.current_trace())
+        
+        inner, outer = trace.events
+        self.assertEqual((inner.name, inner.depth, inner.events), ("inner", 1, 5))
+        self.assertEqual((outer.name, outer.depth, outer.events), ("outer", 0, 10))
+        self.assertGreaterEqual(outer.duration, inner.duration)
+        
+        # the array was allocated in the inner call, so it counts against
+        # both of them
+        self.assertGreaterEqual(inner.memory, 8 * 2 ** 20)
+        self.assertGreaterEqual(outer.memory, 8 * 2 ** 20)
+        
+        summary = trace.summary()
+        self.assertEqual(summary.loc[("test", "inner"), "calls"], 1)
+        self.assertEqual(summary.loc[("test", "outer"), "events"], 10)
+        
+    def testNoMemory(self):
+        trace = util.Trace(memory = False)
+        with util.tracing(trace):
+            with util.traced("test", "call"):
+                pass
+            
+        self.assertIsNone(trace.events[0].memory)
+        
+    def testMaxEvents(self):
+        trace = util.Trace(memory = False, max_events = 2)
+        with util.tracing(trace):
+            for name in ["a", "b", "c"]:
+                with util.traced("test", name):
+                    pass
+                
+        self.assertEqual([e.name for e in trace.events], ["b", "c"])
+        
+    def testChromeTrace(self):
+        trace = util.Trace()
+        with util.tracing(trace):
+            with util.traced("test", "outer"):
+                with util.traced("test", "inner"):
+                    pass
+        
+        with tempfile.TemporaryDirectory() as d:
+            filename = os.path.join(d, "trace.json")
+            trace.save_chrome_trace(filename)
+            with open(filename) as f:
+                events = json.load(f)["traceEvents"]
+                
+        self.assertEqual([e["name"] for e in events], ["outer", "inner"])
+        self.assertTrue(all(e["ph"] == "X" for e in events))
+                
+                
+class TestTraceOps(ImportedDataSmallTest):
+    
+    def testApply(self):
+        trace = flow.Trace()
+        with flow.tracing(trace):
+            ex2 = flow.ThresholdOp(name = "T", 
+                                   channel = "Y2-A", 
+                                   threshold = 500).apply(self.ex)
+            
+        apply = [e for e in trace.events if e.category == "apply"]
+        self.assertEqual(len(apply), 1)
+        self.assertEqual(apply[0].name, "ThresholdOp.apply")
+        self.assertEqual(apply[0].events, len(self.ex))
+        
+        # ThresholdOp.apply clones the experiment
+        clone = [e for e in trace.events if e.category == "clone"]
+        self.assertEqual(len(clone), 1)
+        self.assertEqual(clone[0].depth, 1)
+        
+        self.assertEqual(len(ex2), len(self.ex))
+        
+    def testEstimate(self):
+        op = flow.GaussianMixtureOp(name = "Gauss",
+                                    channels = ["Y2-A"],
+                                    scale = {"Y2-A" : "logicle"},
+                                    num_components = 2)
+        trace = flow.Trace()
+        with flow.tracing(trace):
+            op.estimate(self.ex)
+            
+        categories = {e.category for e in trace.events}
+        self.assertIn("estimate", categories)
+        self.assertIn("scale", categories)
+        
+    def testPlot(self):
+        trace = flow.Trace()
+        with flow.tracing(trace):
+            flow.HistogramView(channel = "Y2-A").plot(self.ex)
+            
+        # the superclasses' plot() aren't recorded separately
+        plot = [e for e in trace.events if e.category == "plot"]
+        self.assertEqual(len(plot), 1)
+        self.assertEqual(plot[0].name, "HistogramView.plot")
+        
+    def testImport(self):
+        trace = flow.Trace()
+        with flow.tracing(trace):
+            flow.ImportOp(tubes = [flow.Tube(file = self.cwd + "RFP_Well_A3.fcs",
+                                             conditions = {})]).apply()
+            
+        imports = [e for e in trace.events if e.category == "import"]
+        self.assertEqual(len(imports), 1)
+        self.assertGreater(imports[0].events, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
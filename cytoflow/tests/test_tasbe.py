@@ -0,0 +1,130 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Tests for cytoflow.operations.tasbe
+'''
+
+import unittest, os, tempfile, shutil, pickle
+
+import numpy as np
+
+import cytoflow as flow
+import cytoflow.utility as util
+from cytoflow.operations.tasbe import TasbeTransform, convert_files
+
+
+class TestTasbeTransform(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.path.dirname(os.path.abspath(__file__))
+        self.directory = tempfile.mkdtemp()
+        self.ex = flow.ImportOp(tubes = [flow.Tube(file = self.cwd + '/data/tasbe/rby.fcs')]).apply()
+        
+        self.channels = ["Pacific Blue-A", "FITC-A", "PE-Tx-Red-YG-A"]
+
+        self.af_op = flow.AutofluorescenceOp(
+                        blank_file = self.cwd + '/data/tasbe/blank.fcs',
+                        channels = self.channels)
+        self.af_op.estimate(self.ex)
+        
+        self.bleedthrough_op = flow.BleedthroughLinearOp(
+                        controls = {"FITC-A" : self.cwd + '/data/tasbe/eyfp.fcs',
+                                    "PE-Tx-Red-YG-A" : self.cwd + '/data/tasbe/mkate.fcs',
+                                    "Pacific Blue-A" : self.cwd + '/data/tasbe/ebfp.fcs'})
+        self.bleedthrough_op.estimate(self.ex)
+        
+        self.bead_op = flow.BeadCalibrationOp(
+                        units = {"FITC-A" : "MEFL",
+                                 "PE-Tx-Red-YG-A" : "MEPTR",
+                                 "Pacific Blue-A" : "MEBFP"},
+                        beads_file = self.cwd + '/data/tasbe/beads.fcs',
+                        beads = flow.BeadCalibrationOp.BEADS["Spherotech RCP-30-5A Lot AA01-AA04, AB01, AB02, AC01, GAA01-R"])
+        self.bead_op.estimate(self.ex)
+        
+        self.color_op = flow.ColorTranslationOp(
+                        controls = {("PE-Tx-Red-YG-A", "FITC-A") :
+                                    self.cwd + '/data/tasbe/rby.fcs',
+                                    ("Pacific Blue-A", "FITC-A") :
+                                    self.cwd + '/data/tasbe/rby.fcs'},
+                        mixture_model = True)
+        self.color_op.estimate(self.ex)
+        
+        self.transform = TasbeTransform(self.af_op, 
+                                        self.bleedthrough_op, 
+                                        self.bead_op, 
+                                        self.color_op)
+        
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        
+    def testApply(self):
+        ex = self.af_op.apply(self.ex)
+        ex = self.bleedthrough_op.apply(ex)
+        ex = self.bead_op.apply(ex)
+        ex = self.color_op.apply(ex)
+        
+        ex2 = self.transform.apply(self.ex.clone())
+        
+        for channel in self.channels:
+            np.testing.assert_allclose(ex2[channel], ex[channel], rtol = 1e-6)
+            self.assertEqual(ex2.metadata[channel]['bead_units'],
+                             ex.metadata[channel]['bead_units'])
+            self.assertEqual(ex2.metadata[channel]['bleedthrough_channels'],
+                             ex.metadata[channel]['bleedthrough_channels'])
+            
+        self.assertEqual([op.id for op in ex2.history],
+                         [op.id for op in ex.history])
+            
+    def testPickle(self):
+        transform = pickle.loads(pickle.dumps(self.transform))
+        ex = self.transform.apply(self.ex.clone())
+        ex2 = transform.apply(self.ex.clone())
+        np.testing.assert_array_equal(ex.data.values, ex2.data.values)
+
+    def testConvertFiles(self):
+        workers = util.get_num_workers()
+        min_events = util.parallel.MIN_PARALLEL_EVENTS
+        util.set_num_workers(2)
+        util.parallel.MIN_PARALLEL_EVENTS = 0
+        try:
+            done = []
+            files = [self.cwd + '/data/tasbe/rby.fcs',
+                     self.cwd + '/data/tasbe/eyfp.fcs',
+                     self.cwd + '/data/tasbe/does-not-exist.fcs']
+            failed = convert_files(self.transform, 
+                                   files,
+                                   self.directory,
+                                   progress = lambda d, t, _: done.append((d, t)))
+        finally:
+            util.set_num_workers(workers)
+            util.parallel.MIN_PARALLEL_EVENTS = min_events
+        
+        self.assertEqual(list(failed.keys()), [files[2]])
+        self.assertEqual(sorted(done), [(1, 3), (2, 3), (3, 3)])
+        self.assertEqual(sorted(os.listdir(self.directory)), ['eyfp.fcs', 'rby.fcs'])
+        
+        ex = flow.ImportOp(tubes = [flow.Tube(file = os.path.join(self.directory, 'rby.fcs'))]).apply()
+        ex2 = self.transform.apply(self.ex.clone())
+        np.testing.assert_allclose(ex['FITC-A'], ex2['FITC-A'], rtol = 1e-5)
+
+
+if __name__ == "__main__":
+#     import sys;sys.argv = ['', 'TestTasbeTransform.testApply']
+    unittest.main()
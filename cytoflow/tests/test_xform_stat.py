@@ -81,6 +81,18 @@ class Test(ImportedDataSmallTest):
          
         self.assertIsInstance(stat, pd.Series)
         self.assertIsNot(type(stat.iloc[0]), pd.Series)
+        
+    def testIdentity(self):
+        old_name = self.ex.statistics[("ByDox", "len")].name
+        ex2 = flow.TransformStatisticOp(name = "ByDox",
+                                        statistic = ("ByDox", "len"),
+                                        statistic_name = "same",
+                                        function = lambda x: x).apply(self.ex)
+                                        
+        # the input's statistic (which its clones share) wasn't renamed
+        self.assertEqual(self.ex.statistics[("ByDox", "len")].name, old_name)
+        self.assertEqual(ex2.statistics[("ByDox", "len")].name, old_name)
+        self.assertNotEqual(ex2.statistics[("ByDox", "same")].name, old_name)
 
 
 if __name__ == "__main__":
@@ -17,21 +17,29 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from .util_functions import (cartesian, iqr, geom_mean, geom_sd, geom_sd_range,
-                             geom_sem, geom_sem_range, num_hist_bins, sanitize_identifier, 
-                             random_string, is_numeric, cov2corr)
+# the names are imported when they're first used.  see lazy.py
+from .lazy import lazy_import
 
-from .algorithms import ci
-from .cytoflow_errors import CytoflowError, CytoflowOpError, CytoflowViewError
-from .cytoflow_errors import CytoflowWarning, CytoflowOpWarning, CytoflowViewWarning
-
-from .scale import scale_factory, IScale, set_default_scale, get_default_scale
-from .custom_traits import (PositiveInt, PositiveCInt, PositiveFloat, 
-                            PositiveCFloat, ScaleEnum, Deprecated, Removed, 
-                            FloatOrNone, CFloatOrNone, IntOrNone, CIntOrNone)
-
-from .matplotlib_widgets import PolygonSelector, SpanSelector, Cursor
-
-from .docstring import expand_class_attributes, expand_method_parameters
-
-from .fcswrite import write_fcs
\ No newline at end of file
+__getattr__, __dir__, __all__ = lazy_import(__name__, {
+    '.util_functions' : ['cartesian', 'iqr', 'geom_mean', 'geom_sd', 
+                         'geom_sd_range', 'geom_sem', 'geom_sem_range', 
+                         'num_hist_bins', 'sanitize_identifier', 
+                         'random_string', 'is_numeric', 'cov2corr'],
+    '.algorithms' : ['ci'],
+    '.cytoflow_errors' : ['CytoflowError', 'CytoflowOpError', 
+                          'CytoflowViewError', 'CytoflowWarning', 
+                          'CytoflowOpWarning', 'CytoflowViewWarning'],
+    '.scale' : ['scale_factory', 'IScale', 'set_default_scale', 
+                'get_default_scale'],
+    '.custom_traits' : ['PositiveInt', 'PositiveCInt', 'PositiveFloat', 
+                        'PositiveCFloat', 'ScaleEnum', 'Deprecated', 'Removed', 
+                        'FloatOrNone', 'CFloatOrNone', 'IntOrNone', 'CIntOrNone'],
+    '.matplotlib_widgets' : ['PolygonSelector', 'SpanSelector', 'Cursor'],
+    '.docstring' : ['expand_class_attributes', 'expand_method_parameters'],
+    '.fcswrite' : ['write_fcs'],
+    '.bitset' : ['BitsetArray', 'BitsetDtype'],
+    '.parallel' : ['parallel_map', 'set_num_workers', 'get_num_workers'],
+    '.cancel' : ['CytoflowCancelled', 'CancelToken', 'cancellable', 
+                 'check_cancelled'],
+    '.profiling' : ['Trace', 'TraceEvent', 'tracing', 'traced', 
+                    'traced_method', 'current_trace']})
@@ -24,9 +24,14 @@ cytoflow.utility.algorithms
 Useful algorithms.
 '''
 
+import functools
+
 import numpy as np
 from scipy import stats
 
+from .util_functions import geom_mean
+from .cancel import check_cancelled
+
 def ci(data, func, which=95, boots=1000):
     """
     Determine the confidence interval of a function applied to a data set by
@@ -38,7 +43,10 @@ def ci(data, func, which=95, boots=1000):
         The data to resample.
         
     func : callable
-        A function that is called on a resampled ``data``
+        A function that is called on a resampled ``data``.  Common 
+        reducers (:func:`numpy.mean`, :func:`numpy.median`, 
+        :func:`.geom_mean`, and quantiles) are evaluated on many resamples
+        at once; see :func:`bootstrap`.
         
     which : int
         The percentile to use for the confidence interval
@@ -134,7 +142,19 @@ def bootstrap(*args, **kwargs):
     array
         array of bootstrapped statistic values
         
-    from seaborn: https://github.com/mwaskom/seaborn/blob/master/seaborn/algorithms.py
+    Notes
+    -----
+    If there is a single one-dimensional array to resample, and ``func`` is
+    one of the reducers that :mod:`numpy` can evaluate along an axis -- 
+    :func:`numpy.mean`, :func:`numpy.median`, their ``nan`` versions, 
+    :func:`.geom_mean`, or a :func:`functools.partial` of 
+    :func:`numpy.percentile` or :func:`numpy.quantile` with a scalar ``q`` -- 
+    then the resamples are drawn as a matrix (a chunk of rows at a time, to 
+    bound memory usage) and ``func`` is evaluated on each chunk with a 
+    single call.  The resamples are the same ones the one-at-a-time loop 
+    would draw, so the results don't depend on which path is taken.
+    
+    Adapted from seaborn: https://github.com/mwaskom/seaborn/blob/master/seaborn/algorithms.py
     """
     # Ensure list of arrays are same length
     if len(np.unique(list(map(len, args)))) > 1:
@@ -168,6 +188,10 @@ def bootstrap(*args, **kwargs):
     if units is not None:
         return _structured_bootstrap(args, n_boot, units, func,
                                      func_kwargs, rs)
+        
+    batch_func = _batch_reducer(func)
+    if batch_func is not None and len(args) == 1 and args[0].ndim == 1 and axis is None:
+        return _vectorized_bootstrap(args[0], n_boot, batch_func, rs)
 
     boot_dist = []
     for i in range(int(n_boot)):
@@ -205,4 +229,81 @@ def _smooth_bootstrap(args, n_boot, func, func_kwargs):
     for i in range(int(n_boot)):
         sample = [a.resample(n).T for a in kde]
         boot_dist.append(func(*sample, **func_kwargs))
-    return np.array(boot_dist)
\ No newline at end of file
+    return np.array(boot_dist)
+
+
+# the maximum number of elements in a chunk of resamples.  the index matrix
+# and the resampled data are each this big (times 8 bytes.)
+BOOT_CHUNK_SIZE = 2 ** 22
+
+def _vectorized_bootstrap(a, n_boot, batch_func, rs):
+    """Resample a chunk of bootstraps at a time and reduce each resample."""
+    n = len(a)
+    n_boot = int(n_boot)
+    chunk_size = max(1, min(n_boot, BOOT_CHUNK_SIZE // max(n, 1)))
+    
+    boot_dist = np.empty(n_boot)
+    for start in range(0, n_boot, chunk_size):
+        check_cancelled()
+        stop = min(start + chunk_size, n_boot)
+        resampler = rs.randint(0, n, (stop - start, n))
+        boot_dist[start:stop] = batch_func(a, resampler)
+        
+    return boot_dist
+
+# batch reducers take the data and a 2D matrix of indices (one row per
+# resample), and return the reduced value of each row.
+
+def _batch_geom_mean(a, resampler):
+    """:func:`.geom_mean` of each resample"""
+    
+    pos = a > 0
+    
+    # the common case: all-positive data.  take the logs once, up front.
+    if pos.all():
+        return np.exp(np.log(a).take(resampler).mean(axis = 1))
+    
+    x = a.take(resampler)
+    pos = x > 0
+    neg = x < 0
+    
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        log_abs = np.log(np.abs(x))
+        
+        pos_count = pos.sum(axis = 1)
+        neg_count = neg.sum(axis = 1)
+        pos_mean = np.exp(np.where(pos, log_abs, 0).sum(axis = 1) / pos_count)
+        neg_mean = np.exp(np.where(neg, log_abs, 0).sum(axis = 1) / neg_count)
+        neg_mean[neg_count == 0] = 0
+        
+    return (pos_mean * pos_count - neg_mean * neg_count) / resampler.shape[1]
+
+_batch_reducers = {np.mean : lambda a, r: np.mean(a.take(r), axis = 1),
+                   np.median : lambda a, r: np.median(a.take(r), axis = 1),
+                   np.nanmean : lambda a, r: np.nanmean(a.take(r), axis = 1),
+                   np.nanmedian : lambda a, r: np.nanmedian(a.take(r), axis = 1),
+                   geom_mean : _batch_geom_mean}
+
+_batch_quantiles = [np.percentile, np.quantile, 
+                    np.nanpercentile, np.nanquantile]
+
+def _batch_reducer(func):
+    """
+    If ``func`` is a reducer we know how to evaluate along an axis, return
+    a batch reducer for it.  Otherwise, return ``None``.
+    """
+    
+    try:
+        if func in _batch_reducers:
+            return _batch_reducers[func]
+    except TypeError:  # unhashable
+        return None
+    
+    if (isinstance(func, functools.partial) 
+        and func.func in _batch_quantiles
+        and not func.args
+        and set(func.keywords.keys()) == set(['q'])
+        and np.ndim(func.keywords['q']) == 0):
+        return lambda a, r: func(a.take(r), axis = 1)
+    
+    return None
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+cytoflow.utility.bitset
+-----------------------
+
+A :mod:`pandas` extension type for boolean conditions (gate membership,
+mostly) that stores each event in one *bit* instead of one byte.
+
+Give a condition the dtype ``bitset`` (ie, ``experiment.add_condition(name,
+"bitset", values)``) to use it.  The column behaves like a ``bool`` column:
+``&``, ``|``, ``^``, ``~`` and comparisons with ``True`` or ``False`` are
+done on the packed bits, and anything else gets a plain :class:`numpy.ndarray`
+of ``bool`` (through :meth:`BitsetArray.__array__`) when it asks for one.
+
+A bitset can't hold missing values.  If :mod:`pandas` needs to fill in
+missing events (for example, when re-indexing), they're ``False`` -- that
+is, outside the gate.
+'''
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import (ExtensionArray, ExtensionDtype,
+                                   register_extension_dtype)
+from pandas.api.indexers import check_array_indexer
+from pandas.api.types import is_integer, is_list_like, pandas_dtype
+
+# unpack (and take from) big bitsets this many events at a time, to keep
+# the temporary arrays small.
+_CHUNK_SIZE = 2 ** 20
+
+# the number of bits set in each byte
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype = np.uint8)
+
+@register_extension_dtype
+class BitsetDtype(ExtensionDtype):
+    """The dtype of a :class:`BitsetArray`.  Its name is ``bitset``."""
+
+    name = "bitset"
+    type = np.bool_
+    kind = 'b'
+
+    @property
+    def _is_boolean(self):
+        return True
+
+    @property
+    def _is_numeric(self):
+        return True
+
+    @classmethod
+    def construct_array_type(cls):
+        return BitsetArray
+
+
+class BitsetArray(ExtensionArray):
+    """
+    An array of booleans, packed eight to a byte (see :func:`numpy.packbits`).
+
+    Parameters
+    ----------
+    bits : numpy.ndarray of uint8
+        The packed bits.  The padding bits in the last byte must be 0.
+
+    length : int
+        The number of booleans in the array.
+    """
+
+    def __init__(self, bits, length):
+        bits = np.asarray(bits, dtype = np.uint8)
+        if bits.ndim != 1 or len(bits) != (length + 7) // 8:
+            raise ValueError("{} bytes can't hold {} bits"
+                             .format(len(bits), length))
+
+        self._bits = bits
+        self._length = length
+
+    @classmethod
+    def _from_sequence(cls, scalars, dtype = None, copy = False):
+        if isinstance(scalars, BitsetArray):
+            return scalars.copy() if copy else scalars
+
+        values = np.asarray(scalars)
+        if values.dtype != np.bool_:
+            if values.dtype.kind in "fO" and pd.isna(values).any():
+                raise ValueError("A bitset can't hold missing values")
+            values = values.astype(np.bool_)
+
+        return cls(np.packbits(values.ravel()), values.size)
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls._from_sequence(values.astype(np.bool_))
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        to_concat = list(to_concat)
+
+        # if every array but the last fills its last byte, just join the bytes
+        if all(len(x) % 8 == 0 for x in to_concat[:-1]):
+            return cls(np.concatenate([x._bits for x in to_concat]) if to_concat
+                       else np.array([], dtype = np.uint8),
+                       sum(len(x) for x in to_concat))
+
+        return cls._from_sequence(np.concatenate([np.asarray(x) for x in to_concat]))
+
+    @property
+    def dtype(self):
+        return BitsetDtype()
+
+    @property
+    def nbytes(self):
+        return self._bits.nbytes
+
+    def __len__(self):
+        return self._length
+
+    def __array__(self, dtype = None):
+        values = np.unpackbits(self._bits, count = self._length).view(np.bool_)
+        return values if dtype is None else values.astype(dtype)
+
+    def __iter__(self):
+        # like iterating over a bool Series, this gives python bools
+        for start in range(0, self._length, _CHUNK_SIZE):
+            yield from self[start : start + _CHUNK_SIZE].to_numpy().tolist()
+
+    def __getitem__(self, item):
+        if is_integer(item):
+            i = int(item)
+            if i < 0:
+                i += self._length
+            if not 0 <= i < self._length:
+                raise IndexError("index {} is out of bounds for a bitset of "
+                                 "length {}".format(item, self._length))
+            return np.bool_((self._bits[i >> 3] >> (7 - (i & 7))) & 1)
+
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self._length)
+            if step == 1 and start % 8 == 0:
+                # whole bytes -- copy them, and clear the bits past the end
+                stop = max(start, stop)
+                ret = BitsetArray(self._bits[start >> 3 : (stop + 7) >> 3].copy(),
+                                  stop - start)
+                ret._clear_padding()
+                return ret
+            return self.take(np.arange(start, stop, step))
+
+        item = check_array_indexer(self, item)
+        if item.dtype == np.bool_:
+            item = np.flatnonzero(item)
+        return self.take(item)
+
+    def __setitem__(self, key, value):
+        # set (and clear) the packed bits in place, so the cost is in the
+        # number of events set -- not the length of the array.
+        if is_integer(key):
+            positions = np.array([key], dtype = np.intp)
+        elif isinstance(key, slice):
+            positions = np.arange(*key.indices(self._length), dtype = np.intp)
+        else:
+            key = check_array_indexer(self, key)
+            positions = np.flatnonzero(key) if key.dtype == np.bool_ \
+                        else np.asarray(key, dtype = np.intp)
+
+        positions = np.where(positions < 0, positions + self._length, positions)
+        if len(positions) and (positions.min() < 0 or positions.max() >= self._length):
+            raise IndexError("indices are out of bounds for a bitset of "
+                             "length {}".format(self._length))
+
+        value = np.asarray(value)
+        if value.dtype != np.bool_:
+            if value.dtype.kind in "fO" and pd.isna(value).any():
+                raise ValueError("A bitset can't hold missing values")
+            value = value.astype(np.bool_)
+        value = np.broadcast_to(value, positions.shape)
+
+        if len(positions) > 1:
+            # like numpy, if a position is repeated, the last value wins
+            _, last = np.unique(positions[::-1], return_index = True)
+            keep = len(positions) - 1 - last
+            positions = positions[keep]
+            value = value[keep]
+
+        if not self._bits.flags.writeable:
+            self._bits = self._bits.copy()
+
+        byte = positions >> 3
+        mask = (1 << (7 - (positions & 7))).astype(np.uint8)
+        np.bitwise_and.at(self._bits, byte, ~mask)
+        np.bitwise_or.at(self._bits, byte[value], mask[value])
+
+    def _clear_padding(self):
+        if self._length % 8:
+            self._bits[-1] &= (0xFF << (8 - self._length % 8)) & 0xFF
+
+    def isna(self):
+        return np.zeros(self._length, dtype = np.bool_)
+
+    def copy(self):
+        return BitsetArray(self._bits.copy(), self._length)
+
+    def take(self, indices, allow_fill = False, fill_value = None):
+        indices = np.asarray(indices, dtype = np.intp)
+        n = self._length
+
+        missing = None
+        if allow_fill:
+            if (indices < -1).any():
+                raise ValueError("Invalid value in 'indices'. Must be between "
+                                 "-1 and the length of the array minus 1")
+            missing = indices == -1
+            if missing.any():
+                indices = np.where(missing, 0, indices)
+            else:
+                missing = None
+        else:
+            indices = np.where(indices < 0, indices + n, indices)
+
+        if len(indices) and missing is None and (indices.min() < 0 or indices.max() >= n):
+            raise IndexError("indices are out of bounds for a bitset of "
+                             "length {}".format(n))
+
+        values = np.empty(len(indices), dtype = np.bool_)
+        if n > 0:
+            for start in range(0, len(indices), _CHUNK_SIZE):
+                idx = indices[start : start + _CHUNK_SIZE]
+                values[start : start + _CHUNK_SIZE] = \
+                    (self._bits[idx >> 3] >> (7 - (idx & 7))) & 1
+
+        if missing is not None:
+            if n == 0 and not missing.all():
+                raise IndexError("cannot do a non-empty take from an empty array")
+            fill = False if fill_value is None or pd.isna(fill_value) \
+                   else bool(fill_value)
+            values[missing] = fill
+
+        return BitsetArray._from_sequence(values)
+
+    def astype(self, dtype, copy = True):
+        dtype = pandas_dtype(dtype)
+        if isinstance(dtype, BitsetDtype):
+            return self.copy() if copy else self
+        elif isinstance(dtype, ExtensionDtype):
+            return dtype.construct_array_type()._from_sequence(np.asarray(self),
+                                                               dtype = dtype)
+        else:
+            # unpacking already made a copy
+            return np.asarray(self).astype(dtype, copy = False)
+
+    def _values_for_argsort(self):
+        return np.asarray(self)
+
+    def _values_for_factorize(self):
+        return np.asarray(self).view(np.int8), -1
+
+    def unique(self):
+        n = self.sum()
+        return BitsetArray._from_sequence([v for v, present
+                                           in [(False, n < self._length),
+                                               (True, n > 0)] if present])
+
+    def value_counts(self, dropna = True):
+        n = self.sum()
+        counts = pd.Series([self._length - n, n],
+                           index = [False, True],
+                           dtype = "int64")
+        return counts[counts > 0]
+
+    def sum(self):
+        """The number of ``True`` values."""
+        return _POPCOUNT[self._bits].sum(dtype = np.int64)
+
+    def any(self):
+        # the padding bits are always 0
+        return bool(self._bits.any())
+
+    def all(self):
+        return bool(self.sum() == self._length)
+
+    def _reduce(self, name, skipna = True, **kwargs):
+        if name == "sum":
+            return self.sum()
+        elif name == "any":
+            return self.any()
+        elif name == "all":
+            return self.all()
+        elif name == "max" and self._length:
+            return self.any()
+        elif name == "min" and self._length:
+            return self.all()
+        elif name == "mean" and self._length:
+            return self.sum() / self._length
+
+        return getattr(pd.Series(np.asarray(self)), name)(skipna = skipna, **kwargs)
+
+    def _other_bits(self, other):
+        """
+        The packed bits of ``other`` (a scalar, a bitset or an array of
+        bools), or ``None`` if ``other`` isn't boolean.
+        """
+
+        if isinstance(other, (bool, np.bool_)):
+            ret = np.full(len(self._bits), 0xFF if other else 0, dtype = np.uint8)
+            if other and self._length % 8:
+                ret[-1] = (0xFF << (8 - self._length % 8)) & 0xFF
+            return ret
+
+        if not isinstance(other, BitsetArray):
+            if not is_list_like(other):
+                return None
+            other = np.asarray(other)
+            if other.dtype != np.bool_:
+                return None
+            other = BitsetArray._from_sequence(other)
+
+        if len(other) != self._length:
+            raise ValueError("Lengths must match: {} != {}"
+                             .format(self._length, len(other)))
+        return other._bits
+
+    def _logical_op(self, other, op):
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return NotImplemented
+
+        bits = self._other_bits(other)
+        if bits is None:
+            return op(np.asarray(self), other)
+
+        return BitsetArray(op(self._bits, bits), self._length)
+
+    def __and__(self, other):
+        return self._logical_op(other, np.bitwise_and)
+
+    def __or__(self, other):
+        return self._logical_op(other, np.bitwise_or)
+
+    def __xor__(self, other):
+        return self._logical_op(other, np.bitwise_xor)
+
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+
+    def __invert__(self):
+        ret = BitsetArray(np.invert(self._bits), self._length)
+        ret._clear_padding()
+        return ret
+
+    def __eq__(self, other):
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return NotImplemented
+
+        if isinstance(other, (bool, np.bool_)):
+            return self.copy() if other else ~self
+
+        if self._other_bits(other) is None:
+            return np.asarray(self) == other
+
+        return ~(self ^ other)
+
+    def __ne__(self, other):
+        ret = self.__eq__(other)
+        return ret if ret is NotImplemented else ~ret
+
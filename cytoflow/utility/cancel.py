@@ -0,0 +1,91 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+cytoflow.utility.cancel
+-----------------------
+
+Cooperative cancellation of long-running computations.
+
+Whoever starts a computation (the GUI, usually) makes a :class:`CancelToken`
+and runs the computation inside :func:`cancellable`.  Operations call
+:func:`check_cancelled` at convenient points -- between groups, between
+chunks -- and if the token has been cancelled (from another thread),
+:func:`check_cancelled` raises :class:`CytoflowCancelled`.  Outside of
+:func:`cancellable`, :func:`check_cancelled` does nothing, so scripts and
+notebooks never see it.
+'''
+
+import threading
+from contextlib import contextmanager
+
+class CytoflowCancelled(Exception):
+    """
+    Raised by :func:`check_cancelled` when the current computation has been
+    cancelled.  Deliberately *not* a :class:`.CytoflowError`: it doesn't mean
+    anything is wrong with an operation or view.
+    """
+
+class CancelToken(object):
+    """
+    A flag that one thread can set to ask a computation running in another
+    thread to stop.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Ask the computation to stop."""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """Raise :class:`CytoflowCancelled` if this token has been cancelled."""
+        if self._event.is_set():
+            raise CytoflowCancelled()
+
+_local = threading.local()
+
+@contextmanager
+def cancellable(token):
+    """
+    A context manager that makes ``token`` the current thread's cancellation
+    token, so :func:`check_cancelled` checks it.
+    """
+
+    old_token = getattr(_local, 'token', None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = old_token
+
+def check_cancelled():
+    """
+    Raise :class:`CytoflowCancelled` if the current thread's computation has
+    been cancelled.  Cheap enough to call once per group or chunk.
+    """
+
+    token = getattr(_local, 'token', None)
+    if token is not None:
+        token.check()
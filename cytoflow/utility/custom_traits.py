@@ -28,7 +28,6 @@ from warnings import warn
 import inspect
 
 from traits.api import (BaseInt, BaseCInt, BaseFloat, BaseCFloat, BaseEnum, TraitType, ValidateTrait)
-from . import scale
 from . import CytoflowError, CytoflowWarning
 
 import cytoflow
@@ -154,6 +153,10 @@ class ScaleEnum(BaseEnum):
     def __init__ ( self, *args, **metadata ):
         """ Returns an Enum trait with values from the registered scales
         """
+        # the scales import matplotlib, so don't import them until an 
+        # operation or view that uses them is defined
+        from . import scale
+        
         self.name = None
         self.values = list(scale._scale_mapping.keys())
         super(BaseEnum, self).__init__(scale._scale_default, **metadata )
@@ -166,6 +169,7 @@ class ScaleEnum(BaseEnum):
         return (7, (self._get_default_value, (), None))
     
     def _get_default_value(self):
+        from . import scale
         return scale._scale_default
 
 class Removed(TraitType):
@@ -29,7 +29,10 @@ Adapted from https://github.com/ZELLMECHANIK-DRESDEN/fcswrite
 from __future__ import print_function, unicode_literals, division
 
 import numpy as np
-import struct
+
+# the HEADER segment's offsets are 8 characters wide.  if the DATA segment
+# ends past this, the offsets are only in the TEXT segment.
+_MAX_HEADER_OFFSET = 99999999
 
 def write_fcs(filename, chn_names, chn_ranges, data,
               compat_chn_names=True,
@@ -37,10 +40,16 @@ def write_fcs(filename, chn_names, chn_ranges, data,
               compat_negative=True,
               compat_copy=True,
               verbose=0,
+              double=False,
+              version="3.0",
+              chunk_size=2**16,
+              rows=None,
               **kws):
     """
-    Write numpy data to an .fcs file (FCS3.0 file format)
+    Write numpy data to an .fcs file (FCS3.0 or FCS3.1 file format)
     
+    The DATA segment is written in chunks of ``chunk_size`` events, so 
+    writing a large data set doesn't need much more memory than one chunk.
     
     Parameters
     ----------
@@ -53,8 +62,8 @@ def write_fcs(filename, chn_names, chn_ranges, data,
     chn_ranges: dictionary
         Keys: channel names.  Values: ranges
         
-    data: 2d ndarray of shape (N,C)
-        The numpy array data to store as .fcs file format. 
+    data: 2d ndarray of shape (N,C), pandas.DataFrame with C columns, or list of C 1d ndarrays
+        The data to store as .fcs file format. 
         
     compat_chn_names: bool
         Compatibility mode for 3rd party flow analysis software:
@@ -71,8 +80,23 @@ def write_fcs(filename, chn_names, chn_ranges, data,
         Flip the sign of `data` if its mean is smaller than zero.
         
     compat_copy: bool
-        Do not override the input array `data` when modified in
-        compatibility mode.
+        Ignored; the input array `data` is never modified.
+        
+    double: bool
+        Write double-precision (64-bit) floats instead of single-precision
+        (32-bit) ones.
+        
+    version: str
+        The FCS version to write, "3.0" or "3.1".  In either case, if the
+        file is larger than 100 MB, the DATA segment's offsets are 
+        only written in the TEXT segment (as the standards require.)
+        
+    chunk_size: int
+        How many events to convert and write at a time.
+        
+    rows: 1d ndarray of int
+        If set, only write these rows (by position) of `data`.  The rows
+        are gathered a chunk at a time, so `data` isn't copied.
 
     kwargs : Str
         Additional keyword arguments are written as keyword/value pairs in
@@ -83,11 +107,29 @@ def write_fcs(filename, chn_names, chn_ranges, data,
     These commonly used unicode characters are replaced: "µ", "²"
 
     """
-    if not isinstance(data, np.ndarray):
-        data = np.array(data)
+    
+    if hasattr(data, 'columns'):
+        # a pandas.DataFrame -- take its columns without copying
+        columns = [data.iloc[:, i].values for i in range(data.shape[1])]
+    elif isinstance(data, (list, tuple)):
+        columns = [np.asarray(c) for c in data]
+    else:
+        if not isinstance(data, np.ndarray):
+            data = np.array(data)
+        columns = [data[:, i] for i in range(data.shape[1])]
+        
+    n_chans = len(columns)
+    if rows is not None:
+        rows = np.asarray(rows)
+        n_events = len(rows)
+    else:
+        n_events = len(columns[0]) if columns else 0
     
     msg="length of `chn_names` must match length of 2nd axis of `data`"
-    assert len(chn_names) == data.shape[1], msg
+    assert len(chn_names) == n_chans, msg
+    
+    if version not in ["3.0", "3.1"]:
+        raise ValueError("Can't write FCS version {}".format(version))
 
     rpl = [["µ", "u"],
            ["²", "2"],
@@ -100,47 +142,42 @@ def write_fcs(filename, chn_names, chn_ranges, data,
                 ["_", ""],
                 ]
 
-    for i in range(len(chn_names)):
+    out_names = list(chn_names)
+    for i in range(len(out_names)):
         for (a, b) in rpl:
-            chn_names[i] = chn_names[i].replace(a, b)
-
-    if compat_percent:
-        # Compatibility mode: Scale values b/w 0 and 1 to percent
-        toscale = []
-        for ch in range(data.shape[1]):
-            if data[:,ch].min() > 0 and data[:,ch].max() < 1:
-                toscale.append(ch)
-        if len(toscale):
-            if compat_copy:
-                # copy if requested
-                data = data.copy()
-            for ch in toscale:
-                data[:,ch] *= 100
-
-    if compat_negative:
-        toflip = []
-        for ch in range(data.shape[1]):
-            if np.mean(data[:,ch]) < 0:
-                toflip.append(ch)
-        if len(toflip):
-            if compat_copy:
-                # copy if requested
-                data = data.copy()
-            for ch in toflip:
-                data[:,ch] *= -1
-        
+            out_names[i] = out_names[i].replace(a, b)
 
-    # DATA segment
-    data1 = data.flatten().tolist()
-    DATA = struct.pack('>%sf' % len(data1), *data1)
+    # instead of changing the data, scale each chunk as it's written
+    scale = np.ones(n_chans)
+    
+    if n_events and (compat_percent or compat_negative):
+        for ch in range(n_chans):
+            column = columns[ch] if rows is None else columns[ch][rows]
+            
+            # Compatibility mode: Scale values b/w 0 and 1 to percent
+            if compat_percent and column.min() > 0 and column.max() < 1:
+                scale[ch] *= 100
+    
+            if compat_negative and np.mean(column) < 0:
+                scale[ch] *= -1
+                
+    dtype = np.dtype('>f8') if double else np.dtype('>f4')
+    data_len = n_events * n_chans * dtype.itemsize
 
     # TEXT segment
     # fix length of TEXT to 4 kilo bytes
     ltxt = 4096
-    ver='FCS3.0'
+    ver='FCS' + version
+    datastart = 256 + ltxt
+    dataend = datastart + data_len - 1
+    if dataend > _MAX_HEADER_OFFSET:
+        # large files: the offsets are in the TEXT segment
+        datafirst = '{0: >8}'.format(0)
+        datalast = '{0: >8}'.format(0)
+    else:
+        datafirst= '{0: >8}'.format(datastart)
+        datalast = '{0: >8}'.format(dataend)
     textfirst= '{0: >8}'.format(256)
-    datafirst= '{0: >8}'.format(256+ltxt)
-    datalast = '{0: >8}'.format(256+ltxt+len(DATA)-1)
     anafirst = '{0: >8}'.format(0)
     analast  = '{0: >8}'.format(0)
     # use little endian
@@ -149,16 +186,16 @@ def write_fcs(filename, chn_names, chn_ranges, data,
     byteord = '4,3,2,1'
     TEXT ='/$BEGINANALYSIS/0/$ENDANALYSIS/0'
     TEXT+='/$BEGINSTEXT/0/$ENDSTEXT/0'
-    TEXT+='/$BEGINDATA/{0}/$ENDDATA/{1}'.format(256+ltxt, 256+ltxt+len(DATA)-1)
-    TEXT+='/$BYTEORD/{0}/$DATATYPE/F'.format(byteord)
-    TEXT+='/$MODE/L/$NEXTDATA/0/$TOT/{0}'.format(data.shape[0])
-    TEXT+='/$PAR/{0}'.format(data.shape[1])
+    TEXT+='/$BEGINDATA/{0}/$ENDDATA/{1}'.format(datastart, dataend)
+    TEXT+='/$BYTEORD/{0}/$DATATYPE/{1}'.format(byteord, 'D' if double else 'F')
+    TEXT+='/$MODE/L/$NEXTDATA/0/$TOT/{0}'.format(n_events)
+    TEXT+='/$PAR/{0}'.format(n_chans)
 
-    for i in range(data.shape[1]):
+    for i in range(n_chans):
         pnrange = chn_ranges[chn_names[i]]
         # TODO:
         # - Set log/lin 
-        TEXT+='/$P{0}B/32/$P{0}E/0,0/$P{0}N/{1}/$P{0}R/{2}/$P{0}D/Linear'.format(i+1, chn_names[i], pnrange)
+        TEXT+='/$P{0}B/{3}/$P{0}E/0,0/$P{0}N/{1}/$P{0}R/{2}/$P{0}D/Linear'.format(i+1, out_names[i], pnrange, dtype.itemsize * 8)
 
     for kw, val in kws.items():
         kw = kw.replace('/', '//')
@@ -186,6 +223,18 @@ def write_fcs(filename, chn_names, chn_ranges, data,
     with open(filename, "wb") as fd:
         fd.write(HEADER.encode("ascii"))
         fd.write(TEXT.encode("ascii"))
-        fd.write(DATA)
-        fd.write(b'00000000')
+        
+        # DATA segment, converted to big-endian floats a chunk at a time
+        chunk = np.empty((min(chunk_size, n_events), n_chans), dtype = dtype)
+        for start in range(0, n_events, chunk_size):
+            stop = min(start + chunk_size, n_events)
+            idx = slice(start, stop) if rows is None else rows[start:stop]
+            out = chunk[:stop - start]
+            for ch in range(n_chans):
+                if scale[ch] != 1:
+                    out[:, ch] = columns[ch][idx] * scale[ch]
+                else:
+                    out[:, ch] = columns[ch][idx]
+            out.tofile(fd)
 
+        fd.write(b'00000000')
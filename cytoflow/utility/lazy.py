@@ -0,0 +1,108 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+cytoflow.utility.lazy
+---------------------
+
+Lazy loading of a package's public names.
+
+Importing every operation and view pulls in matplotlib, seaborn, scipy,
+sklearn, statsmodels and fcsparser, which takes seconds -- a long time for
+a command-line script that only reads some FCS metadata, or for each
+worker process that :func:`.parallel_map` spawns.  So :mod:`cytoflow`,
+:mod:`cytoflow.operations`, :mod:`cytoflow.views` and
+:mod:`cytoflow.utility` don't import their submodules until one of the
+names from them is used::
+
+    import cytoflow as flow     # fast: imports (almost) nothing
+    flow.ThresholdOp            # imports cytoflow.operations.threshold
+
+``from cytoflow import *`` still imports everything.
+
+:pep:`562` (module-level ``__getattr__`` and ``__dir__``) is new in Python
+3.7.  On Python 3.6, :func:`lazy_import` gives the package's module a
+subclass of :class:`types.ModuleType` with the same ``__getattr__`` and
+``__dir__`` instead.
+'''
+
+import importlib, sys, types
+
+def lazy_import(package, submodules):
+    """
+    Set up lazy loading of names from a package's submodules, using the
+    module-level ``__getattr__`` and ``__dir__`` from :pep:`562` (or, on 
+    Python 3.6, a module subclass that has them.)
+    
+    Parameters
+    ----------
+    package : Str
+        The package's name (its ``__name__``.)
+        
+    submodules : Dict(Str : List(Str))
+        For each submodule (relative to ``package``, like ``.experiment``),
+        the names to import from it.
+        
+    Returns
+    -------
+    (__getattr__, __dir__, __all__)
+        Assign these to the package's own ``__getattr__``, ``__dir__`` and
+        ``__all__``.
+    """
+    
+    names = {name : submodule 
+             for submodule, submodule_names in submodules.items()
+             for name in submodule_names}
+    
+    def __getattr__(name):
+        if name not in names:
+            # it used to be that importing the package imported all of its
+            # submodules too, so some code uses them without importing them.
+            if not name.startswith('_'):
+                try:
+                    return importlib.import_module('.' + name, package)
+                except ModuleNotFoundError as e:
+                    if e.name != package + '.' + name:
+                        raise
+                    
+            raise AttributeError("module '{}' has no attribute '{}'"
+                                 .format(package, name))
+            
+        submodule = names[name]
+        value = getattr(importlib.import_module(submodule, package), name)
+        
+        # next time, it's a normal module attribute
+        setattr(sys.modules[package], name, value)
+        return value
+    
+    def __dir__():
+        return sorted(set(sys.modules[package].__dict__) | set(names))
+    
+    if sys.version_info < (3, 7):
+        # no PEP 562, so the module's class has to do it
+        class LazyModule(types.ModuleType):
+            def __getattr__(self, name):
+                return __getattr__(name)
+            
+            def __dir__(self):
+                return __dir__()
+            
+        sys.modules[package].__class__ = LazyModule
+    
+    return __getattr__, __dir__, list(names)
@@ -43,6 +43,48 @@ from .logicle_ext.Logicle import FastLogicle
 from .util_functions import is_numeric
 from .cytoflow_errors import CytoflowError, CytoflowWarning
 
+# estimate the quantile of the negative values from this many randomly
+# chosen events, if there are more than twice as many in the channel...
+_QUANTILE_SAMPLE_SIZE = 2 ** 18
+
+# ... as long as at least this many of them are negative.  (the standard
+# error of the quantile's rank is then at most sqrt(r * (1 - r) / 2 ** 14),
+# or 0.17% of the negative events for r = 0.05.)
+_QUANTILE_MIN_NEGATIVE = 2 ** 14
+
+def _negative_quantile(values, r):
+    """
+    The ``r`` th quantile of the negative numbers in ``values``, or ``None`` 
+    if there aren't any.  For big arrays, it's estimated from a (fixed) 
+    random sample.
+    """
+    
+    if len(values) > 2 * _QUANTILE_SAMPLE_SIZE:
+        rng = np.random.RandomState(0)
+        sample = values[rng.randint(0, len(values), size = _QUANTILE_SAMPLE_SIZE)]
+        neg_values = sample[sample < 0]
+        if len(neg_values) >= _QUANTILE_MIN_NEGATIVE:
+            return float(np.quantile(neg_values, r))
+    
+    neg_values = values[values < 0]
+    if len(neg_values) == 0:
+        return None
+    
+    return float(np.quantile(neg_values, r))
+
+def _fingerprint(values):
+    """
+    A cheap fingerprint of ``values``: a hash of about a thousand of them,
+    evenly spaced.  The cached estimates include it in their keys, so they
+    notice most changes made directly to :attr:`.Experiment.data` (which
+    don't call :meth:`.Experiment._invalidate`.)  A change to just a few 
+    events can still be missed -- use :meth:`.Experiment.__setitem__`, or
+    call :meth:`.Experiment._invalidate` after changing the data in place.
+    """
+    
+    step = max(1, len(values) // 1024)
+    return hash(np.ascontiguousarray(values[::step]).tobytes())
+
 @provides(IScale)
 class LogicleScale(HasStrictTraits):
     """
@@ -95,7 +137,10 @@ class LogicleScale(HasStrictTraits):
         usually captures all the data, so 0 is fine to start.
     
     r : Float (default = 0.05)
-        Quantile used to estimate `W`.
+        Quantile used to estimate `W`.  For big channels, the quantile is 
+        estimated from a random sample of the events.  The estimate is 
+        remembered by the experiment (and its clones), so making the same
+        scale again is fast.
     
     References
     ----------
@@ -246,7 +291,9 @@ class LogicleScale(HasStrictTraits):
             if "range" in self.experiment.metadata[self.channel]:
                 return float(self.experiment.metadata[self.channel]["range"])
             else:
-                return float(self.experiment.data[self.channel].max())
+                values = self.experiment.data[self.channel].values
+                return self.experiment._cached(("max", self.channel, _fingerprint(values)),
+                                               lambda: float(self.experiment.data[self.channel].max()))
         elif self.condition and self.condition in self.experiment.conditions:
             return float(self.experiment.data[self.condition].max())
         elif self.statistic in self.experiment.statistics \
@@ -281,34 +328,38 @@ class LogicleScale(HasStrictTraits):
             return self._W
         
         if self.channel and self.channel in self.experiment.channels:
-            data = self.experiment[self.channel]
-            
             if self.r <= 0 or self.r >= 1:
                 raise CytoflowError("r must be between 0 and 1")
             
-            # get the range by finding the rth quantile of the negative values
-            neg_values = data[data < 0]
-            if(not neg_values.empty):
-                r_value = neg_values.quantile(self.r)
-                W = (self.M - math.log10(self._T/math.fabs(r_value)))/2
-                if W <= 0:
-                    warn("Channel {0} doesn't have enough negative data. " 
-                         "Try a log transform instead."
-                         .format(self.channel),
-                         CytoflowWarning)
-                    return 0.5
-                else:
-                    return W
-            else:
-                # ... unless there aren't any negative values, in which case
-                # you probably shouldn't use this transform
-                warn("Channel {0} doesn't have any negative data. " 
+            # finding the quantile means looking at the whole channel, so
+            # remember it (in the experiment, and its clones) until the
+            # channel changes.  (but not W: the warnings below should be
+            # seen by every scale that uses this estimate.)
+            values = self.experiment.data[self.channel].values
+            r_value = self.experiment._cached(("logicle_r", self.channel, _fingerprint(values), self.r),
+                                              lambda: _negative_quantile(values, self.r))
+        else:
+            return 0.5  # a reasonable default for non-channel scales
+        
+        # get the range from the rth quantile of the negative values
+        if r_value is not None:
+            W = (self.M - math.log10(self._T/math.fabs(r_value)))/2
+            if W <= 0:
+                warn("Channel {0} doesn't have enough negative data. " 
                      "Try a log transform instead."
                      .format(self.channel),
                      CytoflowWarning)
                 return 0.5
+            else:
+                return W
         else:
-            return 0.5  # a reasonable default for non-channel scales
+            # ... unless there aren't any negative values, in which case
+            # you probably shouldn't use this transform
+            warn("Channel {0} doesn't have any negative data. " 
+                 "Try a log transform instead."
+                 .format(self.channel),
+                 CytoflowWarning)
+            return 0.5
         
     def _set_W(self, value):
         self._W = value
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+cytoflow.utility.parallel
+-------------------------
+
+A shared pool of worker processes for numeric work that can be split into
+independent pieces (one per facet, one per file, etc.)
+
+The pool is created the first time it's needed and is re-used afterwards,
+so the (considerable) cost of starting a worker and importing the scientific
+stack is only paid once per session.  Workers are always started with the
+``spawn`` method: the GUI's remote process is multi-threaded, and forking a
+multi-threaded process is asking for trouble.
+'''
+
+import os, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .cytoflow_errors import CytoflowError
+from .cancel import check_cancelled, CytoflowCancelled
+
+# don't bother farming out work on fewer than this many events; pickling
+# the data to the workers costs more than we'd save.
+MIN_PARALLEL_EVENTS = 100000
+
+_num_workers = os.cpu_count() or 1
+_executor = None
+
+def set_num_workers(num_workers):
+    """
+    Set the number of worker processes used for parallel computation.  Set
+    to ``1`` to do everything in the current process.
+    """
+
+    global _num_workers
+
+    if num_workers < 1:
+        raise CytoflowError("num_workers must be >= 1")
+
+    if num_workers != _num_workers:
+        _shutdown_executor()
+
+    _num_workers = num_workers
+
+def get_num_workers():
+    return _num_workers
+
+def get_executor():
+    """
+    Get the shared :class:`concurrent.futures.ProcessPoolExecutor`, creating
+    it if necessary.
+    
+    Returns ``None`` if there's no way to make a pool of ``spawn``-ed
+    workers: before Python 3.7, :class:`~concurrent.futures.ProcessPoolExecutor`
+    doesn't take an ``mp_context`` and always forks.  Callers should do the
+    work in this process instead.
+    """
+
+    global _executor
+
+    if _executor is None:
+        try:
+            _executor = ProcessPoolExecutor(max_workers = _num_workers,
+                                            mp_context = multiprocessing.get_context('spawn'))
+        except TypeError:
+            return None
+
+    return _executor
+
+def _shutdown_executor():
+    global _executor
+
+    # wait for the pool to wind down: before Python 3.9, shutdown(wait = False)
+    # closes a pipe its management thread is still using, the thread dies,
+    # and the workers are never told to stop -- so the interpreter hangs
+    # on exit waiting for them.
+    if _executor is not None:
+        _executor.shutdown(wait = True)
+        _executor = None
+
+def parallel_map(fn, items, size = None, **kwargs):
+    """
+    Call ``fn(*item, **kwargs)`` for each tuple in ``items``, possibly in the
+    worker pool, and return the results in the same order as ``items``.
+
+    The work is done in the current process if there is only one worker,
+    if there are fewer than two items, if ``size`` (usually the total
+    number of events) is less than :const:`MIN_PARALLEL_EVENTS`, or if there
+    is no worker pool (see :func:`get_executor`).
+
+    Parameters
+    ----------
+    fn : callable
+        The function to call.  Must be picklable -- ie, a module-level
+        function.  So must its arguments and return value.
+
+    items : list of tuples
+        The positional arguments for each call to ``fn``.
+
+    size : int (default = None)
+        An estimate of how much work there is to do.  If ``None``, always
+        use the worker pool (if there is more than one worker.)
+
+    **kwargs : dict
+        Keyword arguments passed to every call of ``fn``.
+
+    Returns
+    -------
+    list
+        The return value of each call to ``fn``.
+    """
+
+    items = list(items)
+
+    if (_num_workers < 2
+        or len(items) < 2
+        or (size is not None and size < MIN_PARALLEL_EVENTS)):
+        return _serial_map(fn, items, **kwargs)
+
+    executor = get_executor()
+    if executor is None:
+        return _serial_map(fn, items, **kwargs)
+
+    try:
+        futures = [executor.submit(fn, *item, **kwargs) for item in items]
+        ret = []
+        for f in futures:
+            try:
+                check_cancelled()
+            except CytoflowCancelled:
+                for f in futures:
+                    f.cancel()
+                raise
+            ret.append(f.result())
+        return ret
+    except BrokenProcessPool:
+        # a worker died (out of memory?)  start over in this process, and
+        # make a new pool next time.
+        _shutdown_executor()
+        return _serial_map(fn, items, **kwargs)
+    
+def _serial_map(fn, items, **kwargs):
+    ret = []
+    for item in items:
+        check_cancelled()
+        ret.append(fn(*item, **kwargs))
+    return ret
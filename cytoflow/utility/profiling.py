@@ -0,0 +1,364 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+cytoflow.utility.profiling
+--------------------------
+
+Lightweight timing instrumentation.
+
+Operations' :meth:`estimate` and :meth:`apply`, views' :meth:`plot`,
+importing FCS files, building scales and cloning an :class:`.Experiment`
+are all instrumented.  To find out where the time goes, make a
+:class:`Trace` and run the code inside :func:`tracing`::
+
+    trace = flow.Trace()
+    with flow.tracing(trace):
+        ex2 = flow.ThresholdOp(...).apply(ex)
+        flow.HistogramView(...).plot(ex2)
+
+    trace.summary()
+    trace.save_chrome_trace("trace.json")
+
+Each instrumented call records its wall time, how much the (Python-tracked)
+memory peaked above where it started, and how many events it worked on.
+Outside of :func:`tracing`, the instrumentation does nothing but check a
+thread-local variable.
+
+Like :mod:`.cancel`, the current trace is per-thread.  Work done in other
+processes (see :func:`.parallel_map`) isn't recorded, and memory figures
+are approximate if more than one thread is traced at once (or, before
+Python 3.9, if memory allocated before a call is freed during it.)
+'''
+
+import threading, time, json, os, tracemalloc
+from collections import namedtuple, deque
+from contextlib import contextmanager
+from functools import wraps
+
+import pandas as pd
+
+TraceEvent = namedtuple('TraceEvent', ['category', 'name', 'start',
+                                       'duration', 'memory', 'events',
+                                       'thread', 'depth'])
+TraceEvent.__doc__ = """
+One instrumented call.  ``start`` and ``duration`` are in seconds;
+``memory`` is the peak memory above the starting point, in bytes (or
+``None`` if memory wasn't traced); ``events`` is the number of events
+the call worked on (or ``None`` if it's not known); ``depth`` is how
+deeply the call was nested in other instrumented calls.
+"""
+
+class Trace(object):
+    """
+    A record of instrumented calls.
+
+    Parameters
+    ----------
+    memory : Bool (default = ``True``)
+        Also record the peak memory of each call, using :mod:`tracemalloc`.
+        This makes allocation in Python somewhat slower while the trace is
+        being recorded.
+        
+    max_events : Int (default = ``None``)
+        If set, only keep this many of the most recent events.
+    """
+
+    def __init__(self, memory = True, max_events = None):
+        self.memory = memory
+        self._events = deque(maxlen = max_events)
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    @property
+    def events(self):
+        """A list of :class:`TraceEvent`, in the order the calls finished."""
+        with self._lock:
+            return list(self._events)
+
+    def add(self, event):
+        """Add a :class:`TraceEvent` to this trace."""
+        with self._lock:
+            self._events.append(event)
+
+    def extend(self, other):
+        """Add all the events from another :class:`Trace`."""
+        for e in other.events:
+            self.add(e)
+
+    def clear(self):
+        """Forget all the recorded events."""
+        with self._lock:
+            self._events.clear()
+
+    def __len__(self):
+        return len(self._events)
+
+    def to_frame(self):
+        """
+        Returns
+        -------
+        pandas.DataFrame
+            One row per recorded call, with a column for each field of
+            :class:`TraceEvent`.
+        """
+        return pd.DataFrame(self.events, columns = TraceEvent._fields)
+
+    def summary(self):
+        """
+        Returns
+        -------
+        pandas.DataFrame
+            Indexed by ``category`` and ``name``, with the number of
+            ``calls``, the ``total`` and ``max`` wall time (in seconds), the
+            largest peak ``memory`` (in bytes) and the total number of
+            ``events``, sorted by total time.
+        """
+
+        df = self.to_frame()
+        df['memory'] = pd.to_numeric(df['memory'])
+        df['events'] = pd.to_numeric(df['events'])
+        ret = df.groupby(['category', 'name']).agg(calls = ('duration', 'size'),
+                                                   total = ('duration', 'sum'),
+                                                   max = ('duration', 'max'),
+                                                   memory = ('memory', 'max'),
+                                                   events = ('events', 'sum'))
+        return ret.sort_values('total', ascending = False)
+
+    def to_chrome_trace(self):
+        """
+        Returns
+        -------
+        dict
+            The trace in the Chrome "Trace Event" format, suitable for
+            ``chrome://tracing`` or `Perfetto <https://ui.perfetto.dev>`_.
+        """
+
+        pid = os.getpid()
+        trace_events = []
+        for e in self.events:
+            args = {}
+            if e.memory is not None:
+                args['memory'] = e.memory
+            if e.events is not None:
+                args['events'] = e.events
+            trace_events.append({'name' : e.name,
+                                 'cat' : e.category,
+                                 'ph' : 'X',
+                                 'ts' : (e.start - self._t0) * 1e6,
+                                 'dur' : e.duration * 1e6,
+                                 'pid' : pid,
+                                 'tid' : e.thread,
+                                 'args' : args})
+
+        # Chrome draws nested calls properly only if they're sorted
+        trace_events.sort(key = lambda x: (x['ts'], -x['dur']))
+        return {'traceEvents' : trace_events,
+                'displayTimeUnit' : 'ms'}
+
+    def save_chrome_trace(self, filename):
+        """
+        Save the trace to ``filename`` in the Chrome "Trace Event" format.
+        """
+
+        with open(filename, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+_local = threading.local()
+
+# tracemalloc is process-wide; keep track of how many traces are using it,
+# and whether we started it (or someone else did.)
+_memory_lock = threading.Lock()
+_memory_users = 0
+_memory_started = False
+
+# tracemalloc only keeps one peak.  tracemalloc.reset_peak() (new in python
+# 3.9) starts a new one; before that, the only way is clear_traces(), which 
+# also forgets the memory allocated so far -- so keep a running total of the 
+# memory it forgot.  (we only do that if we started tracemalloc; clearing 
+# someone else's traces would be rude.)
+_memory_forgotten = 0
+
+def _can_trace_memory():
+    return tracemalloc.is_tracing() and \
+           (hasattr(tracemalloc, 'reset_peak') or _memory_started)
+
+def _traced_memory():
+    """The current and peak traced memory, like tracemalloc.get_traced_memory()"""
+    current, peak = tracemalloc.get_traced_memory()
+    return current + _memory_forgotten, peak + _memory_forgotten
+
+def _reset_peak():
+    global _memory_forgotten
+    
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    else:
+        with _memory_lock:
+            _memory_forgotten += tracemalloc.get_traced_memory()[0]
+            tracemalloc.clear_traces()
+
+@contextmanager
+def tracing(trace):
+    """
+    A context manager that makes ``trace`` the current thread's trace, so
+    instrumented calls are recorded in it.
+    """
+
+    global _memory_users, _memory_started, _memory_forgotten
+
+    old_trace = getattr(_local, 'trace', None)
+    old_stack = getattr(_local, 'stack', None)
+    _local.trace = trace
+    _local.stack = []
+
+    if trace is not None and trace.memory:
+        with _memory_lock:
+            if _memory_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _memory_started = True
+            _memory_users += 1
+
+    try:
+        yield trace
+    finally:
+        _local.trace = old_trace
+        _local.stack = old_stack
+        if trace is not None and trace.memory:
+            with _memory_lock:
+                _memory_users -= 1
+                if _memory_users == 0 and _memory_started:
+                    tracemalloc.stop()
+                    _memory_started = False
+                    _memory_forgotten = 0
+
+def current_trace():
+    """The current thread's :class:`Trace`, or ``None``."""
+    return getattr(_local, 'trace', None)
+
+class _Frame(object):
+    """The state of one instrumented call in progress."""
+
+    __slots__ = ['key', 'events', 'peak']
+
+    def __init__(self, key, events):
+        self.key = key
+        self.events = events
+        self.peak = 0
+
+@contextmanager
+def traced(category, name, events = None, key = None):
+    """
+    A context manager that records the code it wraps in the current
+    thread's trace (if there is one.)
+
+    Parameters
+    ----------
+    category : Str
+        What kind of call this is: ``estimate``, ``apply``, ``plot``, etc.
+
+    name : Str
+        What's being called -- usually the class and method name.
+
+    events : Int (optional)
+        How many events the call is working on.  The context manager returns
+        an object with an ``events`` attribute, which can also be set inside
+        the ``with`` block.
+
+    key : (optional)
+        If a call with the same ``key`` is already being recorded, don't
+        record this one too.  (For example, a view's :meth:`plot` that
+        calls its superclass's :meth:`plot`.)
+    """
+
+    trace = getattr(_local, 'trace', None)
+    if trace is None or (key is not None and
+                         any(f.key == key for f in _local.stack)):
+        yield None
+        return
+
+    stack = _local.stack
+    frame = _Frame(key, events)
+
+    memory = trace.memory and _can_trace_memory()
+    if memory:
+        # tracemalloc only keeps one peak.  save the enclosing call's peak
+        # so far, and restore it when we're done.
+        _, peak = _traced_memory()
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, peak)
+        _reset_peak()
+        start_memory = _traced_memory()[0]
+
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield frame
+    finally:
+        duration = time.perf_counter() - start
+        stack.pop()
+
+        if memory:
+            peak = max(frame.peak, _traced_memory()[1])
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            memory = max(0, peak - start_memory)
+        else:
+            memory = None
+
+        trace.add(TraceEvent(category = category,
+                             name = name,
+                             start = start,
+                             duration = duration,
+                             memory = memory,
+                             events = frame.events,
+                             thread = threading.get_ident(),
+                             depth = len(stack)))
+
+def traced_method(category):
+    """
+    A decorator that records calls to a method whose first argument is an
+    :class:`.Experiment` (like :meth:`IOperation.apply` or
+    :meth:`IView.plot`) in the current thread's trace.  If the method calls
+    another traced method of the same category on the same object (for
+    example, its superclass's), only the outermost call is recorded.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if getattr(_local, 'trace', None) is None:
+                return func(self, *args, **kwargs)
+
+            experiment = args[0] if args else kwargs.get('experiment')
+            try:
+                events = len(experiment)
+            except TypeError:
+                events = None
+
+            with traced(category,
+                        "{}.{}".format(self.__class__.__name__, func.__name__),
+                        events = events,
+                        key = (category, id(self))):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
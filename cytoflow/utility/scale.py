@@ -28,6 +28,7 @@ from traits.api import Interface, Str, Dict, Instance, Tuple, Array
 
 from .cytoflow_errors import CytoflowError
 from .util_functions import is_numeric
+from .profiling import traced
 from traits.has_traits import HasStrictTraits
 
 class IScale(Interface):
@@ -158,7 +159,8 @@ def scale_factory(scale, experiment, **scale_params):
     if scale not in _scale_mapping:
         raise CytoflowError("Unknown scale type {0}".format(scale))
         
-    return _scale_mapping[scale](experiment = experiment, **scale_params)
+    with traced("scale", _scale_mapping[scale].__name__):
+        return _scale_mapping[scale](experiment = experiment, **scale_params)
  
 def register_scale(scale_class):
     """
@@ -28,7 +28,6 @@ import random, string
 
 import numpy as np
 import pandas as pd
-from scipy import stats
 
 def iqr(a):
     """
@@ -110,6 +109,9 @@ def geom_mean(a):
 
     """
     
+    # scipy is slow to import; don't import it until we need it
+    from scipy import stats
+    
     a = np.array(a)
     pos = a[a > 0]
     pos_mean = stats.gmean(pos)
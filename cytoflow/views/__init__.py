@@ -29,22 +29,25 @@ sns.set(context = "paper", style = "whitegrid",
 # the default marker scales are tiny!  make them less tiny
 mpl.rc('legend', markerscale = 4)
 
-from .i_view import IView
-from .i_selectionview import ISelectionView
+# the names are imported when they're first used.  see
+# cytoflow/utility/lazy.py
+from cytoflow.utility.lazy import lazy_import
 
-from .base_views import Base1DView, Base2DView
-
-from .bar_chart import BarChartView
-from .histogram import HistogramView
-from .scatterplot import ScatterplotView
-from .densityplot import DensityView
-from .stats_1d import Stats1DView
-from .stats_2d import Stats2DView
-from .kde_1d import Kde1DView
-from .kde_2d import Kde2DView
-from .histogram_2d import Histogram2DView
-from .violin import ViolinPlotView
-from .table import TableView
-from .radviz import RadvizView
-from .parallel_coords import ParallelCoordinatesView
-from .export_fcs import ExportFCS
\ No newline at end of file
+__getattr__, __dir__, __all__ = lazy_import(__name__, {
+    '.i_view' : ['IView'],
+    '.i_selectionview' : ['ISelectionView'],
+    '.base_views' : ['Base1DView', 'Base2DView'],
+    '.bar_chart' : ['BarChartView'],
+    '.histogram' : ['HistogramView'],
+    '.scatterplot' : ['ScatterplotView'],
+    '.densityplot' : ['DensityView'],
+    '.stats_1d' : ['Stats1DView'],
+    '.stats_2d' : ['Stats2DView'],
+    '.kde_1d' : ['Kde1DView'],
+    '.kde_2d' : ['Kde2DView'],
+    '.histogram_2d' : ['Histogram2DView'],
+    '.violin' : ['ViolinPlotView'],
+    '.table' : ['TableView'],
+    '.radviz' : ['RadvizView'],
+    '.parallel_coords' : ['ParallelCoordinatesView'],
+    '.export_fcs' : ['ExportFCS']})
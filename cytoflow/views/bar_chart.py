@@ -103,6 +103,7 @@ class BarChartView(Base1DStatisticsView):
         return super().enum_plots(experiment)
         
         
+    @util.traced_method("plot")
     def plot(self, experiment, plot_name = None, **kwargs):
         """
         Plot a bar chart
@@ -61,6 +61,7 @@ class BaseView(HasStrictTraits):
     huefacet = Str
     huescale = util.ScaleEnum
     
+    @util.traced_method("plot")
     def plot(self, experiment, data, **kwargs):
         """
         Base function for facetted plotting
@@ -301,7 +302,87 @@ class BaseView(HasStrictTraits):
                     
     def _grid_plot(self, experiment, grid, xlim, ylim, xscale, yscale, **kwargs):
         raise NotImplementedError("You must override _grid_plot in a derived class")
+
+    def _grid_map(self, grid, compute, draw, *args, prepare = None,
+                  compute_kwargs = None, dropna = True, **kwargs):
+        """
+        A two-phase replacement for :meth:`seaborn.FacetGrid.map`, for views
+        whose per-facet work is mostly number-crunching.  Calls 
+        :meth:`_grid_compute`, then :meth:`_grid_draw`.
+
+        Returns
+        -------
+        list
+            The values returned by ``compute``, in facet order.
+        """
+        
+        results = self._grid_compute(grid, 
+                                     compute, 
+                                     *args, 
+                                     prepare = prepare, 
+                                     compute_kwargs = compute_kwargs,
+                                     dropna = dropna)
+        self._grid_draw(grid, draw, results, *args, **kwargs)
+        return results
     
+    def _grid_compute(self, grid, compute, *args, prepare = None, 
+                      compute_kwargs = None, dropna = True):
+        """
+        Call ``compute`` on each (non-empty) facet's data: the columns named 
+        in ``args``, after passing them through ``prepare`` if it is set.
+        Rows with missing values are dropped first, unless ``dropna`` is
+        ``False``.
+        
+        If there is enough data, these calls are farmed out to the worker
+        pool in :mod:`cytoflow.utility.parallel`, so ``compute`` must be a
+        module-level function and its arguments and return value must be
+        picklable.  (Scales are usually *not* picklable -- apply them in 
+        ``prepare`` instead.)
+        
+        Returns
+        -------
+        list
+            The values returned by ``compute``, in facet order.
+        """
+
+        compute_kwargs = compute_kwargs if compute_kwargs is not None else {}
+
+        # FacetGrid.map skips empty facets; so do we, so that the results
+        # line up with the calls in _grid_draw()
+        facet_args = []
+        for _, data_ijk in grid.facet_data():
+            if not data_ijk.values.size:
+                continue
+
+            facet_data = data_ijk[list(args)]
+            if dropna:
+                facet_data = facet_data.dropna()
+                
+            facet_data = [facet_data[x] for x in args]
+            if prepare:
+                facet_data = prepare(*facet_data)
+
+            facet_args.append(facet_data)
+
+        return util.parallel_map(compute,
+                                 facet_args,
+                                 size = sum(len(x[0]) for x in facet_args),
+                                 **compute_kwargs)
+        
+    def _grid_draw(self, grid, draw, results, *args, **kwargs):
+        """
+        Call ``draw`` in this process for each facet, with the value from 
+        ``results`` (computed by :meth:`_grid_compute`) as its first argument
+        and the same keyword arguments that :meth:`seaborn.FacetGrid.map` 
+        would have passed (``color``, ``label``, etc.)
+        """
+        
+        results_iter = iter(results)
+        def _draw(*_, **kwargs):
+            draw(next(results_iter), **kwargs)
+
+        grid.map(_draw, *args, **kwargs)
+
     def _update_legend(self, legend):
         pass  # no-op
         
@@ -312,6 +393,7 @@ class BaseDataView(BaseView):
 
     subset = Str
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot some data from an experiment.  This function takes care of
@@ -442,6 +524,7 @@ class Base1DView(BaseDataView):
     channel = Str
     scale = util.ScaleEnum
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Parameters
@@ -499,6 +582,7 @@ class Base2DView(BaseDataView):
     ychannel = Str
     yscale = util.ScaleEnum
 
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Parameters
@@ -565,6 +649,7 @@ class BaseNDView(BaseDataView):
     channels = List(Str)
     scale = Dict(Str, util.ScaleEnum)
 
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Parameters
@@ -683,6 +768,7 @@ class BaseStatisticsView(BaseView):
             
         return plot_enum(data.reset_index(), by)
     
+    @util.traced_method("plot")
     def plot(self, experiment, data, plot_name = None, **kwargs):
         """
         Plot some data from a statistic.
@@ -835,6 +921,7 @@ class Base1DStatisticsView(BaseStatisticsView):
         data = self._make_data(experiment)
         return super().enum_plots(experiment, data)
     
+    @util.traced_method("plot")
     def plot(self, experiment, plot_name = None, **kwargs):
         """
         Parameters
@@ -905,11 +992,7 @@ class Base1DStatisticsView(BaseStatisticsView):
                                              "Data statistic and error statistic "
                                              "don't have the same index.")
                 
-            try:
-                error_stat.index = error_stat.index.reorder_levels(stat.index.names)
-                error_stat.sort_index(inplace = True)
-            except AttributeError:
-                pass
+            error_stat = _reorder_levels(error_stat, stat.index.names)
             
             if not stat.index.equals(error_stat.index):
                 raise util.CytoflowViewError('error_statistic',
@@ -973,6 +1056,7 @@ class Base2DStatisticsView(BaseStatisticsView):
         data = self._make_data(experiment)
         return super().enum_plots(experiment, data)
     
+    @util.traced_method("plot")
     def plot(self, experiment, plot_name = None, **kwargs):
         """
         Parameters
@@ -1040,11 +1124,7 @@ class Base2DStatisticsView(BaseStatisticsView):
                                              "X data statistic and error statistic "
                                              "don't have the same index.")
                
-            try:
-                x_error_stat.index = x_error_stat.index.reorder_levels(xstat.index.names)
-                x_error_stat.sort_index(inplace = True)
-            except AttributeError:
-                pass
+            x_error_stat = _reorder_levels(x_error_stat, xstat.index.names)
             
             if not xstat.index.equals(x_error_stat.index):
                 raise util.CytoflowViewError('x_error_statistic',
@@ -1087,11 +1167,7 @@ class Base2DStatisticsView(BaseStatisticsView):
                                              "Y data statistic and error statistic "
                                              "don't have the same index.")
             
-            try:
-                y_error_stat.index = y_error_stat.index.reorder_levels(ystat.index.names)
-                y_error_stat.sort_index(inplace = True)
-            except AttributeError:
-                pass
+            y_error_stat = _reorder_levels(y_error_stat, ystat.index.names)
             
             if not ystat.index.equals(y_error_stat.index):
                 raise util.CytoflowViewError('y_error_statistic',
@@ -1113,11 +1189,7 @@ class Base2DStatisticsView(BaseStatisticsView):
                                          "X and Y data statistics "
                                          "don't have the same index.")
                
-        try:
-            ystat.index = ystat.index.reorder_levels(xstat.index.names)
-            ystat.sort_index(inplace = True)
-        except AttributeError:
-            pass
+        ystat = _reorder_levels(ystat, xstat.index.names)
         
         intersect_idx = xstat.index.intersection(ystat.index)
         xstat = xstat.reindex(intersect_idx)
@@ -1137,5 +1209,18 @@ class Base2DStatisticsView(BaseStatisticsView):
             
         return data
 
-
-
+def _reorder_levels(stat, names):
+    """
+    A copy of statistic ``stat``, with its index levels in the order given by
+    ``names`` and sorted.  (Statistics are shared between experiments, so 
+    don't modify them in place.)
+    """
+    
+    stat = stat.copy()
+    try:
+        stat.index = stat.index.reorder_levels(names)
+        stat.sort_index(inplace = True)
+    except AttributeError:
+        pass
+    
+    return stat
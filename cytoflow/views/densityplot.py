@@ -90,6 +90,7 @@ class DensityView(Base2DView):
     
     huefacet = Constant(None)
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot a faceted density plot view of a channel
@@ -158,21 +159,27 @@ class DensityView(Base2DView):
         xbins = xscale.inverse(np.linspace(xscale(xlim[0]), xscale(xlim[1]), gridsize))
         ybins = yscale.inverse(np.linspace(yscale(ylim[0]), yscale(ylim[1]), gridsize))
   
+        # compute the histograms (possibly in parallel) before drawing any
+        # of them, so we can set up the range of the color map.
+        hists = self._grid_compute(grid, 
+                                   _density_hist, 
+                                   self.xchannel, 
+                                   self.ychannel,
+                                   compute_kwargs = {'xbins' : xbins, 
+                                                     'ybins' : ybins,
+                                                     'smoothed' : kwargs.pop('smoothed', False),
+                                                     'smoothed_sigma' : kwargs.pop('smoothed_sigma', 1)})
+        
         # set up the range of the color map
         if 'norm' not in kwargs:
-            data_max = 0
-            for _, data_ijk in grid.facet_data():
-                x = data_ijk[self.xchannel]
-                y = data_ijk[self.ychannel]
-                h, _, _ = np.histogram2d(x, y, bins=[xbins, ybins])
-                data_max = max(data_max, h.max())
+            data_max = max([h_max for h_max, _, _, _ in hists], default = 0)
                 
             hue_scale = util.scale_factory(self.huescale, 
                                            experiment, 
                                            data = np.array([1, data_max]))
             kwargs['norm'] = hue_scale.norm()
         
-        grid.map(_densityplot, self.xchannel, self.ychannel, xbins = xbins, ybins = ybins, **kwargs)
+        self._grid_draw(grid, _densityplot, hists, self.xchannel, self.ychannel, **kwargs)
                
         return dict(xlim = xlim,
                     xscale = xscale,
@@ -182,15 +189,21 @@ class DensityView(Base2DView):
                     norm = kwargs['norm'])
         
         
-def _densityplot(x, y, xbins, ybins, **kwargs):
+def _density_hist(x, y, xbins, ybins, smoothed = False, smoothed_sigma = 1):
     
     h, X, Y = np.histogram2d(x, y, bins=[xbins, ybins])
     
-    smoothed = kwargs.pop('smoothed', False)
-    smoothed_sigma = kwargs.pop('smoothed_sigma', 1)
+    # the color scale is set by the unsmoothed maximum
+    h_max = h.max()
     
     if smoothed:
         h = scipy.ndimage.filters.gaussian_filter(h, sigma = smoothed_sigma)
+        
+    return h_max, h, X, Y
+
+def _densityplot(hist, **kwargs):
+    
+    _, h, X, Y = hist
 
     ax = plt.gca()
     ax.pcolormesh(X, Y, h.T, **kwargs)
@@ -25,6 +25,7 @@ cytoflow.views.export_fcs
 import re
 from pathlib import Path
 from copy import copy
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from traits.api import (Constant, List, Str, Bool, Dict, Directory, 
                         HasStrictTraits)
@@ -61,6 +62,11 @@ class ExportFCS(HasStrictTraits):
         
     subset : str
         A Python expression used to select a subset of the data
+        
+    parallel : Bool (default = False)
+        Write the files concurrently, using up to 
+        :func:`~.parallel.get_num_workers` threads.  The threads share the
+        experiment's channel arrays, so the data isn't copied to them.
     
     Examples
     --------
@@ -95,6 +101,7 @@ class ExportFCS(HasStrictTraits):
     keywords = Dict(Str, Str)
     
     subset = Str
+    parallel = Bool(False)
     
     _include_by = Bool(True)
     
@@ -111,76 +118,10 @@ class ExportFCS(HasStrictTraits):
         if experiment is None:
             raise util.CytoflowViewError('experiment', "No experiment specified")   
         
-        if len(self.by) == 0:
-            raise util.CytoflowViewError('by',
-                                         "You must specify some variables in `by`")
-
-        for b in self.by:
-            if b not in experiment.conditions:
-                raise util.CytoflowOpError('by',
-                                           "Aggregation metadata {} not found, "
-                                           "must be one of {}"
-                                           .format(b, experiment.conditions))
-                
-        if self.subset:
-            try:
-                experiment = experiment.query(self.subset)
-            except util.CytoflowError as e:
-                raise util.CytoflowViewError('subset', str(e)) from e
-            except Exception as e:
-                raise util.CytoflowViewError('subset',
-                                             "Subset string '{0}' isn't valid"
-                                             .format(self.subset)) from e
-                 
-            if len(experiment) == 0:
-                raise util.CytoflowViewError('subset',
-                                             "Subset string '{0}' returned no events"
-                                             .format(self.subset))
-                        
-        class file_enum(object):
-            
-            def __init__(self, by, base, _include_by, experiment):
-                self._iter = None
-                self._returned = False
-                self.by = by
-                self.base = base
-                self._include_by = _include_by
-                
-                if by:
-                    self._iter = experiment.data.groupby(by).__iter__()
-                
-            def __iter__(self):
-                return self
-            
-            def __next__(self):
-                if self._iter:
-                    values = next(self._iter)[0]
-                    
-                    if len(self.by) == 1:
-                        values = [values]
-                    
-                    parts = []
-                    for i, name in enumerate(self.by):
-                        if self._include_by:
-                            parts.append(name + '_' + str(values[i]))
-                        else:
-                            parts.append(str(values[i]))
-                        
-                    if self.base:
-                        return self.base + '_' + '_'.join(parts) + '.fcs'
-                    else:
-                        return '_'.join(parts) + '.fcs'
-                        
-                else:
-                    if self._returned:
-                        raise StopIteration
-                    else:
-                        self._returned = True
-                        return None
-            
-        return file_enum(self.by, self.base, self._include_by, experiment)
+        experiment = self._subset(experiment)
+        return iter([self._filename(group) for group in self._groups(experiment)])
     
-    def export(self, experiment):
+    def export(self, experiment, progress = None):
         """
         Export FCS files from an experiment.
         
@@ -188,6 +129,10 @@ class ExportFCS(HasStrictTraits):
         ----------
         experiment : Experiment
             The :class:`.Experiment` to export
+            
+        progress : Callable (optional)
+            Called as ``progress(done, total, filename)`` after each file is 
+            written, in the calling thread.
         """
         
         if experiment is None:
@@ -207,27 +152,17 @@ class ExportFCS(HasStrictTraits):
                                        'Output directory {} must exist')
         
         # also tests for good experiment, self.by
-        for filename in self.enum_files(experiment):
-            p = d / filename
+        experiment = self._subset(experiment)
+        
+        # the row positions of each group, computed once
+        groups = self._groups(experiment)
+        
+        for group in groups:
+            p = d / self._filename(group)
             if p.is_file():
                 raise util.CytoflowOpError('path',
                                            'File {} already exists'
                                            .format(p)) 
-                
-        if self.subset:
-            try:
-                experiment = experiment.query(self.subset)
-            except util.CytoflowError as e:
-                raise util.CytoflowViewError('subset', str(e)) from e
-            except Exception as e:
-                raise util.CytoflowViewError('subset',
-                                             "Subset string '{0}' isn't valid"
-                                             .format(self.subset)) from e
-                 
-            if len(experiment) == 0:
-                raise util.CytoflowViewError('subset',
-                                             "Subset string '{0}' returned no events"
-                                             .format(self.subset))
             
         tube0, common_metadata = list(experiment.metadata['fcs_metadata'].items())[0]
         common_metadata = copy(common_metadata)
@@ -254,41 +189,113 @@ class ExportFCS(HasStrictTraits):
         for i, channel in enumerate(experiment.channels):
             if 'voltage' in experiment.metadata[channel]:
                 common_metadata['$P{}V'.format(i + 1)] = experiment.metadata[channel]['voltage']
-            
+                
+        kws = copy(self.keywords)
+        kws.update(common_metadata)
+        kws = {k : str(v) for k, v in kws.items()}
         
-        for group, data_subset in experiment.data.groupby(self.by):
-            data_subset = data_subset[experiment.channels]
-            
-            if len(self.by) == 1:
-                group = [group]
-            
-            parts = []
-            kws = copy(self.keywords)
-            kws.update(common_metadata)
-            kws = {k : str(v) for k, v in kws.items()}
+        # every file is written from the same channel arrays
+        channels = experiment.channels
+        columns = [experiment.data[c].values for c in channels]
+        ranges = {c: experiment.metadata[c]['range'] for c in channels}
+        
+        def write(group, rows):
+            filename = self._filename(group)
             
-            for i, name in enumerate(self.by):
-                if self._include_by:
-                    parts.append(name + '_' + str(group[i]))
-                else:
-                    parts.append(str(group[i]))
-                    kws["CF_" + name] = str(group[i])
-                
-            if self.base:
-                filename = self.base + '_' + '_'.join(parts) + '.fcs'
-            else:
-                filename = '_'.join(parts) + '.fcs'
+            group_kws = copy(kws)
+            if not self._include_by:
+                for name, value in zip(self.by, group):
+                    group_kws["CF_" + name] = str(value)
                 
-        
-            full_path = d / filename
-            util.write_fcs(str(full_path), 
-                           experiment.channels, 
-                           {c: experiment.metadata[c]['range'] for c in experiment.channels},
-                           data_subset.values,
+            util.write_fcs(str(d / filename), 
+                           channels, 
+                           ranges,
+                           columns,
+                           rows = rows,
                            compat_chn_names = False,
                            compat_negative = False,
-                           **kws)
+                           **group_kws)
             
+            return filename
+        
+        total = len(groups)
+        num_workers = min(util.get_num_workers(), total) if self.parallel else 1
+        
+        if num_workers < 2:
+            for done, (group, rows) in enumerate(groups.items()):
+                util.check_cancelled()
+                filename = write(group, rows)
+                if progress:
+                    progress(done + 1, total, filename)
+                    
+            return
+        
+        # numpy and file I/O release the GIL, so threads can write files
+        # concurrently -- and they share the channel arrays, instead of
+        # pickling them to worker processes.
+        with ThreadPoolExecutor(max_workers = num_workers,
+                                thread_name_prefix = "export fcs") as executor:
+            futures = [executor.submit(write, group, rows) 
+                       for group, rows in groups.items()]
+            try:
+                for done, f in enumerate(as_completed(futures)):
+                    filename = f.result()
+                    util.check_cancelled()
+                    if progress:
+                        progress(done + 1, total, filename)
+            except BaseException:
+                for f in futures:
+                    f.cancel()
+                raise
             
+    def _subset(self, experiment):
+        if len(self.by) == 0:
+            raise util.CytoflowViewError('by',
+                                         "You must specify some variables in `by`")
+
+        for b in self.by:
+            if b not in experiment.conditions:
+                raise util.CytoflowOpError('by',
+                                           "Aggregation metadata {} not found, "
+                                           "must be one of {}"
+                                           .format(b, experiment.conditions))
+                
+        if self.subset:
+            try:
+                experiment = experiment.query(self.subset)
+            except util.CytoflowError as e:
+                raise util.CytoflowViewError('subset', str(e)) from e
+            except Exception as e:
+                raise util.CytoflowViewError('subset',
+                                             "Subset string '{0}' isn't valid"
+                                             .format(self.subset)) from e
+                 
+            if len(experiment) == 0:
+                raise util.CytoflowViewError('subset',
+                                             "Subset string '{0}' returned no events"
+                                             .format(self.subset))
+                
+        return experiment
     
-    
\ No newline at end of file
+    def _groups(self, experiment):
+        """
+        Returns a dict mapping each combination of the ``by`` conditions 
+        (as a tuple) to the positions of its rows.
+        """
+        
+        indices = experiment.data.groupby(self.by, observed = True).indices
+        return {(group if isinstance(group, tuple) else (group,)) : rows
+                for group, rows in indices.items()}
+    
+    def _filename(self, group):
+        parts = []
+        for name, value in zip(self.by, group):
+            if self._include_by:
+                parts.append(name + '_' + str(value))
+            else:
+                parts.append(str(value))
+            
+        if self.base:
+            return self.base + '_' + '_'.join(parts) + '.fcs'
+        else:
+            return '_'.join(parts) + '.fcs'
@@ -72,6 +72,7 @@ class HistogramView(Base1DView):
     id = Constant("edu.mit.synbio.cytoflow.view.histogram")
     friendly_id = Constant("Histogram") 
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot a faceted histogram view of a channel
@@ -178,34 +179,32 @@ class HistogramView(Base1DView):
             kwargs['linewidth'] = 0 if kwargs['histtype'] == "stepfilled" else 2
         
         # if we have a hue facet, the y scaling is frequently wrong.  this
-        # will capture the maximum bin count of each call to plt.hist, so 
+        # will capture the maximum bin count of each call to plt.hist, so
         # we don't have to compute the histogram multiple times
         count_max = []
-        
-        def hist_lims(*args, **kwargs):
-            # there's some bug in the above code where we get data that isn't
-            # in the range of `bins`, which makes hist() puke.  so get rid
-            # of it.
-            
+
+        # the bin counts are computed (possibly in parallel) by _hist_counts;
+        # here we just draw them.
+        def hist_lims(counts, **kwargs):
             bins = kwargs.get('bins')
-            new_args = []
-            for x in args:
-                x = x[x > bins[0]]
-                x = x[x < bins[-1]]
-                new_args.append(x)
-                
+
             if scale.name != "linear" and kwargs.get("density"):
                 kwargs["density"] = False
-                counts, _ = np.histogram(new_args, bins=kwargs["bins"])
                 kwargs["weights"] = counts / np.sum(counts)
-                n, _, _ = plt.hist(kwargs["bins"][:-1], **kwargs)
             else:
-                n, _, _ = plt.hist(*new_args, **kwargs)
+                kwargs["weights"] = counts
+
+            n, _, _ = plt.hist(bins[:-1], **kwargs)
 
             count_max.append(max(n))
-                    
-        grid.map(hist_lims, self.channel, **kwargs)
-        
+
+        self._grid_map(grid,
+                       _hist_counts,
+                       hist_lims,
+                       self.channel,
+                       compute_kwargs = {'bins' : kwargs['bins']},
+                       **kwargs)
+
         ret = {}
         if kwargs['orientation'] == 'vertical':
             ret['xscale'] = scale
@@ -218,5 +217,14 @@ class HistogramView(Base1DView):
             
         return ret
 
+def _hist_counts(x, bins):
+    # there's some bug in the bin-finding code where we get data that isn't
+    # in the range of `bins`, which makes hist() puke.  so get rid of it.
+    x = x[x > bins[0]]
+    x = x[x < bins[-1]]
+
+    counts, _ = np.histogram(x, bins = bins)
+    return counts
+
 util.expand_class_attributes(HistogramView)
 util.expand_method_parameters(HistogramView, HistogramView.plot)
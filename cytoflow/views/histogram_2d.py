@@ -86,6 +86,7 @@ class Histogram2DView(Base2DView):
     id = 'edu.mit.synbio.cytoflow.view.histogram2d'
     friend_id = "2D Histogram"
         
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot a faceted density plot view of a channel
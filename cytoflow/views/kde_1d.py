@@ -74,6 +74,7 @@ class Kde1DView(Base1DView):
     id = Constant("edu.mit.synbio.cytoflow.view.kde1d")
     friendly_id = Constant("1D Kernel Density") 
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot a smoothed histogram view of a channel
@@ -131,8 +132,21 @@ class Kde1DView(Base1DView):
         
         scale = kwargs.pop('scale')[self.channel]
         lim = kwargs.pop('lim')[self.channel]
-                  
-        grid.map(_univariate_kdeplot, self.channel, scale = scale, **kwargs)
+
+        # the kernel density estimates are computed (possibly in parallel)
+        # in scaled units; then they're drawn in data units.
+        compute_kwargs = {k : kwargs.pop(k) 
+                          for k in ['kernel', 'bw', 'gridsize', 'cut', 'clip'] 
+                          if k in kwargs}
+
+        self._grid_map(grid,
+                       _univariate_kde,
+                       _univariate_kdeplot,
+                       self.channel,
+                       prepare = lambda x: (scale(x), ),
+                       compute_kwargs = compute_kwargs,
+                       scale = scale,
+                       **kwargs)
         
         ret = {}
         if kwargs['orientation'] == 'vertical':
@@ -147,17 +161,11 @@ class Kde1DView(Base1DView):
 
 # yoinked from seaborn/distributions.py, with modifications for scaling.
 
-def _univariate_kdeplot(data, scale=None, shade=False, kernel="gaussian",
-        bw="scott", gridsize=100, cut=3, clip=None, legend=True,
-        ax=None, orientation = "vertical", **kwargs):
+def _univariate_kde(scaled_data, kernel="gaussian", bw="scott", gridsize=100, 
+                    cut=3, clip=None):
     
-    if ax is None:
-        ax = plt.gca()
-        
     if clip is None:
         clip = (-np.inf, np.inf)
-
-    scaled_data = scale(data)
     
     # mask out the data that's not in the scale domain
     scaled_data = scaled_data[~np.isnan(scaled_data)]  
@@ -179,8 +187,16 @@ def _univariate_kdeplot(data, scale=None, shade=False, kernel="gaussian",
     kde = KernelDensity(kernel = kernel, bandwidth = bw).fit(scaled_data.to_numpy()[:, np.newaxis])
     log_density = kde.score_samples(support)
 
-    x = scale.inverse(support[:, 0])
-    y = np.exp(log_density)
+    return support[:, 0], np.exp(log_density)
+
+def _univariate_kdeplot(kde, scale=None, shade=False, legend=True,
+                        ax=None, orientation = "vertical", **kwargs):
+    
+    if ax is None:
+        ax = plt.gca()
+        
+    support, y = kde
+    x = scale.inverse(support)
 
     # Check if a label was specified in the call
     label = kwargs.pop("label", None)
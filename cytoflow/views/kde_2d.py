@@ -75,6 +75,7 @@ class Kde2DView(Base2DView):
     id = Constant('edu.mit.synbio.cytoflow.view.kde2d')
     friend_id = Constant("2D Kernel Density Estimate")
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot a faceted 2d kernel density estimate
@@ -130,13 +131,23 @@ class Kde2DView(Base2DView):
 
         legend_data = {}
 
-        grid.map(_bivariate_kdeplot, 
-                 self.xchannel, 
-                 self.ychannel, 
-                 xscale = xscale, 
-                 yscale = yscale, 
-                 legend_data = legend_data,
-                 **kwargs)
+        compute_kwargs = {k : kwargs.pop(k) 
+                          for k in ['bw', 'gridsize', 'cut'] 
+                          if k in kwargs}
+
+        self._grid_map(grid,
+                       _bivariate_kde,
+                       _bivariate_kdeplot,
+                       self.xchannel, 
+                       self.ychannel, 
+                       prepare = lambda x, y: (xscale(x), yscale(y)),
+                       compute_kwargs = compute_kwargs,
+                       xscale = xscale, 
+                       yscale = yscale, 
+                       xlabel = self.xchannel,
+                       ylabel = self.ychannel,
+                       legend_data = legend_data,
+                       **kwargs)
                 
         return dict(xlim = xlim,
                     xscale = xscale,
@@ -145,18 +156,10 @@ class Kde2DView(Base2DView):
                     legend_data = legend_data)
         
 # yoinked from seaborn/distributions.py, with modifications for scaling.
-def _bivariate_kdeplot(x, y, xscale=None, yscale=None, shade=False,
-                       bw="scott", gridsize=50, cut=3, clip=None, legend=True, 
-                       legend_data = None, **kwargs):
-    
-    ax = plt.gca()
-    label = kwargs.pop('label', None)
+def _bivariate_kde(x, y, bw="scott", gridsize=50, cut=3):
     
     # Determine the clipping
     clip = [(-np.inf, np.inf), (-np.inf, np.inf)]
-        
-    x = xscale(x)
-    y = yscale(y)
 
     x_nan = np.isnan(x)
     y_nan = np.isnan(y)
@@ -187,6 +190,17 @@ def _bivariate_kdeplot(x, y, xscale=None, yscale=None, shade=False,
     z = kde.score_samples(np.column_stack((xx.ravel(), yy.ravel())))
     z = z.reshape(xx.shape)
     z = np.exp(z)
+    
+    return x_support, y_support, z, bw
+
+def _bivariate_kdeplot(kde, xscale=None, yscale=None, xlabel=None, ylabel=None,
+                       shade=False, clip=None, legend=True, legend_data = None, 
+                       **kwargs):
+    
+    ax = plt.gca()
+    label = kwargs.pop('label', None)
+    
+    x_support, y_support, z, bw = kde
 
     n_levels = kwargs.pop("n_levels", 10)
     color = kwargs.pop("color")
@@ -216,10 +230,10 @@ def _bivariate_kdeplot(x, y, xscale=None, yscale=None, shade=False,
         cset.collections[el].set_alpha(alpha[el])
 
     # Label the axes
-    if hasattr(x, "name") and legend:
-        ax.set_xlabel(x.name)
-    if hasattr(y, "name") and legend:
-        ax.set_ylabel(y.name)
+    if xlabel is not None and legend:
+        ax.set_xlabel(xlabel)
+    if ylabel is not None and legend:
+        ax.set_ylabel(ylabel)
         
     if label is not None:
         ax.set_title(label)
@@ -80,6 +80,7 @@ class ParallelCoordinatesView(BaseNDView):
     id = Constant('edu.mit.synbio.cytoflow.view.parallel_coords')
     friend_id = Constant("Parallel Coordinates Plot")
         
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot a faceted parallel coordinates plot
@@ -110,6 +110,7 @@ class RadvizView(BaseNDView):
     id = Constant('edu.mit.synbio.cytoflow.view.radviz')
     friend_id = Constant("Radviz Plot")
         
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot a faceted Radviz plot
@@ -72,6 +72,7 @@ class ScatterplotView(Base2DView):
     id = Constant('edu.mit.synbio.cytoflow.view.scatterplot')
     friend_id = Constant("Scatter Plot")
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot a faceted scatter plot view of a channel
@@ -106,6 +106,7 @@ class Stats1DView(Base1DStatisticsView):
         return super().enum_plots(experiment)
         
     
+    @util.traced_method("plot")
     def plot(self, experiment, plot_name = None, **kwargs):
         """Plot a chart of a variable's values against a statistic.
         
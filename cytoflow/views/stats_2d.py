@@ -101,6 +101,7 @@ class Stats2DView(Base2DStatisticsView):
                 
         return super().enum_plots(experiment)
             
+    @util.traced_method("plot")
     def plot(self, experiment, plot_name = None, **kwargs):
         """
         Plot a chart of two statistics' values as a common variable changes.
@@ -125,6 +125,7 @@ class TableView(HasStrictTraits):
     
     subset = Str
 
+    @util.traced_method("plot")
     def plot(self, experiment, plot_name = None, **kwargs):
         """Plot a table"""
         
@@ -25,6 +25,7 @@ cytoflow.views.violin
 from traits.api import Str, provides, Constant
 
 import numpy as np
+import matplotlib as mpl
 import matplotlib.pyplot as plt
 
 import cytoflow.utility as util
@@ -75,6 +76,7 @@ class ViolinPlotView(Base1DView):
 
     variable = Str
     
+    @util.traced_method("plot")
     def plot(self, experiment, **kwargs):
         """
         Plot a violin plot of a variable
@@ -154,12 +156,28 @@ class ViolinPlotView(Base1DView):
         if self.huefacet:
             violin_args.append(self.huefacet)
             
-        grid.map(_violinplot,   
-                 *violin_args,      
-                 order = np.sort(experiment[self.variable].unique()),
-                 hue_order = (np.sort(experiment[self.huefacet].unique()) if self.huefacet else None),
-                 data_scale = scale,
-                 **kwargs)
+        if kwargs['orientation'] == 'horizontal':
+            prepare = lambda x, y, *hue: (scale(x), y, *hue)
+        else:
+            prepare = lambda x, y, *hue: (x, scale(y), *hue)
+        
+        compute_kwargs = {k : kwargs.pop(k) 
+                          for k in ['bw', 'cut', 'scale_plot', 'scale_hue', 
+                                    'gridsize', 'width', 'inner', 'split', 
+                                    'dodge'] 
+                          if k in kwargs}
+        compute_kwargs['orientation'] = kwargs['orientation']
+        compute_kwargs['order'] = np.sort(experiment[self.variable].unique())
+        compute_kwargs['hue_order'] = (np.sort(experiment[self.huefacet].unique()) if self.huefacet else None)
+        
+        self._grid_map(grid,
+                       _violin_densities,
+                       _violinplot,
+                       *violin_args,
+                       prepare = prepare,
+                       compute_kwargs = compute_kwargs,
+                       data_scale = scale,
+                       **kwargs)
         
         if kwargs['orientation'] == 'horizontal':
             return {"xscale" : scale, "xlim" : lim}
@@ -170,23 +188,27 @@ class ViolinPlotView(Base1DView):
 
 from seaborn.categorical import _ViolinPlotter
 
-def _violinplot(x=None, y=None, hue=None, data=None, order=None, hue_order=None,
-                bw="scott", cut=2, scale_plot="area", scale_hue=True, gridsize=100,
-                width=.8, inner="box", split=False, dodge=True, orientation=None, linewidth=None,
-                color=None, palette=None, saturation=.75, ax=None, data_scale = None,
-                **kwargs):
+def _violin_densities(x=None, y=None, hue=None, order=None, hue_order=None,
+                      bw="scott", cut=2, scale_plot="area", scale_hue=True, 
+                      gridsize=100, width=.8, inner="box", split=False, 
+                      dodge=True, orientation=None):
+    
+    # colors and line widths are set when we draw, in the plotting process
+    return _ViolinPlotter(x, y, hue, None, order, hue_order,
+                          bw, cut, scale_plot, scale_hue, gridsize,
+                          width, inner, split, dodge, orientation, None,
+                          None, None, .75)
+
+def _violinplot(plotter, linewidth=None, color=None, palette=None, 
+                saturation=.75, ax=None, data_scale = None, **kwargs):
     
     # discards kwargs
     
-    if orientation and orientation == 'horizontal':
-        x = data_scale(x)
-    else:
-        y = data_scale(y)
-            
-    plotter = _ViolinPlotter(x, y, hue, data, order, hue_order,
-                             bw, cut, scale_plot, scale_hue, gridsize,
-                             width, inner, split, dodge, orientation, linewidth,
-                             color, palette, saturation)
+    plotter.establish_colors(color, palette, saturation)
+    
+    if linewidth is None:
+        linewidth = mpl.rcParams["lines.linewidth"]
+    plotter.linewidth = linewidth
 
     for i in range(len(plotter.support)):
         if plotter.hue_names is None:       
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+cytoflowgui.batch_run
+---------------------
+
+Run a workflow saved by the GUI (a ``.flow`` file) on a list of plates,
+without the GUI.
+
+Each plate is a directory of FCS files.  The files named by the workflow's
+import operation are looked up *by name* in each plate's directory, so a
+workflow set up on one day's plate can be re-run on every other day's plates
+as long as the wells are named the same way.  The operations are run in order
+(estimating the ones that need it, like "Run all" in the GUI), one plate per
+worker process.  For each plate, the output directory gets:
+
+  - one CSV file for each statistic in the final experiment, and
+  - (unless ``--no-fcs``) the final experiment's events, exported as FCS
+    files by :class:`~.ExportFCS`.
+
+A table of how long each operation took is printed when all the plates are
+done, and saved as ``timing.csv`` in the output directory.
+
+Loading a ``.flow`` file needs the GUI's operation plugins (and so Qt),
+which is why this lives in :mod:`cytoflowgui` -- but it doesn't need a
+display: the Qt platform defaults to ``offscreen``.
+'''
+
+import argparse, os, sys, time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+
+import pandas as pd
+
+def load_workflow(path):
+    """
+    Load a ``.flow`` file saved by the GUI and return its list of operations.
+    """
+
+    # the op plugins import traitsui's qt backend; we don't need a display.
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    # registers the operations' and views' serialization adapters
+    import cytoflowgui.op_plugins    # @UnusedImport
+    import cytoflowgui.view_plugins  # @UnusedImport
+    from cytoflowgui.serialization import load_yaml
+
+    workflow = load_yaml(path)
+
+    if not workflow or \
+       workflow[0].operation.id != "edu.mit.synbio.cytoflow.operations.import":
+        raise RuntimeError("{} doesn't start with an import operation -- "
+                           "is it a Cytoflow file?".format(path))
+
+    return [wi.operation for wi in workflow]
+
+def set_plate(import_op, plate):
+    """
+    Point the tubes of ``import_op`` at the files with the same names in
+    the directory ``plate``.
+    """
+
+    plate = Path(plate)
+    missing = []
+    for tube in import_op.tubes:
+        new_file = plate / Path(tube.file).name
+        if not new_file.exists():
+            missing.append(new_file.name)
+        tube.file = str(new_file)
+
+    if missing:
+        raise RuntimeError("Plate {} is missing {}"
+                           .format(plate, ", ".join(missing)))
+
+def run_plate(flow_file, plate, output, export_fcs = True, export_by = None):
+    """
+    Run the workflow in ``flow_file`` on one plate and write its results
+    to ``output``.
+
+    Returns
+    -------
+    list of dict
+        The timing of each step: the operation's index and name, whether it
+        was an ``estimate`` or an ``apply``, the time it took in seconds, and
+        the number of events in the result.
+    """
+
+    import cytoflow as flow
+    import cytoflow.utility as util
+
+    # we're already running one plate per core
+    util.set_num_workers(1)
+
+    ops = load_workflow(flow_file)
+    set_plate(ops[0], plate)
+
+    timing = []
+    ex = None
+    for idx, op in enumerate(ops):
+        op_name = "{} {}".format(op.__class__.__name__, op.name) \
+                  if getattr(op, 'name', None) else op.__class__.__name__
+
+        if hasattr(op, "estimate"):
+            start = time.perf_counter()
+            op.estimate(ex)
+            timing.append({"plate" : Path(plate).name,
+                           "index" : idx,
+                           "operation" : op_name,
+                           "step" : "estimate",
+                           "seconds" : time.perf_counter() - start,
+                           "events" : len(ex) if ex is not None else 0})
+
+        start = time.perf_counter()
+        ex = op.apply(ex)
+        timing.append({"plate" : Path(plate).name,
+                       "index" : idx,
+                       "operation" : op_name,
+                       "step" : "apply",
+                       "seconds" : time.perf_counter() - start,
+                       "events" : len(ex)})
+
+    out = Path(output)
+    out.mkdir(parents = True, exist_ok = True)
+
+    for (name, stat), value in ex.statistics.items():
+        value.to_frame(name = stat) \
+             .to_csv(out / "{}_{}.csv".format(name, stat))
+
+    if export_fcs:
+        if export_by is None:
+            export_by = list(ops[0].conditions.keys())
+
+        if not export_by:
+            # ExportFCS needs something to split the events by; with no
+            # conditions, export them all to one file named for the plate.
+            ex = ex.clone()
+            ex.add_condition("plate", "category",
+                             pd.Series(Path(plate).name, index = ex.data.index))
+            export_by = ["plate"]
+
+        flow.ExportFCS(path = str(out), by = export_by).export(ex)
+
+    return timing
+
+def _run_plate(flow_file, plate, output, export_fcs, export_by):
+    # return exceptions instead of raising them, so one bad plate doesn't
+    # hide the others' results.
+    try:
+        return plate, run_plate(flow_file, plate, output, export_fcs, export_by), None
+    except Exception as e:
+        return plate, [], "{}: {}".format(e.__class__.__name__, e)
+
+def _run_plate_task(task):
+    return _run_plate(*task)
+
+def _run_plates(tasks, jobs):
+    """
+    Run :func:`_run_plate` for each tuple of arguments in ``tasks`` in 
+    ``jobs`` worker processes, and yield the results as they finish.
+    """
+    
+    # always spawn the workers: the Qt and matplotlib imports in 
+    # load_workflow() don't survive a fork.  before Python 3.7, 
+    # ProcessPoolExecutor can't be told to, but multiprocessing.Pool can.
+    context = multiprocessing.get_context('spawn')
+    
+    if sys.version_info < (3, 7):
+        with context.Pool(processes = jobs) as pool:
+            yield from pool.imap_unordered(_run_plate_task, tasks)
+    else:
+        with ProcessPoolExecutor(max_workers = jobs, 
+                                 mp_context = context) as executor:
+            futures = [executor.submit(_run_plate, *task) for task in tasks]
+            for future in as_completed(futures):
+                yield future.result()
+
+def main():
+    parser = argparse.ArgumentParser(description = "Run a saved Cytoflow "
+                                     "workflow on one or more plates")
+    parser.add_argument("flow_file", help = "Workflow (.flow file) to run")
+    parser.add_argument("plates", nargs = "+",
+                        help = "Directories of FCS files, one per plate")
+    parser.add_argument("-o", "--output", default = ".",
+                        help = "Where to write the results; each plate gets "
+                               "a subdirectory named after it")
+    parser.add_argument("-j", "--jobs", type = int, default = os.cpu_count(),
+                        help = "How many plates to run at once")
+    parser.add_argument("--no-fcs", action = "store_true",
+                        help = "Don't export the final events as FCS files")
+    parser.add_argument("--export-by", nargs = "+", default = None,
+                        help = "The conditions to split the exported FCS "
+                               "files by (default: the import conditions)")
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    names = [Path(p).resolve().name for p in args.plates]
+    if len(set(names)) != len(names):
+        parser.error("Plate directories must have different names")
+
+    # make sure the workflow loads before we start any workers
+    try:
+        load_workflow(args.flow_file)
+    except Exception as e:
+        parser.error("Couldn't load {}: {}".format(args.flow_file, e))
+
+    timing = []
+    failed = []
+    tasks = [(args.flow_file, plate, str(output / name), not args.no_fcs, args.export_by)
+             for plate, name in zip(args.plates, names)]
+    
+    for plate, plate_timing, error in _run_plates(tasks, max(1, min(args.jobs, len(tasks)))):
+        if error:
+            print("{}: FAILED: {}".format(plate, error), file = sys.stderr)
+            failed.append(plate)
+        else:
+            print("{}: done".format(plate))
+            timing.extend(plate_timing)
+
+    if timing:
+        timing = pd.DataFrame(timing)
+        output.mkdir(parents = True, exist_ok = True)
+        timing.to_csv(output / "timing.csv", index = False)
+
+        summary = timing.groupby(["index", "operation", "step"], sort = True)['seconds'] \
+                        .agg(['mean', 'max', 'sum'])
+        print()
+        print(summary.to_string(float_format = "{:.3f}".format))
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -31,7 +31,7 @@ from cytoflowgui.util import CallbackHandler
 
 from envisage.ui.tasks.api import TasksApplication
 from envisage.ui.tasks.tasks_application import TasksApplicationState
-from pyface.api import error
+from pyface.api import error, GUI
 from pyface.tasks.api import TaskWindowLayout
 from traits.api import Bool, Instance, List, Property, Str, Any, File
 
@@ -74,6 +74,7 @@ class CytoflowApplication(TasksApplication):
     application_log = Instance(io.StringIO, ())
     
     # local process's central model
+    remote_pool = Any
     remote_process = Any
     remote_connection = Any
     model = Instance(Workflow)
@@ -111,7 +112,9 @@ class CytoflowApplication(TasksApplication):
         # must redirect to the gui thread
         self.on_trait_change(self.show_error, 'application_error', dispatch = 'ui')
                 
-        # set up the model
+        # start the remote process and set up the model
+        self.remote_process, self.remote_connection = \
+            self.remote_pool.start(on_exit = self._remote_process_exited)
         self.model = Workflow(remote_connection = self.remote_connection,
                               debug = self.debug)
         
@@ -126,9 +129,29 @@ class CytoflowApplication(TasksApplication):
                     "Afterwards, may need to restart Cytoflow to continue working.\n\n" 
                     + error_string)
         
+    def restart_remote_process(self):
+        """
+        Replace the remote process with the (already running) standby one.
+        """
+        
+        old_process = self.remote_process
+        self.remote_process, self.remote_connection = \
+            self.remote_pool.start(on_exit = self._remote_process_exited)
+        self.model.replace_remote_process(old_process, self.remote_connection)
+        
+    def _remote_process_exited(self, process):
+        # called from the monitoring thread.  if the current remote process
+        # crashed, start again with the standby one.
+        if process is self.remote_process and process.exitcode:
+            logger.warning("Restarting the remote process")
+            GUI.invoke_later(self.restart_remote_process)
+        
     def stop(self):
         super().stop()
-        self.model.shutdown_remote_process(self.remote_process)
+        
+        process = self.remote_process
+        self.remote_process = None
+        self.model.shutdown_remote_process(process)
         
 
     preferences_helper = Instance(CytoflowPreferences)
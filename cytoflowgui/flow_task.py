@@ -83,6 +83,8 @@ class FlowTask(Task):
                               TaskAction(name='Export Jupyter notebook...',
                                          method='on_notebook',
                                          accelerator='Ctrl+I'),                              
+                              TaskAction(name='Export timing trace...',
+                                         method='on_trace'),
 #                               TaskAction(name='Preferences...',
 #                                          method='on_prefs',
 #                                          accelerator='Ctrl+P'),
@@ -208,7 +210,11 @@ class FlowTask(Task):
         
         # clear the workflow
         self.model.workflow = []
-        
+
+        # and start over with a fresh remote process, which gives all the
+        # old workflow's memory back to the OS
+        self.application.restart_remote_process()
+
         # add the import op
         self.add_operation(ImportPlugin().id) 
         
@@ -412,6 +418,21 @@ class FlowTask(Task):
             save_notebook(self.model.workflow, dialog.path)
 
     
+    def on_trace(self):
+        """
+        Shows a dialog to save the timing of every estimate, apply and plot
+        so far, in the Chrome trace format
+        """
+        
+        dialog = DefaultFileDialog(parent = self.window.control,
+                                   action = 'save as',
+                                   default_suffix = "json",
+                                   wildcard = (FileDialog.create_wildcard("Chrome trace", "*.json") + ';' + #@UndefinedVariable  
+                                               FileDialog.create_wildcard("All files", "*")))  # @UndefinedVariable
+        if dialog.open() == OK:
+            self.model.remote_exec("self.trace.save_chrome_trace({!r})".format(dialog.path))
+
+    
     def on_prefs(self):
         pass
     
@@ -24,7 +24,7 @@ Created on Feb 11, 2015
 
 import sys
 
-from traits.api import Instance, provides
+from traits.api import Instance, Any, provides, on_trait_change
 from traitsui.editor_factory import EditorWithListFactory
 from traitsui.qt4.enum_editor import BaseEditor as BaseEnumerationEditor
 from traitsui.qt4.constants import ErrorColor
@@ -46,6 +46,7 @@ class FlowTaskPane(TaskPane):
     id = 'edu.mit.synbio.cytoflow.flow_task_pane'
     name = 'Cytometry Data Viewer'
     
+    model = Any                                             # the Workflow
     layout = Instance(QtGui.QVBoxLayout)                    # @UndefinedVariable
     canvas = Instance(FigureCanvasQTAggLocal)
     waiting_image = ImageResource('gear')
@@ -75,6 +76,11 @@ class FlowTaskPane(TaskPane):
                   
     def export(self, filename, **kwargs):      
         self.canvas.print_figure(filename, bbox_inches = 'tight', **kwargs)
+        
+    @on_trait_change('model:child_matplotlib_conn', dispatch = 'ui')
+    def _remote_process_replaced(self, new):
+        if self.canvas is not None:
+            self.canvas.set_connection(new)
     
 class _TabListEditor(BaseEnumerationEditor):
     
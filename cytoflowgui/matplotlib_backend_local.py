@@ -131,7 +131,7 @@ class FigureCanvasQTAggLocal(FigureCanvasQTAgg):
         
         t = threading.Thread(target = self.listen_for_remote, 
                              name = "canvas listen",
-                             args = ())
+                             args = (child_conn,))
         t.daemon = True
         t.start()
          
@@ -145,10 +145,30 @@ class FigureCanvasQTAggLocal(FigureCanvasQTAgg):
         matplotlib.rcParams['figure.dpi'] = dpi
         self.child_conn.send((Msg.DPI, self.physicalDpiX()))
         
-    def listen_for_remote(self):
-        while self.child_conn.poll(None):
+    def set_connection(self, child_conn):
+        """
+        Talk to a different remote canvas (ie, in a new remote process.)
+        """
+        
+        self.child_conn = child_conn
+        
+        t = threading.Thread(target = self.listen_for_remote, 
+                             name = "canvas listen",
+                             args = (child_conn,))
+        t.daemon = True
+        t.start()
+        
+        # the new remote canvas needs to know our DPI and size
+        dpi = self.physicalDpiX()
+        self.child_conn.send((Msg.DPI, dpi))
+        self.resize_width = self.width() / dpi
+        self.resize_height = self.height() / dpi
+        self.send_event.set()
+        
+    def listen_for_remote(self, child_conn):
+        while child_conn.poll(None):
             try:
-                (msg, payload) = self.child_conn.recv()
+                (msg, payload) = child_conn.recv()
             except EOFError:
                 return
             
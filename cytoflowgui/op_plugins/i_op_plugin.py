@@ -238,7 +238,11 @@ shared_op_traits = Group(Item('context.estimate_warning',
                                resizable = True,
                                visible_when = 'context.op_error',
                                editor = ColorTextEditor(foreground_color = "#000000",
-                                                        background_color = "#ff9191")))
+                                                        background_color = "#ff9191")),
+                         Item('context.timing',
+                              label = 'Timing',
+                              style = 'readonly',
+                              visible_when = 'context.timing'))
 
         
 class OpHandlerMixin(HasTraits):
@@ -101,13 +101,20 @@ def run_gui():
     # parse args
     parser = argparse.ArgumentParser(description = 'Cytoflow GUI')
     parser.add_argument("--debug", action = 'store_true')
+    parser.add_argument("--checkpoint", metavar = "DIR", default = "",
+                        help = "Save the results of slow operations in DIR, "
+                               "so re-opening a workflow doesn't re-compute them")
+    parser.add_argument("--no-standby", action = 'store_true',
+                        help = "Don't keep a spare remote process running "
+                               "(uses less memory, but restarts are slower)")
     parser.add_argument("filename", nargs='?', default = "")
     
     args = parser.parse_args()
     
-    # start the remote process
+    # start the remote process (and a spare)
 
-    remote_process, remote_connection, queue_listener = start_remote_process()
+    remote_pool = RemoteProcessPool(checkpoint_dir = args.checkpoint,
+                                    standby = not args.no_standby)
     
     # getting real tired of the matplotlib deprecation warnings
     import warnings
@@ -226,8 +233,7 @@ def run_gui():
     app = CytoflowApplication(id = 'edu.mit.synbio.cytoflow',
                               plugins = plugins,
                               icon = icon,
-                              remote_process = remote_process,
-                              remote_connection = remote_connection,
+                              remote_pool = remote_pool,
                               filename = args.filename,
                               debug = args.debug)
 
@@ -236,50 +242,161 @@ def run_gui():
 
     app.run()
 
-    remote_process.join()
-    queue_listener.stop()
+    remote_pool.shutdown()
     logging.shutdown()
     
-def start_remote_process():
+def start_log_listener():
+    """
+    Start a thread that hands log records from the remote processes to the
+    local loggers.  Returns the queue to give the remote processes and the
+    :class:`~logging.handlers.QueueListener`.
+    """
+    
+    from logging.handlers import QueueListener
+    from cytoflowgui.util import CallbackHandler
+    log_q = multiprocessing.Queue()
+    def handle(record):
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+            
+    handler = CallbackHandler(handle)
+    queue_listener = QueueListener(log_q, handler)
+    queue_listener.start()
+    
+    return log_q, queue_listener
 
-        # communications channels
-        parent_workflow_conn, child_workflow_conn = multiprocessing.Pipe()  
-        parent_mpl_conn, child_matplotlib_conn = multiprocessing.Pipe()
-        running_event = multiprocessing.Event()
 
-        # logging
-        from logging.handlers import QueueListener
-        from cytoflowgui.util import CallbackHandler
-        log_q = multiprocessing.Queue()
-        def handle(record):
-            logger = logging.getLogger(record.name)
-            if logger.isEnabledFor(record.levelno):
-                logger.handle(record)
-                
-        handler = CallbackHandler(handle)
-        queue_listener = QueueListener(log_q, handler)
-        queue_listener.start()
-   
-        remote_process = multiprocessing.Process(target = remote_main,
-                                                 name = "remote process",
-                                                 args = [parent_workflow_conn,
-                                                         parent_mpl_conn,
-                                                         log_q,
-                                                         running_event])
+class RemoteProcessPool(object):
+    """
+    Starts remote processes, keeping a spare one warm.
+    
+    Starting a remote process is slow, because it has to import the whole
+    scientific Python stack.  So the pool keeps a "standby" process that
+    has already done its imports and is waiting to be handed its pipes.
+    :meth:`start` wakes up the standby and then starts another one in the 
+    background, so starting the GUI, recovering from a crashed remote 
+    process and starting a new workflow don't wait for the imports.
+    
+    Parameters
+    ----------
+    checkpoint_dir : Str
+        Passed to each remote process's :class:`.RemoteWorkflow`.
         
-        remote_process.daemon = True
-        remote_process.start() 
-        running_event.wait()
+    standby : Bool (default = True)
+        Keep a spare process running.  If ``False``, each process is 
+        started when it's needed (which saves memory.)
         
-        remote_process_thread = threading.Thread(target = monitor_remote_process,
-                                                 name = "monitor remote process",
-                                                 args = [remote_process])
-        remote_process_thread.daemon = True
-        remote_process_thread.start()
+    headless : Bool (default = False)
+        Don't send plots back to the GUI.  (For testing.)
+    """
+    
+    def __init__(self, checkpoint_dir = "", standby = True, headless = False):
+        self.checkpoint_dir = checkpoint_dir
+        self.standby = standby
+        self.headless = headless
         
-        return (remote_process, (child_workflow_conn, child_matplotlib_conn), queue_listener)
+        self.log_q, self.queue_listener = start_log_listener()
+        
+        self._lock = threading.Lock()
+        self._standby = self._spawn() if standby else None
+            
+    def _spawn(self):
+        control_conn, child_control_conn = multiprocessing.Pipe()
+        ready_event = multiprocessing.Event()
+        
+        process = multiprocessing.Process(target = standby_main,
+                                          name = "remote process",
+                                          args = [child_control_conn,
+                                                  self.log_q,
+                                                  ready_event,
+                                                  self.headless])
+        process.daemon = True
+        process.start()
+        child_control_conn.close()
+        
+        return (process, control_conn, ready_event)
     
-def remote_main(parent_workflow_conn, parent_mpl_conn, log_q, running_event):
+    def start(self, on_exit = None):
+        """
+        Start a remote process -- or rather, wake up the standby one.  
+        
+        Doesn't wait for the remote process to finish its imports: messages 
+        sent before then wait in the pipes.
+        
+        Parameters
+        ----------
+        on_exit : Callable (optional)
+            Called (from another thread) with the process when it exits.
+            
+        Returns
+        -------
+        (multiprocessing.Process, (Connection, Connection))
+            The remote process, and the local ends of the workflow and 
+            matplotlib pipes, to pass to :class:`.Workflow`.
+        """
+        
+        with self._lock:
+            standby, self._standby = self._standby, None
+            
+        if standby is None or not standby[0].is_alive():
+            standby = self._spawn()
+            
+        (process, control_conn, ready_event) = standby
+        
+        parent_workflow_conn, child_workflow_conn = multiprocessing.Pipe()  
+        parent_mpl_conn, child_matplotlib_conn = multiprocessing.Pipe()
+        
+        # sending a Connection gives the remote process its own copy.  close
+        # ours, so that our ends see EOF when the remote process exits.
+        control_conn.send((parent_workflow_conn, parent_mpl_conn, self.checkpoint_dir))
+        control_conn.close()
+        parent_workflow_conn.close()
+        parent_mpl_conn.close()
+        
+        monitor_thread = threading.Thread(target = monitor_remote_process,
+                                          name = "monitor remote process",
+                                          args = [process, on_exit])
+        monitor_thread.daemon = True
+        monitor_thread.start()
+        
+        # start the next standby once this one is done importing, so the
+        # two aren't competing for the CPU
+        def replace_standby():
+            ready_event.wait()
+            with self._lock:
+                if self._standby is None and self.standby:
+                    self._standby = self._spawn()
+                    
+        if self.standby:
+            t = threading.Thread(target = replace_standby,
+                                 name = "start standby process")
+            t.daemon = True
+            t.start()
+                
+        return (process, (child_workflow_conn, child_matplotlib_conn))
+    
+    def shutdown(self):
+        """
+        Stop the standby process and the logging thread.  Shut down the
+        processes returned by :meth:`start` (with 
+        :meth:`.Workflow.shutdown_remote_process`) first.
+        """
+        
+        with self._lock:
+            standby, self._standby = self._standby, None
+            self.standby = False
+            
+        if standby is not None:
+            (process, control_conn, _) = standby
+            control_conn.send(None)
+            control_conn.close()
+            process.join()
+            
+        self.queue_listener.stop()
+            
+    
+def setup_remote(log_q, headless = False):
     # this should only ever be main method after a spawn() call 
     # (not fork). So we should have a fresh logger to set up.
         
@@ -292,10 +409,14 @@ def remote_main(parent_workflow_conn, parent_mpl_conn, log_q, running_event):
     # remote process.  Must be called BEFORE cytoflow is imported
     
     import matplotlib
-    matplotlib.use('module://cytoflowgui.matplotlib_backend_remote')
+    if headless:
+        from traits.etsconfig.api import ETSConfig
+        ETSConfig.toolkit = 'null'
+        matplotlib.use('Agg')
+    else:
+        matplotlib.use('module://cytoflowgui.matplotlib_backend_remote')
     
     from traits.api import push_exception_handler    
-    from cytoflowgui.workflow import RemoteWorkflow
     
     # install a global (gui) error handler for traits notifications
     push_exception_handler(handler = log_notification_handler,
@@ -309,14 +430,48 @@ def remote_main(parent_workflow_conn, parent_mpl_conn, log_q, running_event):
     import cytoflow
     cytoflow.RUNNING_IN_GUI = True
     
-    running_event.set()
-    RemoteWorkflow().run(parent_workflow_conn, parent_mpl_conn)
     
+def standby_main(control_conn, log_q, ready_event, headless = False):
+    
+    setup_remote(log_q, headless)
+    
+    # do the slow imports now, instead of when the workflow arrives.
+    # (cytoflow imports its operations and views lazily.)
+    import cytoflow, cytoflow.utility
+    for module in [cytoflow, cytoflow.utility]:
+        for name in module.__all__:
+            getattr(module, name)
+            
+    from cytoflowgui.workflow import RemoteWorkflow
+    if not headless:
+        import cytoflowgui.op_plugins, cytoflowgui.view_plugins  # @UnusedImport
+    
+    ready_event.set()
+    
+    # wait to be handed the pipes
+    try:
+        msg = control_conn.recv()
+    except EOFError:
+        return
+    finally:
+        control_conn.close()
         
-def monitor_remote_process(proc):
+    if msg is None:
+        return
+    
+    (parent_workflow_conn, parent_mpl_conn, checkpoint_dir) = msg
+    RemoteWorkflow(checkpoint_dir = checkpoint_dir).run(parent_workflow_conn, 
+                                                        parent_mpl_conn,
+                                                        headless = headless)
+    
+        
+def monitor_remote_process(proc, on_exit = None):
     proc.join()
     if proc.exitcode:
         logging.error("Remote process exited with {}".format(proc.exitcode))
+        
+    if on_exit is not None:
+        on_exit(proc)
 
 if __name__ == '__main__':
     multiprocessing.freeze_support()
@@ -204,6 +204,7 @@ from cytoflow import (Experiment, ImportOp, Tube, AutofluorescenceOp,
                       BleedthroughLinearOp, BeadCalibrationOp, 
                       ColorTranslationOp, PolygonOp, ExportFCS)
 from cytoflow.operations.polygon import PolygonSelection
+from cytoflow.operations.tasbe import TasbeTransform, convert_files
 
 from cytoflow.views.i_selectionview import IView
 
@@ -633,23 +634,30 @@ class TasbeCalibrationOp(PluginOpMixin):
                                            "File {} already exists"
                                            .format(out_file_path))
                 
-        tubes = [Tube(file = path, conditions = {'filename' : Path(path).stem})
-                 for path in self.input_files]
-        
-        for tube in tubes:
-            self.status = "Converting " + Path(tube.file).stem
-            experiment = ImportOp(tubes = [tube], conditions = {'filename' : 'category'}).apply()
-            
-            experiment = self._af_op.apply(experiment)
-            experiment = self._bleedthrough_op.apply(experiment)
-            experiment = self._bead_calibration_op.apply(experiment)
-            
-            if self.do_color_translation:
-                experiment = self._color_translation_op.apply(experiment)                                                
-                    
-            ExportFCS(path = self.output_directory,
-                      by = ['filename'],
-                      _include_by = False).export(experiment)
+        # a picklable copy of the estimated pipeline, so the files can be
+        # converted in the worker processes
+        transform = TasbeTransform(self._af_op,
+                                   self._bleedthrough_op,
+                                   self._bead_calibration_op,
+                                   self._color_translation_op if self.do_color_translation else None)
+        
+        def progress(done, total, filename):
+            self.status = "Converted {} of {} files".format(done, total)
+        
+        self.status = "Converting {} files".format(len(self.input_files))
+        failed = convert_files(transform, 
+                               self.input_files, 
+                               self.output_directory, 
+                               progress = progress)
+        
+        if failed:
+            # leave the failed files, so they can be tried again
+            self.input_files = [f for f in self.input_files if f in failed]
+            self.status = "{} files failed".format(len(failed))
+            raise util.CytoflowOpError(None,
+                                       "Couldn't convert some files:\n" +
+                                       "\n".join("{}: {}".format(Path(f).name, e)
+                                                 for f, e in failed.items()))
                       
         self.input_files = []
         self.status = "Done converting!"
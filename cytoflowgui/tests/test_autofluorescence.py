@@ -23,7 +23,7 @@ Created on Jan 5, 2018
 @author: brian
 '''
 
-import os, unittest, tempfile
+import os, unittest, tempfile, shutil
 import pandas as pd
 
 from cytoflowgui.tests.test_base import TasbeTest
@@ -84,6 +84,37 @@ class TestAutofluorescence(TasbeTest):
         self.workflow.wi_waitfor(self.wi, 'status', 'valid')
         self.assertTrue(self.workflow.remote_eval("self.workflow[-1].result is not None"))
          
+    def testEstimateKey(self):
+        key = self.workflow.remote_eval("self.workflow[-1].result_key")
+        self.assertIsNotNone(key)
+        
+        # estimating again from the same inputs gives the same key
+        self.workflow.wi_sync(self.wi, 'status', 'waiting')
+        self.op.do_estimate = True
+        self.workflow.wi_waitfor(self.wi, 'status', 'valid')
+        self.assertEqual(self.workflow.remote_eval("self.workflow[-1].result_key"), key)
+        
+        # but not if the blank file changed
+        with tempfile.TemporaryDirectory() as d:
+            blank_file = os.path.join(d, "blank.fcs")
+            shutil.copy(self.op.blank_file, blank_file)
+            
+            self.workflow.wi_sync(self.wi, 'status', 'waiting')
+            self.op.blank_file = blank_file
+            self.workflow.wi_waitfor(self.wi, 'status', 'invalid')
+            
+            self.workflow.wi_sync(self.wi, 'status', 'waiting')
+            self.op.do_estimate = True
+            self.workflow.wi_waitfor(self.wi, 'status', 'valid')
+            new_key = self.workflow.remote_eval("self.workflow[-1].result_key")
+            self.assertNotEqual(new_key, key)
+            
+            os.utime(blank_file, (0, 0))
+            self.workflow.wi_sync(self.wi, 'status', 'waiting')
+            self.op.do_estimate = True
+            self.workflow.wi_waitfor(self.wi, 'status', 'valid')
+            self.assertNotEqual(self.workflow.remote_eval("self.workflow[-1].result_key"), new_key)
+         
     def testPlot(self):
         self.workflow.wi_sync(self.wi, 'view_error', 'waiting')
         self.wi.current_view = self.wi.default_view
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Tests for the headless batch runner, cytoflowgui.batch_run
+'''
+
+# sets up the null toolkit and Agg backend
+import cytoflowgui.tests.test_base  # @UnusedImport
+
+import os, sys, unittest, tempfile, shutil
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+import cytoflow as flow
+from cytoflowgui import batch_run
+
+from cytoflowgui.workflow_item import WorkflowItem
+from cytoflowgui.op_plugins import ImportPlugin, ThresholdPlugin, ChannelStatisticPlugin
+from cytoflowgui.serialization import save_yaml
+
+class TestBatchRun(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        data = Path(os.path.dirname(os.path.abspath(__file__))) \
+               / ".." / ".." / "cytoflow" / "tests" / "data" / "Plate01"
+
+        # two "plates" with the same well names
+        self.plates = []
+        for plate in ["Plate01", "Plate02"]:
+            p = Path(self.dir) / "in" / plate
+            p.mkdir(parents = True)
+            for well in ["CFP_Well_A4.fcs", "RFP_Well_A3.fcs"]:
+                shutil.copy(str(data / well), str(p / well))
+            self.plates.append(str(p))
+
+        import_op = ImportPlugin().get_operation()
+        import_op.conditions = {"Dox" : "float"}
+        import_op.tubes = [flow.Tube(file = str(data / "CFP_Well_A4.fcs"),
+                                     conditions = {"Dox" : 1.0}),
+                           flow.Tube(file = str(data / "RFP_Well_A3.fcs"),
+                                     conditions = {"Dox" : 10.0})]
+
+        thresh_op = ThresholdPlugin().get_operation()
+        thresh_op.name = "T"
+        thresh_op.channel = "Y2-A"
+        thresh_op.threshold = 500.0
+
+        stat_op = ChannelStatisticPlugin().get_operation()
+        stat_op.name = "Mean"
+        stat_op.channel = "Y2-A"
+        stat_op.statistic_name = "Mean"
+        stat_op.by = ["Dox", "T"]
+
+        workflow = [WorkflowItem(operation = op)
+                    for op in [import_op, thresh_op, stat_op]]
+
+        self.flow_file = str(Path(self.dir) / "test.flow")
+        save_yaml(workflow, self.flow_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testRunPlate(self):
+        out = Path(self.dir) / "out"
+        timing = batch_run.run_plate(self.flow_file, self.plates[1], str(out))
+
+        self.assertEqual([(t['index'], t['step']) for t in timing],
+                         [(0, 'estimate'), (0, 'apply'), (1, 'apply'), (2, 'apply')])
+        self.assertTrue(all(t['events'] > 0 for t in timing[1:]))
+
+        stat = pd.read_csv(str(out / "Mean_Mean.csv"), index_col = [0, 1])
+        self.assertEqual(len(stat), 4)
+
+        self.assertEqual(sorted(os.listdir(str(out))),
+                         ["Dox_1.0.fcs", "Dox_10.0.fcs", "Mean_Mean.csv"])
+
+        ex = flow.ImportOp(tubes = [flow.Tube(file = str(out / "Dox_1.0.fcs"))]).apply()
+        self.assertEqual(len(ex), timing[1]['events'] // 2)
+
+    def testMissingWell(self):
+        os.unlink(os.path.join(self.plates[0], "RFP_Well_A3.fcs"))
+        with self.assertRaisesRegex(RuntimeError, "RFP_Well_A3.fcs"):
+            batch_run.run_plate(self.flow_file, self.plates[0],
+                                os.path.join(self.dir, "out"))
+
+    def testMain(self):
+        out = Path(self.dir) / "out"
+        argv = ["cf-batch_run", self.flow_file] + self.plates \
+             + ["-o", str(out), "-j", "2", "--no-fcs"]
+
+        with mock.patch.object(sys, 'argv', argv):
+            batch_run.main()
+
+        for plate in ["Plate01", "Plate02"]:
+            self.assertEqual(os.listdir(str(out / plate)), ["Mean_Mean.csv"])
+
+        timing = pd.read_csv(str(out / "timing.csv"))
+        self.assertEqual(sorted(timing['plate'].unique()), ["Plate01", "Plate02"])
+        self.assertEqual(len(timing), 8)
+
+if __name__ == "__main__":
+#     import sys;sys.argv = ['', 'TestBatchRun.testMain']
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3.4
+# coding: latin-1
+
+# (c) Massachusetts Institute of Technology 2015-2018
+# (c) Brian Teague 2018-2019
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+Tests for the pool of warm remote processes, cytoflowgui.run.RemoteProcessPool
+'''
+
+# sets up the null toolkit and Agg backend
+import cytoflowgui.tests.test_base  # @UnusedImport
+
+import unittest, threading
+
+from cytoflowgui.run import RemoteProcessPool
+from cytoflowgui.workflow import Workflow
+
+class TestRemoteProcessPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = RemoteProcessPool(headless = True)
+        self.exited = threading.Event()
+        self.remote_process, remote_connection = \
+            self.pool.start(on_exit = lambda _: self.exited.set())
+        self.workflow = Workflow(remote_connection)
+
+    def tearDown(self):
+        if self.remote_process.is_alive():
+            self.workflow.shutdown_remote_process(self.remote_process)
+        self.pool.shutdown()
+
+    def testStart(self):
+        pid = self.workflow.remote_eval("__import__('os').getpid()")
+        self.assertEqual(pid, self.remote_process.pid)
+
+    def testReplace(self):
+        old_process = self.remote_process
+        self.remote_process, remote_connection = self.pool.start()
+        self.assertNotEqual(old_process.pid, self.remote_process.pid)
+
+        self.workflow.replace_remote_process(old_process, remote_connection)
+        self.assertFalse(old_process.is_alive())
+        self.assertTrue(self.exited.wait(10))
+
+        pid = self.workflow.remote_eval("__import__('os').getpid()")
+        self.assertEqual(pid, self.remote_process.pid)
+
+    def testCrash(self):
+        old_process = self.remote_process
+        old_process.terminate()
+        self.assertTrue(self.exited.wait(10))
+        self.assertTrue(old_process.exitcode)
+
+        self.remote_process, remote_connection = self.pool.start()
+        self.workflow.replace_remote_process(old_process, remote_connection)
+
+        pid = self.workflow.remote_eval("__import__('os').getpid()")
+        self.assertEqual(pid, self.remote_process.pid)
+
+    def testNoStandby(self):
+        pool = RemoteProcessPool(standby = False, headless = True)
+        try:
+            process, remote_connection = pool.start()
+            workflow = Workflow(remote_connection)
+            self.assertEqual(workflow.remote_eval("1 + 1"), 2)
+            workflow.shutdown_remote_process(process)
+        finally:
+            pool.shutdown()
+
+if __name__ == "__main__":
+#     import sys;sys.argv = ['', 'TestRemoteProcessPool.testCrash']
+    unittest.main()
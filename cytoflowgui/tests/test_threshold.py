@@ -69,6 +69,126 @@ class TestThreshold(ImportedDataTest):
         self.op.threshold = 0
         self.workflow.wi_waitfor(self.wi, 'status', 'valid')
    
+    def testResultCache(self):
+        # mark the current result, so we can tell if we get it back
+        self.workflow.remote_exec("self.workflow[-1].result.metadata['marked'] = True")
+        
+        self.workflow.wi_sync(self.wi, 'status', 'waiting')
+        self.op.threshold = 0
+        self.workflow.wi_waitfor(self.wi, 'status', 'valid')
+        self.assertFalse(self.workflow.remote_eval("'marked' in self.workflow[-1].result.metadata"))
+        
+        self.workflow.wi_sync(self.wi, 'status', 'waiting')
+        self.op.threshold = 1000
+        self.workflow.wi_waitfor(self.wi, 'status', 'valid')
+        self.assertTrue(self.workflow.remote_eval("'marked' in self.workflow[-1].result.metadata"))
+   
+    def testDebounce(self):
+        apply_calls = self.workflow.remote_eval("self.apply_calls")
+        
+        # a burst of changes should only be applied once the changes settle 
+        # down
+        self.workflow.wi_sync(self.wi, 'status', 'waiting')
+        for c in ["B1-A", "V2-A", "Y2-A", "V2-A", "B1-A"]:
+            self.op.channel = c
+        self.workflow.wi_waitfor(self.wi, 'status', 'valid')
+        
+        self.assertEqual(self.workflow.remote_eval("self.workflow[-1].operation.channel"), "B1-A")
+        self.assertLess(self.workflow.remote_eval("self.apply_calls") - apply_calls, 5)
+   
+    def testPreview(self):
+        self.workflow.remote_exec("self.workflow[-1].preview_events = 1000")
+        
+        statuses = []
+        self.wi.on_trait_change(lambda new: statuses.append(new), 'status')
+        
+        self.workflow.wi_sync(self.wi, 'status', 'waiting')
+        self.op.threshold = 500
+        self.workflow.wi_waitfor(self.wi, 'status', 'valid')
+        
+        # first a preview, then the whole thing
+        self.assertIn("preview", statuses)
+        self.assertEqual(self.workflow.remote_eval("len(self.workflow[-1].result)"),
+                         self.workflow.remote_eval("len(self.workflow[-2].result)"))
+        self.assertFalse(self.workflow.remote_eval("self.workflow[-1].preview"))
+
+    def testCheckpoint(self):
+        with tempfile.TemporaryDirectory() as d:
+            self.workflow.remote_exec("self.workflow[-1].checkpoint_dir = {!r}".format(d))
+            self.workflow.remote_exec("self.workflow[-1].checkpoint_seconds = 0")
+
+            self.workflow.wi_sync(self.wi, 'status', 'waiting')
+            self.op.threshold = 500
+            self.workflow.wi_waitfor(self.wi, 'status', 'valid')
+
+            key = self.workflow.remote_eval("self.workflow[-1].result_key")
+            self.assertEqual(os.listdir(d), [key])
+
+            # forget the in-memory copy; the result comes back from the
+            # checkpoint (memory-mapped), instead of being re-computed.
+            self.workflow.remote_exec("self.result_cache.clear()")
+
+            self.workflow.wi_sync(self.wi, 'status', 'waiting')
+            self.op.threshold = 1000
+            self.workflow.wi_waitfor(self.wi, 'status', 'valid')
+            self.assertEqual(len(os.listdir(d)), 2)
+
+            self.workflow.remote_exec("self.result_cache.clear()")
+
+            self.workflow.wi_sync(self.wi, 'status', 'waiting')
+            self.op.threshold = 500
+            self.workflow.wi_waitfor(self.wi, 'status', 'valid')
+            self.assertEqual(self.workflow.remote_eval("self.workflow[-1].result_key"), key)
+            self.assertTrue(self.workflow.remote_eval("isinstance(self.workflow[-1].result.data['Y2-A'].values, "
+                                                      "__import__('numpy').memmap)"))
+
+            # let go of the memory maps before the directory goes away
+            self.workflow.remote_exec("self.workflow[-1].checkpoint_dir = ''")
+            self.workflow.wi_sync(self.wi, 'status', 'waiting')
+            self.op.threshold = 0
+            self.workflow.wi_waitfor(self.wi, 'status', 'valid')
+
+    def testCheckpointBudget(self):
+        with tempfile.TemporaryDirectory() as d:
+            self.workflow.remote_exec("self.workflow[-1].checkpoint_dir = {!r}".format(d))
+            self.workflow.remote_exec("self.workflow[-1].checkpoint_seconds = 0")
+            
+            # only room for the newest checkpoint
+            self.workflow.remote_exec("self.workflow[-1].checkpoint_bytes = 1")
+
+            for threshold in [500, 1000]:
+                self.workflow.wi_sync(self.wi, 'status', 'waiting')
+                self.op.threshold = threshold
+                self.workflow.wi_waitfor(self.wi, 'status', 'valid')
+                
+                key = self.workflow.remote_eval("self.workflow[-1].result_key")
+                self.assertEqual(os.listdir(d), [key])
+
+            self.workflow.remote_exec("self.workflow[-1].checkpoint_dir = ''")
+
+    def testDepends(self):
+        def depends(job, other):
+            return self.workflow.remote_eval("self._depends((self.workflow[{0}], self.workflow[{0}].{1}), "
+                                             "(self.workflow[{2}], self.workflow[{2}].{3}), "
+                                             "self._positions())"
+                                             .format(*job, *other))
+            
+        # an earlier item's result is an input to a later one
+        self.assertTrue(depends((3, "apply"), (1, "apply")))
+        self.assertTrue(depends((3, "estimate"), (1, "refine")))
+        self.assertFalse(depends((3, "apply"), (1, "refine")))
+        self.assertTrue(depends((3, "plot"), (1, "apply")))
+        self.assertFalse(depends((1, "apply"), (3, "apply")))
+        
+        # an item's jobs run in order
+        self.assertTrue(depends((3, "plot"), (3, "apply")))
+        self.assertTrue(depends((3, "apply"), (3, "plot")))
+        
+        # plotting doesn't change anything, but plots share the canvas
+        self.assertFalse(depends((3, "apply"), (1, "plot")))
+        self.assertFalse(depends((1, "plot"), (3, "apply")))
+        self.assertTrue(depends((1, "plot"), (3, "plot")))
+   
     def testChangeChannels(self):
         self.workflow.wi_sync(self.wi, 'status', 'waiting')
         self.op.channel = "B1-A"
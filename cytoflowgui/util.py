@@ -23,6 +23,9 @@ Created on Apr 18, 2015
 @author: brian
 '''
 
+import os, shutil, threading
+from collections import OrderedDict
+
 from traits.api import Str
 from pyface.ui.qt4.file_dialog import FileDialog
 
@@ -50,6 +53,96 @@ class UniquePriorityQueue(PriorityQueue):
         self.values.remove(item[1])
         return item
     
+class ResultCache(object):
+    """
+    A least-recently-used cache of WorkflowItem results, limited by the total
+    size of the results' data.  Thread-safe.
+    """
+    
+    def __init__(self, max_bytes = 2 ** 30):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+    def get(self, key):
+        """Return the value cached under ``key``, or ``None``"""
+        with self._lock:
+            if key not in self._items:
+                return None
+            
+            self._items.move_to_end(key)
+            return self._items[key][0]
+        
+    def put(self, key, value, size):
+        """
+        Cache ``value`` under ``key``.  ``size`` is (approximately) how many
+        bytes it takes up; if the cache is over budget, the least-recently
+        used values are forgotten.
+        """
+        with self._lock:
+            if key in self._items:
+                self._bytes -= self._items.pop(key)[1]
+                
+            if size > self.max_bytes:
+                return
+            
+            self._items[key] = (value, size)
+            self._bytes += size
+            
+            while self._bytes > self.max_bytes:
+                _, (_, old_size) = self._items.popitem(last = False)
+                self._bytes -= old_size
+                
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+            
+    def __len__(self):
+        return len(self._items)
+    
+_prune_lock = threading.Lock()
+
+def prune_checkpoints(directory, max_bytes, keep = None):
+    """
+    Delete the least-recently used checkpoints (subdirectories) in 
+    ``directory`` until they take up at most ``max_bytes``.  A checkpoint's
+    last use is its modification time; ``keep`` is never deleted.
+    """
+    
+    with _prune_lock:
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return
+        
+        checkpoints = []
+        total = 0
+        for name in names:
+            path = os.path.join(directory, name)
+            if not os.path.isdir(path):
+                continue
+            
+            try:
+                size = sum(os.path.getsize(os.path.join(d, f)) 
+                           for d, _, files in os.walk(path) for f in files)
+                checkpoints.append((os.path.getmtime(path), name, path, size))
+            except OSError:
+                continue
+            
+            total += size
+            
+        for _, name, path, size in sorted(checkpoints):
+            if total <= max_bytes:
+                break
+            
+            if name == keep:
+                continue
+            
+            shutil.rmtree(path, ignore_errors = True)
+            total -= size
+    
 def filter_unpicklable(obj):
     if type(obj) is list:
         return [filter_unpicklable(x) for x in obj]
@@ -44,22 +44,24 @@ the plots are ferried back to the GUI, see the module docstring for
 matplotlib_backend.py
 """
 
-import threading, sys, logging, traceback
+import threading, sys, logging, traceback, time
 
-from queue import Queue
+from queue import Queue, Empty
+from concurrent.futures import ThreadPoolExecutor
 
 from traits.api import (HasStrictTraits, Instance, List, on_trait_change, Any, 
-                        Bool, Int)
+                        Bool, Int, Float, Str)
                        
 from traitsui.api import View, Item, InstanceEditor, Spring
 
 import matplotlib.pyplot as plt
 
 from cytoflow.views import IView
+import cytoflow.utility as util
 
 from cytoflowgui.vertical_notebook_editor import VerticalNotebookEditor
 from cytoflowgui.workflow_item import WorkflowItem, RemoteWorkflowItem
-from cytoflowgui.util import UniquePriorityQueue, filter_unpicklable
+from cytoflowgui.util import UniquePriorityQueue, ResultCache, filter_unpicklable
 import cytoflowgui.matplotlib_backend_remote
 
 logger = logging.getLogger(__name__)
@@ -247,7 +249,9 @@ class Workflow(HasStrictTraits):
     
     def __init__(self, remote_connection, **kwargs):
         super(Workflow, self).__init__(**kwargs)  
+        self._connect(remote_connection)
         
+    def _connect(self, remote_connection):
         child_workflow_conn, self.child_matplotlib_conn = remote_connection
         
         self.recv_thread = threading.Thread(target = self.recv_main, 
@@ -389,7 +393,7 @@ class Workflow(HasStrictTraits):
                 self.workflow[idx].channels = list(self.workflow[idx - 1].channels)
                 self.workflow[idx].conditions = dict(self.workflow[idx - 1].conditions)
                 self.workflow[idx].metadata = dict(self.workflow[idx - 1].metadata)
-                self.workflow[idx].statistics = dict(self.workflow[idx - 1].statistics)
+                self.workflow[idx].statistics = self.workflow[idx - 1].statistics.copy()
                 
                 self.workflow[idx - 1].next_wi = self.workflow[idx]
                 self.workflow[idx].previous_wi = self.workflow[idx - 1]
@@ -548,6 +552,31 @@ class Workflow(HasStrictTraits):
 #         self.log_q.put(None)
 #         self.log_thread.join()
         
+    def replace_remote_process(self, remote_process, remote_connection):
+        """
+        Switch to a different remote process, connected by 
+        ``remote_connection``, and send it the workflow.  ``remote_process``
+        is the old one: shut it down if it's still running.
+        """
+        
+        if remote_process is not None and remote_process.is_alive():
+            self.shutdown_remote_process(remote_process)
+        else:
+            # the receiving thread stops when the pipe closes
+            self.message_q.put(None)
+            self.send_thread.join()
+            self.recv_thread.join()
+            
+        # messages still waiting were meant for the old process
+        self.message_q = Queue()
+        self._connect(remote_connection)
+        
+        # the new process starts from scratch
+        self.message_q.put((Msg.NEW_WORKFLOW, self.workflow))
+        self.message_q.put((Msg.RUN_ALL, None))
+        if self.selected is not None:
+            self.message_q.put((Msg.SELECT, self.workflow.index(self.selected)))
+        
         
         
 class RemoteWorkflow(HasStrictTraits):
@@ -568,6 +597,43 @@ class RemoteWorkflow(HasStrictTraits):
     exec_q = Instance(UniquePriorityQueue, ())
     exec_lock = Instance(threading.Lock, ())
     
+    # held (by the receive thread) while items are added to or removed from
+    # the workflow, so the scheduler sees a consistent order.  see _positions
+    workflow_lock = Instance(threading.Lock, ())
+    
+    # the worker threads that run estimates, applies, and plots.  
+    # independent jobs (a plot of one item and an estimate of a later one,
+    # for example) run at the same time.
+    executor = Instance(ThreadPoolExecutor)
+    max_jobs = Int(4)
+    
+    # when an operation changes, first show its result on (about) this many
+    # events, then refine it.  see RemoteWorkflowItem.apply
+    preview_events = Int(50000)
+    
+    # results we've computed before, so changing an operation's parameters
+    # back (or undo, etc) doesn't re-compute them.
+    result_cache = Instance(ResultCache, ())
+    
+    # if set, save results that take longer than checkpoint_seconds to 
+    # compute in this directory, so re-opening a workflow doesn't re-compute
+    # them.  the least-recently used are deleted when they take up more 
+    # than checkpoint_bytes.  see RemoteWorkflowItem.apply
+    checkpoint_dir = Str
+    checkpoint_seconds = Float(5.0)
+    checkpoint_bytes = Float(4 * 2 ** 30)
+    
+    # the timing of the most recent estimates, applies and plots (and the 
+    # calls inside them.)  see cytoflow.utility.profiling
+    trace = Instance(util.Trace, (), {'max_events' : 100000})
+    
+    # how long (in seconds) to wait for changes to a workflow item to settle
+    # down before re-estimating or re-applying it.  dragging a slider, for
+    # example, makes a whole bunch of changes in a row.  but don't wait
+    # more than debounce_max, even if the changes keep coming.
+    debounce = Float(0.1)
+    debounce_max = Float(1.0)
+    
     apply_calls = Int(0)
     plot_calls = Int(0)
     
@@ -600,26 +666,148 @@ class RemoteWorkflow(HasStrictTraits):
                                             args = [parent_workflow_conn])
         self.send_thread.start()
         
-        # loop and process updates
+        self.executor = ThreadPoolExecutor(max_workers = self.max_jobs,
+                                           thread_name_prefix = "remote worker")
+        
+        # loop and schedule updates.  jobs run on the worker threads, but 
+        # a job doesn't start until every job it depends on (see _depends)
+        # has finished -- both the ones that are running and the ones with a 
+        # higher priority that are still waiting.
+        pending = {}      # (wi, fn) --> priority
+        running = []      # (priority, (wi, fn), token, future)
+        timeout = None
+        
         while True:
             try:
-                _, (wi, fn) = self.exec_q.get()
+                items = []
+                try:
+                    items.append(self.exec_q.get(timeout = timeout))
+                    while True:
+                        items.append(self.exec_q.get_nowait())
+                except Empty:
+                    pass
                 
-                if wi:
-                    with wi.lock:
-                        fn()
-                else:
-
-                    if fn is None:
-                        self.shutdown()
-                        return
-                    else:
+                for prio, job in items:
+                    self.exec_q.task_done()
+                    if job != (None, self._job_done):
+                        pending[job] = min(prio, pending.get(job, prio))
+                        
+                for r in [r for r in running if r[3].done()]:
+                    running.remove(r)
+                    
+                    # if a newer request made this run stale, it was 
+                    # abandoned part-way through.  run it again with the
+                    # item's current state.
+                    prio, job, token, _ = r
+                    if token.cancelled:
+                        pending[job] = min(prio, pending.get(job, prio))
+                        
+                timeout = None
+                waiting = []
+                positions = self._positions()
+                for job, prio in sorted(pending.items(), key = lambda x: x[1]):
+                    wi, fn = job
+                    
+                    if wi is None:
+                        # exec, eval, and shutdown wait for everything 
+                        # ahead of them.
+                        if running or waiting:
+                            break
+                        
+                        del pending[job]
+                        if fn is None:
+                            self.executor.shutdown()
+                            self.shutdown()
+                            return
+                        
                         fn()
-                
-                self.exec_q.task_done()
+                        continue
+                    
+                    if (len(running) >= self.max_jobs
+                        or any(self._depends(job, x, positions) for x in waiting)
+                        or any(self._depends(job, r[1], positions) for r in running)):
+                        waiting.append(job)
+                        continue
+                    
+                    token = util.CancelToken()
+                    wi.cancel_token = token
+                    
+                    # if this item was changed very recently, more changes 
+                    # are probably coming.  wait for them to settle down.
+                    now = time.monotonic()
+                    delay = wi.last_request + self.debounce - now
+                    if ((delay > 0 or wi.pending_updates) 
+                        and wi.first_request + self.debounce_max > now):
+                        wi.cancel_token = None
+                        waiting.append(job)
+                        delay = min(max(delay, 0.01), self.debounce)
+                        timeout = delay if timeout is None else min(timeout, delay)
+                        continue
+                    
+                    del pending[job]
+                    running.append((prio, job, token, 
+                                    self.executor.submit(self._run_job, wi, fn, token)))
 
             except Exception:
                 log_exception()
+                
+    def _run_job(self, wi, fn, token):
+        try:
+            with wi.lock, util.cancellable(token):
+                fn()
+        except Exception:
+            log_exception()
+        finally:
+            wi.cancel_token = None
+            wi.first_request = sys.float_info.max
+            
+            # wake up the scheduler
+            self.exec_q.put((-sys.maxsize, (None, self._job_done)))
+            
+    def _job_done(self):
+        pass
+            
+    def _positions(self):
+        """
+        Each workflow item's position in the workflow.  (The receive thread
+        changes the list, so read it under ``workflow_lock``.)
+        """
+        
+        with self.workflow_lock:
+            return {wi : idx for idx, wi in enumerate(self.workflow)}
+            
+    def _depends(self, job, other, positions):
+        """
+        Does ``job`` have to wait for ``other`` to finish?  Only if they're
+        for the same workflow item, or if ``other`` is an estimate or apply 
+        for an earlier item (which will change this item's input.)  Plots 
+        also wait for each other, since they share the canvas.  Refining an
+        earlier item's preview only holds up estimates.  ``positions`` are
+        the items' positions, from :meth:`_positions`.
+        """
+        
+        (wi, fn), (other_wi, other_fn) = job, other
+        
+        if other_wi is None or wi is other_wi:
+            return True
+        
+        if fn.__name__ == "plot" and other_fn.__name__ == "plot":
+            return True
+        
+        # previews of later items don't wait for an earlier item to be 
+        # refined, but estimates (which need all the data) do.
+        if other_fn.__name__ == "refine" and fn.__name__ not in ("estimate", "refine"):
+            return False
+        
+        if other_fn.__name__ not in ("estimate", "apply", "refine"):
+            return False
+        
+        # an item that has been removed from the workflow isn't anyone's
+        # input any more.
+        if wi not in positions or other_wi not in positions:
+            return False
+        
+        return positions[other_wi] < positions[wi]
 
     def recv_main(self, parent_conn):
         while parent_conn.poll(None):
@@ -632,16 +820,27 @@ class RemoteWorkflow(HasStrictTraits):
             
             try:
                 if msg == Msg.NEW_WORKFLOW:
-                    self.workflow = []
+                    if self.workflow:
+                        self._supersede(0)
+                    with self.workflow_lock:
+                        self.workflow = []
+                    self.result_cache.clear()
                     for new_item in payload:
                         idx = len(self.workflow)
                         wi = RemoteWorkflowItem()
                         wi.lock.acquire()
                         wi.matplotlib_events = self.matplotlib_events
                         wi.plot_lock = self.plot_lock
+                        wi.result_cache = self.result_cache
+                        wi.preview_events = self.preview_events
+                        wi.checkpoint_dir = self.checkpoint_dir
+                        wi.checkpoint_seconds = self.checkpoint_seconds
+                        wi.checkpoint_bytes = self.checkpoint_bytes
+                        wi.trace = self.trace
                         wi.copy_traits(new_item,
                                        status = lambda t: t is not True)
-                        self.workflow.append(wi)                          
+                        with self.workflow_lock:
+                            self.workflow.append(wi)
 
                     for wi in self.workflow:
                         wi.lock.release()
@@ -662,19 +861,30 @@ class RemoteWorkflow(HasStrictTraits):
     
                 elif msg == Msg.ADD_ITEMS:
                     (idx, new_item) = payload
+                    if idx < len(self.workflow):
+                        self._supersede(idx)
                     wi = RemoteWorkflowItem()
                     wi.lock.acquire()
                     wi.copy_traits(new_item)
                     wi.matplotlib_events = self.matplotlib_events
                     wi.plot_lock = self.plot_lock
+                    wi.result_cache = self.result_cache
+                    wi.preview_events = self.preview_events
+                    wi.checkpoint_dir = self.checkpoint_dir
+                    wi.checkpoint_seconds = self.checkpoint_seconds
+                    wi.checkpoint_bytes = self.checkpoint_bytes
+                    wi.trace = self.trace
                     
-                    self.workflow.insert(idx, wi)
+                    with self.workflow_lock:
+                        self.workflow.insert(idx, wi)
                     self.exec_q.put((idx, (wi, wi.apply)))
                     wi.lock.release()
     
                 elif msg == Msg.REMOVE_ITEMS:
                     idx = payload
-                    self.workflow.remove(self.workflow[idx])
+                    self._supersede(idx)
+                    with self.workflow_lock:
+                        self.workflow.remove(self.workflow[idx])
                     
                 elif msg == Msg.SELECT:
                     idx = payload
@@ -686,17 +896,27 @@ class RemoteWorkflow(HasStrictTraits):
                 elif msg == Msg.UPDATE_OP:
                     (idx, name, new) = payload
                     wi = self.workflow[idx]
-                    with wi.lock:
-                        if wi.operation.trait(name).status:
-                            raise RuntimeError("Tried to set a remote status trait")
-                        
-                        if wi.operation.trait(name).fixed:
-                            raise RuntimeError("Tried to set a remote fixed trait")
-                        
-                        if wi.operation.trait(name).transient:
-                            raise RuntimeError("Tried to set a remote transient trait")
-                        
-                        wi.operation.trait_set(**{name : new})
+                    
+                    # if something is running (or plotting), we may have to 
+                    # wait for the lock.  make sure the run loop doesn't 
+                    # start another stale computation in the meantime.
+                    wi.pending_updates += 1
+                    self._supersede(idx)
+                    try:
+                        with wi.lock:
+                            if wi.operation.trait(name).status:
+                                raise RuntimeError("Tried to set a remote status trait")
+                            
+                            if wi.operation.trait(name).fixed:
+                                raise RuntimeError("Tried to set a remote fixed trait")
+                            
+                            if wi.operation.trait(name).transient:
+                                raise RuntimeError("Tried to set a remote transient trait")
+                            
+                            wi.operation.trait_set(**{name : new})
+                    finally:
+                        wi.pending_updates -= 1
+                        wi.last_request = time.monotonic()
                         
                 elif msg == Msg.UPDATE_VIEW:
                     (idx, view_id, name, new) = payload
@@ -736,6 +956,7 @@ class RemoteWorkflow(HasStrictTraits):
                 elif msg == Msg.ESTIMATE:
                     idx = payload
                     wi = self.workflow[idx]
+                    self._supersede(idx)
                     self.exec_q.put((idx - 0.5, (wi, wi.estimate)))
                     
                 elif msg == Msg.SHUTDOWN:
@@ -757,6 +978,23 @@ class RemoteWorkflow(HasStrictTraits):
             except Exception:
                 log_exception()
             
+    def _supersede(self, idx):
+        """
+        Called (from the receiving thread) when there's a new request that 
+        will change workflow item ``idx``.  Whatever is running for that item 
+        or any item after it is stale, so cancel it; and start the item's
+        debounce window over again.
+        """
+        
+        wi = self.workflow[idx]
+        wi.last_request = time.monotonic()
+        wi.first_request = min(wi.first_request, wi.last_request)
+        
+        for wi in self.workflow[idx:]:
+            token = wi.cancel_token
+            if token is not None:
+                token.cancel()
+            
     def send_main(self, parent_conn):
         try:
             while True:
@@ -887,6 +1125,7 @@ class RemoteWorkflow(HasStrictTraits):
                 with wi.lock:
                     wi.result = None
                     wi.status = "invalid"
+                    wi.want_preview = True
                 self.exec_q.put((idx, (wi, wi.apply)))
         
         elif msg == Changed.VIEW:
@@ -897,6 +1136,7 @@ class RemoteWorkflow(HasStrictTraits):
                 
         elif msg == Changed.ESTIMATE:
             if wi.operation.should_clear_estimate(Changed.ESTIMATE, payload):
+                wi.estimate_key = None
                 try:
                     wi.operation.clear_estimate()
                 except AttributeError:
@@ -910,6 +1150,7 @@ class RemoteWorkflow(HasStrictTraits):
                 self.exec_q.put((idx - 0.1, (wi, wi.plot)))
                 
             if wi.operation.should_apply(Changed.ESTIMATE_RESULT, payload):
+                wi.want_preview = True
                 self.exec_q.put((idx, (wi, wi.apply)))
                         
         elif msg == Changed.OP_STATUS:
@@ -927,6 +1168,11 @@ class RemoteWorkflow(HasStrictTraits):
                 wi.current_view.update_plot_names(wi)
                 self.exec_q.put((idx - 0.1, (wi, wi.plot)))
                 
+            # if this is the first item with a preview result, compute the 
+            # real one once the preview has been plotted.
+            if wi.preview and not (wi.previous_wi and wi.previous_wi.preview):
+                self.exec_q.put((idx + 0.25, (wi, wi.refine)))
+                
         elif msg == Changed.PREV_RESULT:
             if wi.operation.should_clear_estimate(Changed.PREV_RESULT, payload):
                 try:
@@ -964,7 +1210,9 @@ class RemoteWorkflow(HasStrictTraits):
         if obj.result:
             obj.channels = list(obj.result.channels)
             obj.conditions = dict(obj.result.conditions)
-            obj.statistics = dict(obj.result.statistics)
+            # (a copy shares the statistics, so the lazy ones aren't 
+            # computed until they're needed.)
+            obj.statistics = obj.result.statistics.copy()
  
             # some things in metadata are unpicklable, functions and such,
             # so filter them out.
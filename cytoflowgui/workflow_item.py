@@ -22,25 +22,31 @@ Created on Mar 15, 2015
 @author: brian
 '''
 
-import warnings, logging, sys, threading
+import warnings, logging, sys, os, shutil, threading, pickle, hashlib, time
+from contextlib import contextmanager
 
 from traits.api import HasStrictTraits, Instance, List, DelegatesTo, Enum, \
                        Property, cached_property, Bool, \
-                       Str, Dict, Any, Event, Tuple
+                       Str, Dict, Any, Event, Tuple, Int, Float
 from traitsui.api import View, Item, Handler, InstanceEditor
 from pyface.qt import QtGui
 
 import matplotlib.pyplot as plt
 
+import numpy as np
 import pandas as pd
 
 from cytoflow import Experiment
+from cytoflow.experiment import Statistics
 from cytoflow.operations.i_operation import IOperation
 from cytoflow.views.i_view import IView
-from cytoflow.utility import CytoflowError, CytoflowOpError, CytoflowViewError
+from cytoflow.utility import CytoflowError, CytoflowOpError, CytoflowViewError, \
+                             CytoflowCancelled, CytoflowWarning, \
+                             Trace, tracing, traced
 
 # from cytoflowgui.flow_task_pane import TabListEditor
 from cytoflowgui.serialization import camel_registry
+from cytoflowgui.util import prune_checkpoints
 
 # http://stackoverflow.com/questions/1977362/how-to-create-module-wide-variables-in-python
 this = sys.modules[__name__]
@@ -48,6 +54,16 @@ this.last_view_plotted = None
 
 logger = logging.getLogger(__name__)
 
+# the preview sample is stratified on the conditions with at most this many
+# values, whatever their type (a float condition is often a dose or a time
+# point, one per tube), as long as that makes at most _PREVIEW_MAX_GROUPS
+# groups.
+_PREVIEW_MAX_LEVELS = 100
+_PREVIEW_MAX_GROUPS = 1000
+
+# RemoteWorkflowItem.estimate_key when the operation's last estimate failed
+_FAILED_ESTIMATE = "failed"
+
 class WorkflowItem(HasStrictTraits):
     """        
     The basic unit of a Workflow: wraps an operation and a list of views.
@@ -93,7 +109,7 @@ class WorkflowItem(HasStrictTraits):
     channels = List(Str, status = True)
     conditions = Dict(Str, pd.Series, status = True)
     metadata = Dict(Str, Any, status = True)
-    statistics = Dict(Tuple(Str, Str), pd.Series, status = True)
+    statistics = Instance(Statistics, args = (), status = True)
 
     # the IViews associated with this operation
     views = List(IView, copy = "ref")
@@ -133,7 +149,7 @@ class WorkflowItem(HasStrictTraits):
     
     # is the wi valid?
     # MAGIC: first value is the default
-    status = Enum("invalid", "waiting", "estimating", "applying", "valid", "loading", status = True)
+    status = Enum("invalid", "waiting", "estimating", "applying", "valid", "loading", "preview", status = True)
     
     # report the errors and warnings
     op_error = Str(status = True)
@@ -146,6 +162,10 @@ class WorkflowItem(HasStrictTraits):
     view_error_trait = Str(status = True)
     view_warning = Str(status = True)
     view_warning_trait = Str(status = True)
+    
+    # how long the last estimate, apply and plot took (and how much memory
+    # they used.)  see RemoteWorkflowItem._timed
+    timing = Str(status = True)
 
     # the central event to kick of WorkflowItem update logic
     changed = Event
@@ -168,7 +188,7 @@ class WorkflowItem(HasStrictTraits):
     def _get_icon(self):
         if self.status == "valid":
             return QtGui.QStyle.SP_DialogApplyButton  # @UndefinedVariable
-        elif self.status == "estimating" or self.status == "applying":
+        elif self.status in ["estimating", "applying", "preview"]:
             return QtGui.QStyle.SP_BrowserReload  # @UndefinedVariable
         else: # self.valid == "invalid" or None
             return QtGui.QStyle.SP_DialogCancelButton  # @UndefinedVariable
@@ -204,7 +224,7 @@ def _dump_wi(wi):
                 channels = wi.channels,
                 conditions = wi.conditions,
                 metadata = wi.metadata,
-                statistics = wi.statistics,
+                statistics = dict(wi.statistics),
                 current_view = wi.current_view,
                 default_view = wi.default_view)
     
@@ -225,7 +245,7 @@ def _dump_wi_v1(wi):
 @camel_registry.loader('workflow-item', version = 1)
 def _load_wi_v1(data, version):
     
-    data['statistics'] = {tuple(k) : pd.Series() for k in data['statistics']}
+    data['statistics'] = Statistics({tuple(k) : pd.Series() for k in data['statistics']})
     
     ret = WorkflowItem(**data)
         
@@ -233,10 +253,163 @@ def _load_wi_v1(data, version):
 
 @camel_registry.loader('workflow-item', version = 2)
 def _load_wi(data, version):
+    data['statistics'] = Statistics(data['statistics'])
     return WorkflowItem(**data)
     
 class RemoteWorkflowItem(WorkflowItem):
     
+    # the results of applying operations, shared by the whole workflow
+    result_cache = Any(transient = True)
+    
+    # the key that ``result`` is cached under (see _get_result_key).  None
+    # if there isn't a result, or if it can't be cached.
+    result_key = Any(transient = True)
+    
+    # the key of the operation's current estimate (see _get_estimate_key):
+    # None if it hasn't been estimated (or the estimate was cleared), and
+    # _FAILED_ESTIMATE if the last estimate didn't finish, so we don't know
+    # what the operation's estimated state is.  part of the result key.
+    estimate_key = Any(transient = True)
+    
+    # the cancellation token of the estimate() or apply() that's running now
+    # (if any); when someone first and last asked for this item to be re-run
+    # since it last ran; and how many changes to the operation are waiting 
+    # for the lock.  see RemoteWorkflow.run
+    cancel_token = Any(transient = True)
+    first_request = Float(sys.float_info.max, transient = True)
+    last_request = Float(0, transient = True)
+    pending_updates = Int(0, transient = True)
+    
+    # progressive ("preview") mode.  when this item's operation changes and
+    # its input has more than preview_events events, apply() only applies 
+    # the operation to a stratified subsample of the input, and sets 
+    # ``preview`` and status to "preview".  (so do the items after it.)
+    # then refine() applies it to the whole input and replaces the result.
+    # set preview_events to 0 to turn this off.
+    preview_events = Int(0, transient = True)
+    want_preview = Bool(False, transient = True)
+    preview = Bool(False, transient = True)
+    
+    # the (input, subsample) that the last preview was computed from
+    preview_sample = Tuple(Any, Any, transient = True)
+    
+    # if set, results that take longer than checkpoint_seconds to compute
+    # are saved (with Experiment.save) in checkpoint_dir, under their result
+    # key, and loaded from there instead of re-computed -- even after the
+    # workflow is closed and re-opened.  when the checkpoints take up more
+    # than checkpoint_bytes, the least-recently used ones are deleted.
+    checkpoint_dir = Str(transient = True)
+    checkpoint_seconds = Float(0, transient = True)
+    checkpoint_bytes = Float(4 * 2 ** 30, transient = True)
+    
+    # the (wall time, peak memory) of the last estimate, apply and plot,
+    # and the workflow's trace, which keeps everything that's been run
+    timings = Dict(Str, Tuple(Float, Any), transient = True)
+    trace = Any(transient = True)
+    
+    def _get_result_key(self):
+        """
+        Hash the previous result's key, the operation's (non-transient)
+        parameters, the files it reads, and the key of its estimate.  If two
+        calls to apply() would have the same key, they would have the same
+        result.  Returns ``None`` if the operation's parameters can't be
+        hashed, or if its last estimate failed.
+        """
+        
+        # an operation whose last estimate failed may still have an older
+        # estimate (or part of a new one); don't cache what it computes.
+        if self.estimate_key == _FAILED_ESTIMATE:
+            return None
+        
+        return self._hash_operation(self.estimate_key)
+    
+    def _get_estimate_key(self):
+        """
+        Hash what the operation's estimate is computed from: the previous
+        result's key, the operation's (non-transient) parameters and the 
+        files they name.  (The estimates themselves are often functions, 
+        which can't be hashed.)  Re-estimating from the same inputs gives 
+        the same key, in this session or the next.
+        """
+        
+        return self._hash_operation()
+    
+    def _hash_operation(self, *extra):
+        """
+        Hash the previous result's key, the operation's (non-transient)
+        parameters, the name, size and modification time of every file they
+        name, and ``extra``.  ``None`` if any of them can't be hashed.
+        """
+        
+        if self.previous_wi:
+            if self.previous_wi.result_key is None:
+                return None
+            prev_key = self.previous_wi.result_key
+        else:
+            prev_key = None
+            
+        op = self.operation
+        names = sorted([x for x in op.copyable_trait_names() 
+                        if not op.trait(x).status])
+        params = [(x, op.trait_get(x)[x]) for x in names]
+        
+        # if the operation reads files (an import, or an estimate from
+        # controls), the key depends on them too.  otherwise, a checkpoint
+        # could outlive a change to the data on disk.
+        try:
+            files = _file_stats([v for _, v in params])
+        except OSError:
+            return None
+        
+        try:
+            state = pickle.dumps((prev_key,
+                                  op.__class__.__name__,
+                                  params,
+                                  files) + extra)
+        except Exception:
+            return None
+        
+        return hashlib.sha1(state).hexdigest()
+    
+    def _result_changed(self, new):
+        if new is None:
+            self.result_key = None
+            self.preview = False
+            
+    def _get_preview_input(self, prev_result):
+        """
+        A stratified subsample of ``prev_result`` -- the same fraction of 
+        each tube (or other combination of conditions with few values) -- with 
+        about ``preview_events`` events.  Cached until the input changes.
+        """
+        
+        if self.preview_sample[0] is prev_result:
+            return self.preview_sample[1]
+        
+        rs = np.random.RandomState(0)
+        frac = self.preview_events / len(prev_result)
+        
+        data = prev_result.data
+        conditions = [c for c in prev_result.conditions
+                      if data[c].nunique() <= _PREVIEW_MAX_LEVELS]
+
+        groups = None
+        if conditions:
+            groups = data.groupby(conditions, observed = True).indices.values()
+            if len(groups) > _PREVIEW_MAX_GROUPS:
+                groups = None
+                
+        if groups is None:
+            groups = [np.arange(len(prev_result))]
+            
+        positions = [rs.choice(g, size = max(1, int(round(len(g) * frac))), replace = False)
+                     for g in groups]
+        positions = np.sort(np.concatenate(positions))
+        
+        sample = prev_result._take(positions)
+        self.preview_sample = (prev_result, sample)
+        return sample
+    
     def estimate(self):
         logger.debug("WorkflowItem.estimate :: {}".format((self)))
 
@@ -251,7 +424,11 @@ class RemoteWorkflowItem(WorkflowItem):
                 except AttributeError:
                     pass
 
-                self.operation.estimate(prev_result)
+                # set the key first: the operation's new estimate kicks off
+                # an apply(), which needs it.
+                self.estimate_key = self._get_estimate_key()
+                with self._timed("estimate"):
+                    self.operation.estimate(prev_result)
 
                 self.estimate_error = ""
                 if w:
@@ -260,8 +437,15 @@ class RemoteWorkflowItem(WorkflowItem):
                     self.estimate_warning = ""
                 
                 return True
+            
+            except CytoflowCancelled:
+                # the RemoteWorkflow will try again
+                self.estimate_key = _FAILED_ESTIMATE
+                self.status = "invalid"
+                return False
                 
             except CytoflowError as e:
+                self.estimate_key = _FAILED_ESTIMATE
                 self.estimate_error = e.__str__()    
                 self.status = "invalid"
                 return False 
@@ -282,17 +466,81 @@ class RemoteWorkflowItem(WorkflowItem):
         self.apply_called = True
          
         prev_result = self.previous_wi.result if self.previous_wi else None
+        
+        # have we seen these parameters (and this input) before?  the first
+        # item (usually an import) is always re-run, in case its files
+        # changed on disk.
+        key = self._get_result_key()
+        cached = self.result_cache.get(key) \
+                 if key and self.result_cache is not None and self.previous_wi else None
+                 
+        if cached:
+            (r, self.op_warning, self.op_warning_trait) = cached
+            self.preview = False
+            self.want_preview = False
+            self.result_key = key
+            self.result = r
+            self.op_error = ""
+            self.op_error_trait = ""
+            self.status = "valid"
+            return
+        
+        # if the input is a preview, so is the output.  otherwise, if this
+        # item was just changed, preview it on a subsample of the input.
+        preview = False
+        if self.previous_wi and self.previous_wi.preview:
+            preview = True
+        elif (self.want_preview 
+              and self.preview_events > 0
+              and prev_result is not None 
+              and len(prev_result) > self.preview_events):
+            prev_result = self._get_preview_input(prev_result)
+            preview = True
+            
+        self.want_preview = False
+        
+        # previews aren't cached
+        if preview:
+            key = None
+            
+        # maybe we saved it in a previous session
+        if key:
+            r = self._load_checkpoint(key)
+            if r is not None:
+                self.preview = False
+                self.result_key = key
+                self.result = r
+                self.op_warning = ""
+                self.op_warning_trait = ""
+                self.op_error = ""
+                self.op_error_trait = ""
+                if self.result_cache is not None:
+                    self.result_cache.put(key, (r, "", ""),
+                                          r.data.memory_usage(index = True).sum())
+                self.status = "valid"
+                return
          
         with warnings.catch_warnings(record = True) as w:
             try:    
-                self.status = "applying"
+                # if we're refining a preview, it's still a preview until
+                # we're done
+                if not self.preview:
+                    self.status = "applying"
                 
                 try:
                     plt.gcf().canvas.set_working(True)
                 except AttributeError:
                     pass
                 
-                r = self.operation.apply(prev_result)
+                start = time.perf_counter()
+                with self._timed("apply"):
+                    r = self.operation.apply(prev_result)
+                elapsed = time.perf_counter() - start
+                
+                # set the key first: setting the result kicks off the next
+                # item, which needs it.
+                self.result_key = key
+                self.preview = preview
                 self.result = r
 
                 self.op_error = ""
@@ -303,7 +551,19 @@ class RemoteWorkflowItem(WorkflowItem):
                     self.op_warning = ""
                     self.op_warning_trait = ""
                     
-                self.status = "valid"
+                if key and self.result_cache is not None:
+                    self.result_cache.put(key, 
+                                          (r, self.op_warning, self.op_warning_trait),
+                                          r.data.memory_usage(index = True).sum())
+                    
+                if key and elapsed >= self.checkpoint_seconds:
+                    self._save_checkpoint(key, r)
+                    
+                self.status = "preview" if preview else "valid"
+                
+            except CytoflowCancelled:
+                # the RemoteWorkflow will try again
+                self.status = "preview" if self.preview else "invalid"
             
             except CytoflowOpError as e:                
                 self.result = None
@@ -323,6 +583,92 @@ class RemoteWorkflowItem(WorkflowItem):
                 except AttributeError:
                     pass
 
+
+    @contextmanager
+    def _timed(self, kind):
+        """
+        Record the code this wraps in a new trace, then update ``timings``
+        and ``timing`` and add the trace to the workflow's.
+        """
+        
+        trace = Trace()
+        try:
+            with tracing(trace), traced(kind, str(self)):
+                yield
+        finally:
+            # the outermost call is the last to finish
+            event = trace.events[-1]
+            timings = dict(self.timings)
+            timings[kind] = (event.duration, event.memory)
+            self.timings = timings
+            self.timing = _format_timings(timings)
+            
+            if self.trace is not None:
+                self.trace.extend(trace)
+
+    def _load_checkpoint(self, key):
+        """The result saved under ``key`` in ``checkpoint_dir``, or ``None``"""
+        
+        if not self.checkpoint_dir:
+            return None
+        
+        path = os.path.join(self.checkpoint_dir, key)
+        if not os.path.isdir(path):
+            return None
+        
+        try:
+            ret = Experiment.load(path)
+        except CytoflowError as e:
+            logger.warning("Couldn't load checkpoint {}: {}".format(path, e))
+            return None
+        
+        # mark it as recently used (see prune_checkpoints)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        
+        return ret
+        
+    def _save_checkpoint(self, key, result):
+        """Save ``result`` under ``key`` in ``checkpoint_dir``"""
+        
+        if not self.checkpoint_dir:
+            return
+        
+        path = os.path.join(self.checkpoint_dir, key)
+        if os.path.isdir(path):
+            return
+        
+        with warnings.catch_warnings(record = True) as w:
+            warnings.simplefilter("always", CytoflowWarning)
+            try:
+                os.makedirs(self.checkpoint_dir, exist_ok = True)
+                result.save(path)
+            except (OSError, CytoflowError) as e:
+                logger.warning("Couldn't save checkpoint {}: {}".format(path, e))
+                return
+
+        # if some of the metadata couldn't be saved, the operations after 
+        # this one might need it.  don't keep an incomplete checkpoint.
+        if any(issubclass(x.category, CytoflowWarning) for x in w):
+            shutil.rmtree(path, ignore_errors = True)
+            return
+            
+        prune_checkpoints(self.checkpoint_dir, self.checkpoint_bytes, keep = key)
+        
+    def refine(self):
+        """
+        Replace a preview result with the result of applying the operation
+        to the whole input.
+        """
+        logger.debug("WorkflowItem.refine :: {}".format((self)))
+        
+        # if the input is a preview too, the previous item will take care 
+        # of it.  
+        if self.preview and not (self.previous_wi and self.previous_wi.preview):
+            self.want_preview = False
+            self.apply()
         
     def plot(self):              
         logger.debug("WorkflowItem.plot :: {}".format((self)))
@@ -357,7 +703,8 @@ class RemoteWorkflowItem(WorkflowItem):
                 except AttributeError:
                     pass
                 
-                self.current_view.plot_wi(self)
+                with self._timed("plot"):
+                    self.current_view.plot_wi(self)
                 self.view_error = ""
                 self.view_error_trait = ""
             
@@ -402,4 +749,46 @@ class RemoteWorkflowItem(WorkflowItem):
             return True
 
                     
-            
\ No newline at end of file
+            
+
+
+def _format_timings(timings):
+    """Format ``RemoteWorkflowItem.timings`` for the GUI."""
+    
+    ret = []
+    for kind in ["estimate", "apply", "plot"]:
+        if kind not in timings:
+            continue
+        
+        seconds, memory = timings[kind]
+        if memory:
+            ret.append("{}: {:.2f} s, {:.1f} MB".format(kind, seconds, memory / 2 ** 20))
+        else:
+            ret.append("{}: {:.2f} s".format(kind, seconds))
+            
+    return "; ".join(ret)
+
+def _file_stats(values):
+    """
+    The (name, modification time, size) of each existing file named in 
+    ``values``: by a string, or in a list, tuple, set or dict of them, or as
+    the ``file`` of an object (a :class:`.Tube`, say.)
+    """
+    
+    stats = set()
+    todo = list(values)
+    while todo:
+        v = todo.pop()
+        if isinstance(v, str):
+            if os.path.isfile(v):
+                st = os.stat(v)
+                stats.add((v, st.st_mtime_ns, st.st_size))
+        elif isinstance(v, dict):
+            todo.extend(v.keys())
+            todo.extend(v.values())
+        elif isinstance(v, (list, tuple, set)):
+            todo.extend(v)
+        elif isinstance(getattr(v, 'file', None), str):
+            todo.append(v.file)
+            
+    return sorted(stats)
@@ -0,0 +1,5 @@
+from PyInstaller.utils.hooks import collect_submodules
+
+# cytoflow imports its operations, views and utilities lazily (see
+# cytoflow/utility/lazy.py), so PyInstaller can't find them by itself.
+hiddenimports = collect_submodules('cytoflow')
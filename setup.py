@@ -51,7 +51,7 @@ if has_sphinx:
 setup(
     name = "cytoflow",
     version = versioneer.get_version(),  # @UndefinedVariable
-    packages = find_packages(exclude = ["package", "package.qt"]),
+    packages = find_packages(exclude = ["package", "package.qt", "benchmarks"]),
     cmdclass = cmdclass,
     
     # Project uses reStructuredText, so ensure that the docutils get
@@ -136,6 +136,7 @@ setup(
                  'Topic :: Software Development :: Libraries :: Python Modules'],
     
     entry_points={'console_scripts' : ['cf-channel_voltages = cytoflow.scripts.channel_voltages:main',
-                                       'cf-fcs_metadata = cytoflow.scripts.fcs_metadata:main'],
+                                       'cf-fcs_metadata = cytoflow.scripts.fcs_metadata:main',
+                                       'cf-batch_run = cytoflowgui.batch_run:main'],
                   'gui_scripts' : ['cytoflow-gui = cytoflowgui.run:run_gui']}
 )